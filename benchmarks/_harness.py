@@ -0,0 +1,108 @@
+"""Shared helpers for the benchmark scripts.
+
+Each benchmark script produces a JSON report of the form::
+
+    {
+        "meta": {...},
+        "results": {case: {op: {impl: {metric: value, ...}, ...}, ...}, ...}
+    }
+
+and can compare itself against a previously saved report, exiting non-zero
+when a tracked metric regressed past a threshold.
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+Results = Dict[str, Dict[str, Dict[str, Dict[str, Any]]]]
+
+
+def best_time(fn: Callable[[], Any], repeat: int) -> float:
+    """Run fn repeat times and return the fastest wall-clock time in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        if elapsed < best:
+            best = elapsed
+    return best
+
+
+def meta() -> Dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+    }
+
+
+def add_common_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--repeat", type=int, default=5, help="timing repetitions")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument(
+        "--baseline", help="JSON report to compare against; exit 1 on regression"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="allowed relative drop of the compared metric (default: 0.10)",
+    )
+    parser.add_argument(
+        "--cases", nargs="*", help="only run the named cases (default: all)"
+    )
+
+
+def write_report(results: Results, output: Optional[str]) -> Dict[str, Any]:
+    report = {"meta": meta(), "results": results}
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if output:
+        with open(output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return report
+
+
+def find_regressions(
+    results: Results, baseline: Results, metric: str, threshold: float
+) -> List[str]:
+    """
+    Compare metric (higher is better) for every case/op/impl present in both reports.
+
+    Returns a human readable line for each entry that dropped by more than threshold.
+    """
+    regressions = []
+    for case, ops in results.items():
+        for op, impls in ops.items():
+            for impl, values in impls.items():
+                old = baseline.get(case, {}).get(op, {}).get(impl, {}).get(metric)
+                new = values.get(metric)
+                if not old or new is None:
+                    continue
+                if new < old * (1.0 - threshold):
+                    regressions.append(
+                        f"{case}/{op}/{impl}: {metric} {old:.4g} -> {new:.4g} "
+                        f"({(new - old) / old:+.1%})"
+                    )
+    return regressions
+
+
+def check_baseline(
+    results: Results, baseline_path: Optional[str], metric: str, threshold: float
+) -> int:
+    """Return the process exit status after comparing against baseline_path."""
+    if not baseline_path:
+        return 0
+    with open(baseline_path) as f:
+        baseline = json.load(f)["results"]
+    regressions = find_regressions(results, baseline, metric, threshold)
+    for line in regressions:
+        print(f"REGRESSION {line}", file=sys.stderr)
+    return 1 if regressions else 0
@@ -0,0 +1,232 @@
+"""Throughput benchmark for stdlib.csv against CPython's csv module.
+
+Usage::
+
+    python benchmarks/bench_csv.py --output csv.json
+    python benchmarks/bench_csv.py --baseline csv.json --threshold 0.1
+
+Every case is a synthetic dataset plus the dialect parameters used to write and
+read it. For each case the reader and writer of both implementations are timed
+and reported as MB/s and rows/s. The stdlib entries also carry ``vs_cpython``,
+the stdlib throughput divided by CPython's; it is the default metric compared
+against a baseline since it is far less sensitive to the machine the benchmark
+runs on than raw MB/s.
+
+Before an operation is timed, the stdlib reader must return the same rows as
+CPython's and the stdlib writer the same text. An operation that fails or
+disagrees is reported as an error with no timings for either implementation,
+and the script then exits with status 1. Operations listed in KNOWN_FAILURES
+are reported as expected failures instead; once one of them passes it is an
+error until it is removed from the list.
+"""
+
+import argparse
+import csv as py_csv
+import io
+import random
+import sys
+from typing import Any, Callable, Dict, List, Tuple
+
+from _harness import add_common_args, best_time, check_baseline, write_report
+
+from stdlib import csv
+
+Row = List[Any]
+Case = Tuple[Callable[[random.Random, int], List[Row]], Dict[str, Any]]
+
+_WORDS = ["alpha", "beta", "gamma", "delta", "epsilon", "zeta", "eta", "theta"]
+
+
+def _narrow_numeric(rng: random.Random, n: int) -> List[Row]:
+    return [
+        [i, rng.randint(0, 10**6), round(rng.random() * 1000, 3), rng.randint(-99, 99)]
+        for i in range(n)
+    ]
+
+
+def _wide_text(rng: random.Random, n: int) -> List[Row]:
+    return [
+        [" ".join(rng.choices(_WORDS, k=rng.randint(1, 4))) for _ in range(40)]
+        for _ in range(n)
+    ]
+
+
+def _heavily_quoted(rng: random.Random, n: int) -> List[Row]:
+    return [
+        [
+            f'{rng.choice(_WORDS)}, "{rng.choice(_WORDS)}"',
+            f"{rng.choice(_WORDS)},{rng.choice(_WORDS)}",
+            f'say ""{rng.choice(_WORDS)}""',
+            rng.choice(_WORDS),
+        ]
+        for _ in range(n)
+    ]
+
+
+def _embedded_newlines(rng: random.Random, n: int) -> List[Row]:
+    return [
+        [i, f"{rng.choice(_WORDS)}\n{rng.choice(_WORDS)}", rng.choice(_WORDS)]
+        for i in range(n)
+    ]
+
+
+def _mixed(rng: random.Random, n: int) -> List[Row]:
+    return [
+        [i, rng.choice(_WORDS), rng.random() * 100, " ".join(rng.sample(_WORDS, 3))]
+        for i in range(n)
+    ]
+
+
+def _plain_text(rng: random.Random, n: int) -> List[Row]:
+    # QUOTE_NONE without special characters, so both readers agree on the data
+    return [[rng.choice(_WORDS) for _ in range(8)] for _ in range(n)]
+
+
+CASES: Dict[str, Case] = {
+    "narrow_numeric": (_narrow_numeric, {}),
+    "wide_text": (_wide_text, {}),
+    "heavily_quoted": (_heavily_quoted, {}),
+    "embedded_newlines": (_embedded_newlines, {}),
+    "quote_minimal": (_mixed, {"quoting": py_csv.QUOTE_MINIMAL}),
+    "quote_all": (_mixed, {"quoting": py_csv.QUOTE_ALL}),
+    "quote_nonnumeric": (_mixed, {"quoting": py_csv.QUOTE_NONNUMERIC}),
+    "quote_none": (_plain_text, {"quoting": py_csv.QUOTE_NONE, "escapechar": "\\"}),
+}
+
+# (case, op) pairs the stdlib module does not support yet, with the reason
+KNOWN_FAILURES: Dict[Tuple[str, str], str] = {
+    ("embedded_newlines", "read"): "quoted fields spanning lines are not parsed",
+    ("quote_nonnumeric", "read"): "unquoted fields are not converted to float",
+}
+
+IMPLEMENTATIONS: Dict[str, Any] = {"cpython": py_csv, "stdlib": csv}
+
+
+def _read(module: Any, text: str, params: Dict[str, Any]) -> int:
+    rows = 0
+    for _ in module.reader(io.StringIO(text, newline=""), **params):
+        rows += 1
+    return rows
+
+
+def _write(module: Any, rows: List[Row], params: Dict[str, Any]) -> int:
+    out = io.StringIO()
+    module.writer(out, **params).writerows(rows)
+    return len(out.getvalue())
+
+
+def _check_read(text: str, params: Dict[str, Any]) -> None:
+    # A stdlib reader that fails or parses differently must not get a timing
+    expected = list(py_csv.reader(io.StringIO(text, newline=""), **params))
+    actual = list(csv.reader(io.StringIO(text, newline=""), **params))
+    if actual != expected:
+        raise ValueError("stdlib rows differ from CPython's")
+
+
+def _check_write(rows: List[Row], params: Dict[str, Any]) -> None:
+    # Likewise for a stdlib writer that fails or formats differently
+    expected, actual = io.StringIO(), io.StringIO()
+    py_csv.writer(expected, **params).writerows(rows)
+    csv.writer(actual, **params).writerows(rows)
+    if actual.getvalue() != expected.getvalue():
+        raise ValueError("stdlib output differs from CPython's")
+
+
+def run_case(
+    name: str, nrows: int, repeat: int, seed: int
+) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    make_rows, params = CASES[name]
+    rows = make_rows(random.Random(seed), nrows)
+    out = io.StringIO()
+    py_csv.writer(out, **params).writerows(rows)
+    text = out.getvalue()
+    nbytes = len(text.encode("utf-8"))
+
+    ops: Dict[str, Callable[[Any], int]] = {
+        "read": lambda module: _read(module, text, params),
+        "write": lambda module: _write(module, rows, params),
+    }
+    checks: Dict[str, Callable[[], None]] = {
+        "read": lambda: _check_read(text, params),
+        "write": lambda: _check_write(rows, params),
+    }
+    results: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    for op, fn in ops.items():
+        known = KNOWN_FAILURES.get((name, op))
+        try:
+            checks[op]()
+            timings = {
+                impl: best_time(lambda: fn(module), repeat)
+                for impl, module in IMPLEMENTATIONS.items()
+            }
+        except Exception as e:  # only the error is reported for this operation
+            error = f"{type(e).__name__}: {e}"
+            key = "expected_failure" if known else "error"
+            results[op] = {"stdlib": {key: error}}
+            continue
+        if known:
+            error = f"passes but is listed in KNOWN_FAILURES ({known})"
+            results[op] = {"stdlib": {"error": error}}
+            continue
+        results[op] = {
+            impl: {
+                "seconds": seconds,
+                "mb_per_s": nbytes / seconds / 1e6,
+                "rows_per_s": nrows / seconds,
+            }
+            for impl, seconds in timings.items()
+        }
+        stdlib_res, cpython_res = results[op]["stdlib"], results[op]["cpython"]
+        stdlib_res["vs_cpython"] = stdlib_res["mb_per_s"] / cpython_res["mb_per_s"]
+    return results
+
+
+def _report_errors(results: Dict[str, Dict[str, Dict[str, Dict[str, Any]]]]) -> int:
+    errors = 0
+    for name, ops in results.items():
+        for op, impls in ops.items():
+            for impl, values in impls.items():
+                if "expected_failure" in values:
+                    reason = KNOWN_FAILURES[name, op]
+                    print(
+                        f"XFAIL {name}/{op}/{impl}: {reason}: "
+                        f"{values['expected_failure']}",
+                        file=sys.stderr,
+                    )
+                if "error" in values:
+                    print(
+                        f"ERROR {name}/{op}/{impl}: {values['error']}", file=sys.stderr
+                    )
+                    errors += 1
+    return errors
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description=(__doc__ or "").partition("\n")[0])
+    add_common_args(parser)
+    parser.add_argument("--rows", type=int, default=20000, help="rows per dataset")
+    parser.add_argument("--seed", type=int, default=12345)
+    parser.add_argument(
+        "--metric",
+        default="vs_cpython",
+        choices=["vs_cpython", "mb_per_s", "rows_per_s"],
+        help="metric compared against --baseline",
+    )
+    args = parser.parse_args(argv)
+
+    names = args.cases or list(CASES)
+    unknown = [name for name in names if name not in CASES]
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(unknown)}")
+
+    results = {
+        name: run_case(name, args.rows, args.repeat, args.seed) for name in names
+    }
+    write_report(results, args.output)
+    status = check_baseline(results, args.baseline, args.metric, args.threshold)
+    # A failing case is a bug to fix, not a number to compare
+    return 1 if _report_errors(results) else status
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,252 @@
+"""Benchmark for stdlib.re against CPython's re module.
+
+Usage::
+
+    python benchmarks/bench_re.py --output re.json
+    python benchmarks/bench_re.py --baseline re.json --threshold 0.1
+
+Every case is a synthetic corpus of lines plus a pattern. The per-line
+operations (module-level match, compiled match and search) run once per line,
+while findall and sub run over the whole corpus in one call. Results are
+reported as ns/op and MB/s, and stdlib entries carry ``vs_cpython``, CPython's
+time divided by stdlib's (higher is better), which is the default metric
+compared against a baseline.
+
+stdlib.re.match is a full match, so it is timed against CPython's
+re.fullmatch. Before an operation is timed, its stdlib result must equal
+CPython's; an operation that fails or disagrees is reported as an error with
+no timings for either implementation, and the script then exits with status 1.
+
+Each per-line stdlib operation is also timed with the empty pattern over the
+same lines. The engine settles that pattern right away, so its time, reported
+as ``ffi_ns_per_op``, is the cost of calling through that entry point with
+inputs of this length (module-level match, compiled match and search each
+have their own overhead, and encoding grows with the input). The remainder
+is reported as ``engine_ns_per_op``. The empty pattern matches every line,
+so the search baseline includes building a match; on a corpus where few
+lines match, the search remainder understates the engine time.
+
+Every case names the engine its pattern runs on, reported as ``engine`` with
+the stdlib results: ``automaton`` for the native DFA and Pike VM, ``fallback``
+for patterns only std::regex supports, such as backreferences, and
+``python`` for plain literals, which are matched with str methods without
+calling into the native library and so get no ``engine_ns_per_op``.
+"""
+
+import argparse
+import random
+import re as py_re
+import sys
+from typing import Any, Callable, Dict, List, NamedTuple
+
+from _harness import add_common_args, best_time, check_baseline, write_report
+
+from stdlib import re
+
+Corpus = Callable[[random.Random, int], List[str]]
+
+_LEVELS = ["INFO", "INFO", "INFO", "DEBUG", "WARN", "ERROR"]
+_WORDS = ["alpha", "beta", "gamma", "delta", "epsilon", "zeta", "eta", "theta"]
+_DOMAINS = ["example.com", "mail.example.org", "corp.test", "uni.edu"]
+
+
+class Case(NamedTuple):
+    corpus: Corpus
+    pattern: str
+    replacement: str = "X"  # $1 style group references
+    engine: str = "automaton"  # see the module docstring
+
+
+def _log_lines(rng: random.Random, n: int) -> List[str]:
+    return [
+        f"2024-{rng.randint(1, 12):02}-{rng.randint(1, 28):02} "
+        f"{rng.randint(0, 23):02}:{rng.randint(0, 59):02}:{rng.randint(0, 59):02} "
+        f"{rng.choice(_LEVELS)} [worker-{rng.randint(0, 15)}] "
+        f"{' '.join(rng.choices(_WORDS, k=5))} id={rng.randint(0, 10**6)} "
+        f"took {rng.randint(1, 999)}ms"
+        for _ in range(n)
+    ]
+
+
+def _emails(rng: random.Random, n: int) -> List[str]:
+    return [
+        (
+            f"{rng.choice(_WORDS)}.{rng.choice(_WORDS)}{rng.randint(0, 99)}@{rng.choice(_DOMAINS)}"
+            if rng.random() < 0.7
+            else f"not an email: {' '.join(rng.choices(_WORDS, k=3))}"
+        )
+        for _ in range(n)
+    ]
+
+
+def _ips(rng: random.Random, n: int) -> List[str]:
+    return [
+        (
+            ".".join(str(rng.randint(0, 255)) for _ in range(4))
+            if rng.random() < 0.8
+            else f"{rng.randint(0, 999)}.{rng.choice(_WORDS)}"
+        )
+        for _ in range(n)
+    ]
+
+
+def _long_line(rng: random.Random, n: int) -> List[str]:
+    # One long input with a single match at its end
+    words = rng.choices(_WORDS, k=n * 10)
+    return [" ".join(words) + " needle42"]
+
+
+def _backtracking(rng: random.Random, n: int) -> List[str]:
+    # Exponential for backtracking matchers; kept short so CPython finishes
+    return ["a" * 20 + "c" for _ in range(min(n, 10))]
+
+
+CASES: Dict[str, Case] = {
+    "log_lines": Case(
+        _log_lines,
+        r"(\d{4})-(\d{2})-(\d{2}) [\d:]+ (ERROR|WARN) \[worker-\d+\] .*",
+        r"<$4>",
+    ),
+    "emails": Case(_emails, r"[\w.+-]+@[\w-]+(\.[\w-]+)+"),
+    "ips": Case(_ips, r"(\d{1,3})\.(\d{1,3})\.(\d{1,3})\.(\d{1,3})"),
+    "literal": Case(_log_lines, r"ERROR", engine="python"),
+    "long_input": Case(_long_line, r"needle\d+"),
+    "backtracking": Case(_backtracking, r"(a|aa)+b"),
+    "backreference": Case(_log_lines, r"\b(\w+) \1\b", engine="fallback"),
+}
+
+# Operations timed once per line of the corpus; the others take the whole text
+PER_LINE_OPS = ("match", "compiled_match", "search")
+
+
+def _stdlib_ops(
+    case: Case, lines: List[str], text: str
+) -> Dict[str, Callable[[], Any]]:
+    regex = re.compile(case.pattern)
+    return {
+        "match": lambda: [re.match(case.pattern, line) for line in lines],
+        "compiled_match": lambda: [regex.match(line) for line in lines],
+        "search": lambda: [regex.search(line) for line in lines],
+        "findall": lambda: regex.findall(text),
+        "sub": lambda: regex.sub(case.replacement, text),
+    }
+
+
+def _cpython_ops(
+    case: Case, lines: List[str], text: str
+) -> Dict[str, Callable[[], Any]]:
+    pattern = case.pattern
+    regex = py_re.compile(pattern)
+    replacement = py_re.sub(r"\$(\d)", r"\\\1", case.replacement)
+    return {
+        "match": lambda: [py_re.fullmatch(pattern, line) for line in lines],
+        "compiled_match": lambda: [regex.fullmatch(line) for line in lines],
+        "search": lambda: [regex.search(line) for line in lines],
+        "findall": lambda: regex.findall(text),
+        "sub": lambda: regex.sub(replacement, text),
+    }
+
+
+def _cpython_expected(case: Case, lines: List[str], text: str) -> Dict[str, Any]:
+    # The result each stdlib operation must return, computed with CPython
+    regex = py_re.compile(case.pattern)
+    replacement = py_re.sub(r"\$(\d)", r"\\\1", case.replacement)
+    searches = [regex.search(line) for line in lines]
+    matches = [regex.fullmatch(line) is not None for line in lines]
+    return {
+        "match": matches,
+        "compiled_match": matches,
+        "search": [m.group() if m else None for m in searches],
+        "findall": [m.group() for m in regex.finditer(text)],
+        "sub": regex.sub(replacement, text),
+    }
+
+
+def run_case(
+    name: str, nlines: int, repeat: int, seed: int
+) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    case = CASES[name]
+    lines = case.corpus(random.Random(seed), nlines)
+    text = "\n".join(lines)
+    nbytes = len(text.encode("utf-8"))
+    impls = {
+        "cpython": _cpython_ops(case, lines, text),
+        "stdlib": _stdlib_ops(case, lines, text),
+    }
+    expected = _cpython_expected(case, lines, text)
+    # The empty pattern over the same lines, for the cost of the call itself
+    baseline_ops = _stdlib_ops(case._replace(pattern=""), lines, text)
+
+    results: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    for op, stdlib_op in impls["stdlib"].items():
+        nops = len(lines) if op in PER_LINE_OPS else 1
+        try:
+            # A stdlib operation that fails or disagrees must not get a timing
+            if stdlib_op() != expected[op]:
+                raise ValueError("stdlib result differs from CPython's")
+            timings = {impl: best_time(ops[op], repeat) for impl, ops in impls.items()}
+        except Exception as e:  # only the error is reported for this operation
+            results[op] = {"stdlib": {"error": f"{type(e).__name__}: {e}"}}
+            continue
+        results[op] = {
+            impl: {
+                "seconds": seconds,
+                "ns_per_op": seconds / nops * 1e9,
+                "mb_per_s": nbytes / seconds / 1e6,
+            }
+            for impl, seconds in timings.items()
+        }
+        stdlib_res, cpython_res = results[op]["stdlib"], results[op]["cpython"]
+        stdlib_res["engine"] = case.engine
+        stdlib_res["vs_cpython"] = cpython_res["seconds"] / stdlib_res["seconds"]
+        if op in PER_LINE_OPS and case.engine != "python":
+            overhead = best_time(baseline_ops[op], repeat) / nops * 1e9
+            stdlib_res["ffi_ns_per_op"] = overhead
+            stdlib_res["engine_ns_per_op"] = max(
+                stdlib_res["ns_per_op"] - overhead, 0.0
+            )
+    return results
+
+
+def _report_errors(results: Dict[str, Dict[str, Dict[str, Dict[str, Any]]]]) -> int:
+    errors = 0
+    for name, ops in results.items():
+        for op, impls in ops.items():
+            for impl, values in impls.items():
+                if "error" in values:
+                    print(
+                        f"ERROR {name}/{op}/{impl}: {values['error']}", file=sys.stderr
+                    )
+                    errors += 1
+    return errors
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description=(__doc__ or "").partition("\n")[0])
+    add_common_args(parser)
+    parser.add_argument("--lines", type=int, default=20000, help="lines per corpus")
+    parser.add_argument("--seed", type=int, default=12345)
+    parser.add_argument(
+        "--metric",
+        default="vs_cpython",
+        choices=["vs_cpython", "mb_per_s"],
+        help="metric compared against --baseline",
+    )
+    args = parser.parse_args(argv)
+
+    names = args.cases or list(CASES)
+    unknown = [name for name in names if name not in CASES]
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(unknown)}")
+
+    results = {
+        name: run_case(name, args.lines, args.repeat, args.seed) for name in names
+    }
+    write_report(results, args.output)
+    status = check_baseline(results, args.baseline, args.metric, args.threshold)
+    # A failing case is a bug to fix, not a number to compare
+    return 1 if _report_errors(results) else status
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,85 @@
+// aho_corasick.cpp
+#include "aho_corasick.hpp"
+
+#include <deque>
+
+namespace regex_engine {
+
+AhoCorasick::AhoCorasick(const std::vector<std::string>& needles, const std::vector<int>& ids) {
+    if (needles.empty()) return;
+
+    // Trie, with -1 for missing edges
+    std::vector<int32_t> next(256, -1);
+    std::vector<std::vector<int>> out(1);
+    for (size_t i = 0; i < needles.size(); ++i) {
+        int32_t s = 0;
+        for (unsigned char c : needles[i]) {
+            if (next[256 * s + c] < 0) {
+                next[256 * s + c] = static_cast<int32_t>(out.size());
+                out.emplace_back();
+                next.resize(next.size() + 256, -1);
+            }
+            s = next[256 * s + c];
+        }
+        out[s].push_back(ids[i]);
+    }
+
+    // Breadth-first: resolve missing edges through the failure links and
+    // inherit the outputs of each node's failure node.
+    std::vector<int32_t> fail(out.size(), 0);
+    std::deque<int32_t> queue;
+    for (int c = 0; c < 256; ++c) {
+        int32_t t = next[c];
+        if (t < 0) {
+            next[c] = 0;
+        } else {
+            queue.push_back(t);
+        }
+    }
+    while (!queue.empty()) {
+        int32_t s = queue.front();
+        queue.pop_front();
+        const std::vector<int>& inherited = out[fail[s]];
+        out[s].insert(out[s].end(), inherited.begin(), inherited.end());
+        for (int c = 0; c < 256; ++c) {
+            int32_t t = next[256 * s + c];
+            if (t < 0) {
+                next[256 * s + c] = next[256 * fail[s] + c];
+            } else {
+                fail[t] = next[256 * fail[s] + c];
+                queue.push_back(t);
+            }
+        }
+    }
+
+    nodes_ = out.size();
+    next_ = std::move(next);
+    out_start_.push_back(0);
+    for (const std::vector<int>& ids_at : out) {
+        outputs_.insert(outputs_.end(), ids_at.begin(), ids_at.end());
+        out_start_.push_back(static_cast<int32_t>(outputs_.size()));
+    }
+}
+
+int AhoCorasick::scan(const uint8_t* text, size_t len, std::vector<uint8_t>& matched,
+                      int wanted) const {
+    if (nodes_ == 0) return 0;
+    int count = 0;
+    auto record = [&](int32_t s) {
+        for (int32_t k = out_start_[s]; k < out_start_[s + 1]; ++k) {
+            if (!matched[outputs_[k]]) {
+                matched[outputs_[k]] = 1;
+                ++count;
+            }
+        }
+    };
+    int32_t s = 0;
+    record(s);  // empty needles
+    for (size_t i = 0; i < len && count < wanted; ++i) {
+        s = next_[256 * s + text[i]];
+        if (out_start_[s] != out_start_[s + 1]) record(s);
+    }
+    return count;
+}
+
+}  // namespace regex_engine
@@ -0,0 +1,35 @@
+// aho_corasick.hpp
+//
+// Aho-Corasick automaton reporting which of a set of byte strings occur in a
+// text, in a single pass over the text.
+#pragma once
+
+#include <cstddef>
+#include <cstdint>
+#include <string>
+#include <vector>
+
+namespace regex_engine {
+
+class AhoCorasick {
+public:
+    // ids[i] is reported when needles[i] occurs.
+    AhoCorasick(const std::vector<std::string>& needles, const std::vector<int>& ids);
+
+    bool empty() const { return nodes_ == 0; }
+
+    // Set matched[id] for every needle occurring in text[0:len] and return
+    // the number of ids that were not set before. Stops early once `wanted`
+    // ids have been set by this call.
+    int scan(const uint8_t* text, size_t len, std::vector<uint8_t>& matched, int wanted) const;
+
+private:
+    // Fully resolved transitions: next_[256 * state + byte]
+    std::vector<int32_t> next_;
+    // outputs_[out_start_[state]:out_start_[state + 1]] are the ids ending at state
+    std::vector<int> outputs_;
+    std::vector<int32_t> out_start_;
+    size_t nodes_ = 0;
+};
+
+}  // namespace regex_engine
@@ -0,0 +1,1432 @@
+// regex_engine.cpp
+#include "regex_engine.hpp"
+
+#include <algorithm>
+#include <cstring>
+#include <functional>
+
+namespace regex_engine {
+
+namespace {
+
+constexpr int kMaxRepeat = 1000;          // larger counted repetitions use std::regex
+constexpr size_t kMaxInsts = 100000;      // program size limit
+constexpr size_t kMaxDStates = 4096;      // DFA cache size before giving up
+
+ByteSet make_range(int lo, int hi) {
+    ByteSet s;
+    for (int c = lo; c <= hi; ++c) {
+        s.set(c);
+    }
+    return s;
+}
+
+ByteSet digit_set() { return make_range('0', '9'); }
+
+ByteSet word_set() {
+    ByteSet s = make_range('0', '9') | make_range('a', 'z') | make_range('A', 'Z');
+    s.set('_');
+    return s;
+}
+
+ByteSet space_set() {
+    ByteSet s;
+    for (char c : {' ', '\t', '\n', '\v', '\f', '\r'}) {
+        s.set(static_cast<uint8_t>(c));
+    }
+    return s;
+}
+
+bool is_word_byte(uint8_t c) {
+    return (c >= '0' && c <= '9') || (c >= 'a' && c <= 'z') || (c >= 'A' && c <= 'Z') || c == '_';
+}
+
+int hex_value(char c) {
+    if (c >= '0' && c <= '9') return c - '0';
+    if (c >= 'a' && c <= 'f') return c - 'a' + 10;
+    if (c >= 'A' && c <= 'F') return c - 'A' + 10;
+    return -1;
+}
+
+bool is_alnum(char c) {
+    return (c >= '0' && c <= '9') || (c >= 'a' && c <= 'z') || (c >= 'A' && c <= 'Z');
+}
+
+struct Node;
+using NodePtr = std::unique_ptr<Node>;
+
+struct Node {
+    enum Kind { Empty, Set, Concat, Alt, Repeat, Group, Bol, Eol, WordB, NotWordB };
+
+    explicit Node(Kind k) : kind(k) {}
+
+    Kind kind;
+    ByteSet bits;
+    std::vector<NodePtr> kids;
+    int min = 0;
+    int max = 0;  // -1 means unbounded
+    bool greedy = true;
+    int group = -1;  // capture index of a Group, -1 for (?:...)
+};
+
+// Recursive descent parser for the supported ECMAScript subset. Any failure,
+// whether a syntax error or an unsupported construct, returns nullptr.
+class Parser {
+public:
+    explicit Parser(const std::string& pattern) : p_(pattern) {}
+
+    NodePtr parse() {
+        NodePtr n = alternation();
+        if (!n || i_ != p_.size()) {
+            return nullptr;
+        }
+        return n;
+    }
+
+    int ngroups = 0;
+
+private:
+    bool more() const { return i_ < p_.size(); }
+    char peek() const { return p_[i_]; }
+
+    NodePtr alternation() {
+        NodePtr first = concatenation();
+        if (!first) return nullptr;
+        if (!more() || peek() != '|') return first;
+        auto alt = std::make_unique<Node>(Node::Alt);
+        alt->kids.push_back(std::move(first));
+        while (more() && peek() == '|') {
+            ++i_;
+            NodePtr next = concatenation();
+            if (!next) return nullptr;
+            alt->kids.push_back(std::move(next));
+        }
+        return alt;
+    }
+
+    NodePtr concatenation() {
+        auto cat = std::make_unique<Node>(Node::Concat);
+        while (more() && peek() != '|' && peek() != ')') {
+            NodePtr n = repetition();
+            if (!n) return nullptr;
+            cat->kids.push_back(std::move(n));
+        }
+        if (cat->kids.empty()) return std::make_unique<Node>(Node::Empty);
+        if (cat->kids.size() == 1) return std::move(cat->kids[0]);
+        return cat;
+    }
+
+    bool parse_int(int& out) {
+        size_t start = i_;
+        out = 0;
+        while (more() && peek() >= '0' && peek() <= '9') {
+            out = out * 10 + (peek() - '0');
+            if (out > kMaxRepeat) return false;
+            ++i_;
+        }
+        return i_ > start;
+    }
+
+    NodePtr repetition() {
+        NodePtr atom_node = atom();
+        if (!atom_node || !more()) return atom_node;
+
+        int min, max;
+        char c = peek();
+        if (c == '*') {
+            min = 0, max = -1;
+            ++i_;
+        } else if (c == '+') {
+            min = 1, max = -1;
+            ++i_;
+        } else if (c == '?') {
+            min = 0, max = 1;
+            ++i_;
+        } else if (c == '{') {
+            ++i_;
+            if (!parse_int(min)) return nullptr;
+            max = min;
+            if (more() && peek() == ',') {
+                ++i_;
+                if (more() && peek() == '}') {
+                    max = -1;
+                } else if (!parse_int(max) || max < min) {
+                    return nullptr;
+                }
+            }
+            if (!more() || peek() != '}') return nullptr;
+            ++i_;
+        } else {
+            return atom_node;
+        }
+
+        Node::Kind k = atom_node->kind;
+        if (k == Node::Bol || k == Node::Eol || k == Node::WordB || k == Node::NotWordB) {
+            return nullptr;
+        }
+        auto rep = std::make_unique<Node>(Node::Repeat);
+        rep->min = min;
+        rep->max = max;
+        if (more() && peek() == '?') {
+            rep->greedy = false;
+            ++i_;
+        }
+        if (more() && (peek() == '*' || peek() == '+' || peek() == '?' || peek() == '{')) {
+            return nullptr;  // nothing to repeat
+        }
+        rep->kids.push_back(std::move(atom_node));
+        return rep;
+    }
+
+    static NodePtr set_node(const ByteSet& bits) {
+        auto n = std::make_unique<Node>(Node::Set);
+        n->bits = bits;
+        return n;
+    }
+
+    NodePtr atom() {
+        char c = peek();
+        switch (c) {
+        case '(': {
+            ++i_;
+            int group = -1;
+            if (more() && peek() == '?') {
+                if (i_ + 1 < p_.size() && p_[i_ + 1] == ':') {
+                    i_ += 2;
+                } else {
+                    return nullptr;  // lookaround and other extensions
+                }
+            } else {
+                group = ++ngroups;
+            }
+            NodePtr inner = alternation();
+            if (!inner || !more() || peek() != ')') return nullptr;
+            ++i_;
+            auto g = std::make_unique<Node>(Node::Group);
+            g->group = group;
+            g->kids.push_back(std::move(inner));
+            return g;
+        }
+        case '*':
+        case '+':
+        case '?':
+        case '{':
+        case '}':
+        case ']':
+            return nullptr;
+        case '.': {
+            ++i_;
+            ByteSet any;
+            any.set();
+            any.reset('\n');
+            any.reset('\r');
+            return set_node(any);
+        }
+        case '^':
+            ++i_;
+            return std::make_unique<Node>(Node::Bol);
+        case '$':
+            ++i_;
+            return std::make_unique<Node>(Node::Eol);
+        case '[':
+            ++i_;
+            return char_class();
+        case '\\':
+            ++i_;
+            return escape();
+        default: {
+            ++i_;
+            ByteSet one;
+            one.set(static_cast<uint8_t>(c));
+            return set_node(one);
+        }
+        }
+    }
+
+    // Parses a single character escape shared by atoms and classes.
+    // Returns the byte value, or -1 if the escape is not a single character.
+    int char_escape(bool in_class) {
+        char c = peek();
+        switch (c) {
+        case 'n': ++i_; return '\n';
+        case 'r': ++i_; return '\r';
+        case 't': ++i_; return '\t';
+        case 'f': ++i_; return '\f';
+        case 'v': ++i_; return '\v';
+        case 'b':
+            if (in_class) {
+                ++i_;
+                return '\b';
+            }
+            return -1;
+        case '0':
+            if (i_ + 1 < p_.size() && p_[i_ + 1] >= '0' && p_[i_ + 1] <= '9') return -1;
+            ++i_;
+            return 0;
+        case 'x':
+        case 'u': {
+            size_t digits = c == 'x' ? 2 : 4;
+            if (i_ + digits >= p_.size()) return -1;
+            int value = 0;
+            for (size_t k = 1; k <= digits; ++k) {
+                int h = hex_value(p_[i_ + k]);
+                if (h < 0) return -1;
+                value = value * 16 + h;
+            }
+            if (value > 0x7f && c == 'u') return -1;
+            i_ += digits + 1;
+            return value;
+        }
+        case 'c':
+            if (i_ + 1 < p_.size() && ((p_[i_ + 1] >= 'a' && p_[i_ + 1] <= 'z') ||
+                                       (p_[i_ + 1] >= 'A' && p_[i_ + 1] <= 'Z'))) {
+                i_ += 2;
+                return p_[i_ - 1] % 32;
+            }
+            return -1;
+        default:
+            if (is_alnum(c)) return -1;
+            ++i_;
+            return static_cast<uint8_t>(c);  // identity escape
+        }
+    }
+
+    // \d \w \s and their negations
+    bool class_escape(ByteSet& out) {
+        char c = peek();
+        ByteSet s;
+        switch (c) {
+        case 'd': case 'D': s = digit_set(); break;
+        case 'w': case 'W': s = word_set(); break;
+        case 's': case 'S': s = space_set(); break;
+        default: return false;
+        }
+        if (c == 'D' || c == 'W' || c == 'S') s.flip();
+        ++i_;
+        out = s;
+        return true;
+    }
+
+    NodePtr escape() {
+        if (!more()) return nullptr;
+        ByteSet s;
+        if (class_escape(s)) return set_node(s);
+        if (peek() == 'b' || peek() == 'B') {
+            Node::Kind k = peek() == 'b' ? Node::WordB : Node::NotWordB;
+            ++i_;
+            return std::make_unique<Node>(k);
+        }
+        int value = char_escape(false);
+        if (value < 0) return nullptr;  // backreferences and unknown escapes
+        s.set(value);
+        return set_node(s);
+    }
+
+    // Reads one class member into lo, or a class escape into set (lo = -1).
+    bool class_atom(int& lo, ByteSet& set) {
+        if (!more()) return false;
+        char c = peek();
+        if (c == '[' && i_ + 1 < p_.size() &&
+            (p_[i_ + 1] == ':' || p_[i_ + 1] == '.' || p_[i_ + 1] == '=')) {
+            return false;  // POSIX classes
+        }
+        if (c == '\\') {
+            ++i_;
+            if (!more()) return false;
+            if (class_escape(set)) {
+                lo = -1;
+                return true;
+            }
+            lo = char_escape(true);
+            return lo >= 0;
+        }
+        ++i_;
+        lo = static_cast<uint8_t>(c);
+        return true;
+    }
+
+    NodePtr char_class() {
+        bool negate = false;
+        if (more() && peek() == '^') {
+            negate = true;
+            ++i_;
+        }
+        if (!more() || peek() == ']') return nullptr;  // [] and [^]
+        ByteSet bits;
+        while (more() && peek() != ']') {
+            int lo;
+            ByteSet esc;
+            if (!class_atom(lo, esc)) return nullptr;
+            if (lo < 0) {
+                bits |= esc;
+                continue;
+            }
+            if (i_ + 1 < p_.size() && peek() == '-' && p_[i_ + 1] != ']') {
+                ++i_;
+                int hi;
+                if (!class_atom(hi, esc) || hi < 0 || hi < lo) return nullptr;
+                bits |= make_range(lo, hi);
+            } else {
+                bits.set(lo);
+            }
+        }
+        if (!more()) return nullptr;
+        ++i_;
+        if (negate) bits.flip();
+        return set_node(bits);
+    }
+
+    const std::string& p_;
+    size_t i_ = 0;
+};
+
+// True if n can match the empty string.
+bool nullable(const Node* n) {
+    switch (n->kind) {
+    case Node::Set: return false;
+    case Node::Concat:
+        for (const auto& kid : n->kids) {
+            if (!nullable(kid.get())) return false;
+        }
+        return true;
+    case Node::Alt:
+        for (const auto& kid : n->kids) {
+            if (nullable(kid.get())) return true;
+        }
+        return false;
+    case Node::Repeat: return n->min == 0 || nullable(n->kids[0].get());
+    case Node::Group: return nullable(n->kids[0].get());
+    default: return true;  // Empty and assertions
+    }
+}
+
+class Compiler {
+public:
+    Compiler(Prog& prog, bool reversed) : prog_(prog), reversed_(reversed) {}
+
+    int emit(Op op, int x = 0, int y = 0) {
+        if (prog_.insts.size() >= kMaxInsts) ok = false;
+        prog_.insts.push_back({op, x, y});
+        return static_cast<int>(prog_.insts.size()) - 1;
+    }
+
+    int pc() const { return static_cast<int>(prog_.insts.size()); }
+
+    int add_set(const ByteSet& s) {
+        auto it = set_index_.find(s);
+        if (it != set_index_.end()) return it->second;
+        prog_.sets.push_back(s);
+        int idx = static_cast<int>(prog_.sets.size()) - 1;
+        set_index_[s] = idx;
+        return idx;
+    }
+
+    void gen(const Node* n) {
+        if (!ok) return;
+        switch (n->kind) {
+        case Node::Empty:
+            break;
+        case Node::Set:
+            emit(Op::ByteSet, add_set(n->bits));
+            break;
+        case Node::Concat:
+            if (reversed_) {
+                for (auto it = n->kids.rbegin(); it != n->kids.rend(); ++it) gen(it->get());
+            } else {
+                for (const auto& kid : n->kids) gen(kid.get());
+            }
+            break;
+        case Node::Alt: {
+            std::vector<int> jumps;
+            for (size_t k = 0; k < n->kids.size(); ++k) {
+                if (k + 1 < n->kids.size()) {
+                    int split = emit(Op::Split);
+                    prog_.insts[split].x = split + 1;
+                    gen(n->kids[k].get());
+                    jumps.push_back(emit(Op::Jmp));
+                    prog_.insts[split].y = pc();
+                } else {
+                    gen(n->kids[k].get());
+                }
+            }
+            for (int j : jumps) prog_.insts[j].x = pc();
+            break;
+        }
+        case Node::Group:
+            if (n->group >= 0 && !reversed_) {
+                emit(Op::Save, 2 * n->group);
+                gen(n->kids[0].get());
+                emit(Op::Save, 2 * n->group + 1);
+            } else {
+                gen(n->kids[0].get());
+            }
+            break;
+        case Node::Repeat:
+            gen_repeat(n);
+            break;
+        case Node::Bol:
+            emit(reversed_ ? Op::AssertEol : Op::AssertBol);
+            break;
+        case Node::Eol:
+            emit(reversed_ ? Op::AssertBol : Op::AssertEol);
+            break;
+        case Node::WordB:
+        case Node::NotWordB:
+            emit(n->kind == Node::WordB ? Op::AssertWordB : Op::AssertNotWordB);
+            prog_.has_word_boundary = true;
+            break;
+        }
+    }
+
+    bool ok = true;
+
+private:
+    void gen_repeat(const Node* n) {
+        const Node* body = n->kids[0].get();
+        if (n->max != n->min && nullable(body)) prog_.has_nullable_loop = true;
+        for (int k = 0; k < n->min && ok; ++k) gen(body);
+        if (n->max == -1) {
+            int split = emit(Op::Split);
+            gen(body);
+            emit(Op::Jmp, split);
+            if (n->greedy) {
+                prog_.insts[split].x = split + 1;
+                prog_.insts[split].y = pc();
+            } else {
+                prog_.insts[split].x = pc();
+                prog_.insts[split].y = split + 1;
+            }
+            return;
+        }
+        // x{min,max}: the optional copies are nested, (x(x(x)?)?)?
+        std::vector<int> splits;
+        for (int k = n->min; k < n->max && ok; ++k) {
+            splits.push_back(emit(Op::Split));
+            gen(body);
+        }
+        for (int split : splits) {
+            if (n->greedy) {
+                prog_.insts[split].x = split + 1;
+                prog_.insts[split].y = pc();
+            } else {
+                prog_.insts[split].x = pc();
+                prog_.insts[split].y = split + 1;
+            }
+        }
+    }
+
+    Prog& prog_;
+    bool reversed_;
+    std::unordered_map<ByteSet, int> set_index_;
+};
+
+void compute_byte_classes(Prog& prog) {
+    std::bitset<256> boundary;
+    for (const ByteSet& s : prog.sets) {
+        for (int b = 0; b < 255; ++b) {
+            if (s[b] != s[b + 1]) boundary.set(b + 1);
+        }
+    }
+    int cls = 0;
+    prog.class_rep.assign(1, 0);
+    for (int b = 0; b < 256; ++b) {
+        if (b > 0 && boundary[b]) {
+            ++cls;
+            prog.class_rep.push_back(static_cast<uint8_t>(b));
+        }
+        prog.byte_class[b] = static_cast<uint8_t>(cls);
+    }
+}
+
+}  // namespace
+
+// Literal strings every match of a node must contain.
+struct Literals {
+    bool exact = false;  // the node matches exactly `prefix` (== `suffix`) and nothing else
+    std::string prefix;  // every match starts with this
+    std::string suffix;  // every match ends with this
+    std::string best;    // every match contains this; the longest one found
+};
+
+constexpr size_t kMaxLiteral = 256;
+
+void keep_longest(std::string& best, const std::string& s) {
+    if (s.size() > best.size()) best = s;
+}
+
+Literals exact_literal(std::string s) {
+    Literals lit;
+    lit.exact = true;
+    lit.prefix = lit.suffix = lit.best = std::move(s);
+    return lit;
+}
+
+Literals literals(const Node* n) {
+    switch (n->kind) {
+    case Node::Set: {
+        if (n->bits.count() != 1) return {};
+        for (int b = 0; b < 256; ++b) {
+            if (n->bits[b]) return exact_literal(std::string(1, static_cast<char>(b)));
+        }
+        return {};
+    }
+    case Node::Group: return literals(n->kids[0].get());
+    case Node::Concat: {
+        std::vector<Literals> kids;
+        for (const auto& kid : n->kids) kids.push_back(literals(kid.get()));
+        Literals lit;
+        lit.exact = true;
+        std::string run;  // exact text immediately before the current kid
+        for (const Literals& kid : kids) {
+            if (lit.exact) {
+                lit.prefix += kid.prefix;
+                lit.exact = kid.exact;
+            }
+            if (kid.exact) {
+                run += kid.prefix;
+            } else {
+                keep_longest(lit.best, run + kid.prefix);
+                keep_longest(lit.best, kid.best);
+                run = kid.suffix;
+            }
+            if (run.size() > kMaxLiteral) return {};
+        }
+        keep_longest(lit.best, run);
+        for (auto it = kids.rbegin(); it != kids.rend(); ++it) {
+            lit.suffix.insert(0, it->suffix);
+            if (!it->exact) break;
+        }
+        return lit;
+    }
+    case Node::Alt: {
+        Literals lit = literals(n->kids[0].get());
+        lit.exact = false;
+        for (size_t i = 1; i < n->kids.size(); ++i) {
+            Literals kid = literals(n->kids[i].get());
+            size_t p = 0;
+            while (p < lit.prefix.size() && p < kid.prefix.size() && lit.prefix[p] == kid.prefix[p]) ++p;
+            lit.prefix.resize(p);
+            size_t q = 0;
+            while (q < lit.suffix.size() && q < kid.suffix.size() &&
+                   lit.suffix[lit.suffix.size() - 1 - q] == kid.suffix[kid.suffix.size() - 1 - q]) {
+                ++q;
+            }
+            lit.suffix.erase(0, lit.suffix.size() - q);
+        }
+        lit.best = lit.prefix.size() >= lit.suffix.size() ? lit.prefix : lit.suffix;
+        return lit;
+    }
+    case Node::Repeat: {
+        if (n->max == 0) return exact_literal("");
+        if (n->min == 0) return {};
+        Literals kid = literals(n->kids[0].get());
+        if (kid.exact && n->min == n->max && kid.prefix.size() * n->min <= kMaxLiteral) {
+            std::string s;
+            for (int i = 0; i < n->min; ++i) s += kid.prefix;
+            return exact_literal(s);
+        }
+        kid.exact = false;
+        return kid;
+    }
+    default: return exact_literal("");  // Empty and zero-width assertions
+    }
+}
+
+std::unique_ptr<Prog> compile(const std::string& pattern, bool reversed) {
+    Parser parser(pattern);
+    NodePtr root = parser.parse();
+    if (!root) return nullptr;
+
+    auto prog = std::make_unique<Prog>();
+    prog->ncap = 2 * (parser.ngroups + 1);
+    Compiler c(*prog, reversed);
+    if (reversed) {
+        prog->start_anchored = prog->start_unanchored = 0;
+        c.gen(root.get());
+        c.emit(Op::Match);
+    } else {
+        // Unanchored searches start with a lazy any-byte loop: .*?
+        ByteSet any;
+        any.set();
+        prog->start_unanchored = c.emit(Op::Split, 3, 1);
+        c.emit(Op::ByteSet, c.add_set(any));
+        c.emit(Op::Jmp, 0);
+        prog->start_anchored = c.emit(Op::Save, 0);
+        c.gen(root.get());
+        c.emit(Op::Save, 1);
+        c.emit(Op::Match);
+        Literals lit = literals(root.get());
+        prog->is_literal = lit.exact && std::none_of(prog->insts.begin(), prog->insts.end(),
+                                                     [](const Inst& inst) {
+                                                         return inst.op >= Op::AssertBol &&
+                                                                inst.op <= Op::AssertNotWordB;
+                                                     });
+        if (!lit.prefix.empty() && lit.prefix.size() >= lit.best.size()) {
+            prog->literal = lit.prefix;
+            prog->literal_is_prefix = true;
+        } else {
+            prog->literal = lit.best;
+        }
+    }
+    if (!c.ok) return nullptr;
+    compute_byte_classes(*prog);
+    return prog;
+}
+
+std::unique_ptr<Prog> compile_set(const std::vector<std::string>& patterns) {
+    std::vector<NodePtr> roots;
+    for (const std::string& pattern : patterns) {
+        roots.push_back(Parser(pattern).parse());
+        if (!roots.back()) return nullptr;
+    }
+
+    auto prog = std::make_unique<Prog>();
+    Compiler c(*prog, false);
+    ByteSet any;
+    any.set();
+    prog->start_unanchored = c.emit(Op::Split, 3, 1);
+    c.emit(Op::ByteSet, c.add_set(any));
+    c.emit(Op::Jmp, 0);
+    prog->start_anchored = c.pc();
+    for (size_t i = 0; i < roots.size(); ++i) {
+        int split = -1;
+        if (i + 1 < roots.size()) split = c.emit(Op::Split, c.pc() + 1);
+        c.gen(roots[i].get());
+        c.emit(Op::Match, static_cast<int>(i));
+        if (split >= 0) prog->insts[split].y = c.pc();
+    }
+    if (!c.ok || prog->has_word_boundary) return nullptr;
+    compute_byte_classes(*prog);
+    return prog;
+}
+
+// ---------------------------------------------------------------------------
+// Pike VM
+
+namespace {
+
+class PikeVM {
+public:
+    PikeVM(const Prog& prog, const uint8_t* text, size_t len)
+        : prog_(prog), text_(text), len_(len), ncap_(prog.ncap),
+          clist_(prog.insts.size(), prog.ncap), nlist_(prog.insts.size(), prog.ncap) {}
+
+    bool run(size_t pos, bool anchored, bool full, std::vector<ptrdiff_t>& caps) {
+        std::vector<ptrdiff_t> init(ncap_, kUnset);
+        add_thread(clist_, anchored ? prog_.start_anchored : prog_.start_unanchored,
+                   init.data(), pos);
+        bool matched = false;
+        for (size_t i = pos;; ++i) {
+            if (clist_.dense.empty()) break;
+            nlist_.clear();
+            for (size_t k = 0; k < clist_.dense.size(); ++k) {
+                int pc = clist_.dense[k];
+                const Inst& inst = prog_.insts[pc];
+                if (inst.op == Op::Match) {
+                    if (full && i != len_) continue;
+                    matched = true;
+                    const ptrdiff_t* c = clist_.caps_at(k);
+                    caps.assign(c, c + ncap_);
+                    break;  // lower priority threads lose
+                }
+                if (inst.op == Op::ByteSet && i < len_ && prog_.sets[inst.x].test(text_[i])) {
+                    add_thread(nlist_, pc + 1, clist_.caps_at(k), i + 1);
+                }
+            }
+            if (i >= len_) break;
+            std::swap(clist_, nlist_);
+        }
+        return matched;
+    }
+
+private:
+    struct ThreadList {
+        ThreadList(size_t n, int ncap) : sparse(n), ncap(ncap) {}
+
+        bool contains(int pc) const {
+            size_t idx = sparse[pc];
+            return idx < dense.size() && dense[idx] == pc;
+        }
+        void insert(int pc) {
+            sparse[pc] = dense.size();
+            dense.push_back(pc);
+            caps.resize(dense.size() * ncap);
+        }
+        void clear() {
+            dense.clear();
+            caps.clear();
+        }
+        ptrdiff_t* caps_at(size_t k) { return caps.data() + k * ncap; }
+
+        std::vector<int> dense;  // pcs in priority order
+        std::vector<size_t> sparse;
+        int ncap;
+        std::vector<ptrdiff_t> caps;  // ncap slots per dense entry
+    };
+
+    struct Frame {
+        int pc;
+        int slot;  // >= 0: restore caps[slot] = old
+        ptrdiff_t old;
+    };
+
+    bool is_word_at(size_t i) const { return i < len_ && is_word_byte(text_[i]); }
+
+    bool assertion_holds(Op op, size_t i) const {
+        switch (op) {
+        case Op::AssertBol: return i == 0;
+        case Op::AssertEol: return i == len_;
+        case Op::AssertWordB:
+        case Op::AssertNotWordB: {
+            bool before = i > 0 && is_word_byte(text_[i - 1]);
+            bool boundary = before != is_word_at(i);
+            return op == Op::AssertWordB ? boundary : !boundary;
+        }
+        default: return false;
+        }
+    }
+
+    // Follows empty transitions from pc in priority order, adding every
+    // reached instruction to list. cap is modified and restored.
+    void add_thread(ThreadList& list, int pc0, ptrdiff_t* cap, size_t i) {
+        stack_.push_back({pc0, -1, 0});
+        while (!stack_.empty()) {
+            Frame f = stack_.back();
+            stack_.pop_back();
+            if (f.slot >= 0) {
+                cap[f.slot] = f.old;
+                continue;
+            }
+            int pc = f.pc;
+            while (!list.contains(pc)) {
+                list.insert(pc);
+                const Inst& inst = prog_.insts[pc];
+                if (inst.op == Op::Jmp) {
+                    pc = inst.x;
+                } else if (inst.op == Op::Split) {
+                    stack_.push_back({inst.y, -1, 0});
+                    pc = inst.x;
+                } else if (inst.op == Op::Save) {
+                    stack_.push_back({0, inst.x, cap[inst.x]});
+                    cap[inst.x] = static_cast<ptrdiff_t>(i);
+                    ++pc;
+                } else if (inst.op == Op::ByteSet || inst.op == Op::Match) {
+                    std::copy(cap, cap + ncap_, list.caps_at(list.dense.size() - 1));
+                    break;
+                } else if (assertion_holds(inst.op, i)) {
+                    ++pc;
+                } else {
+                    break;
+                }
+            }
+        }
+    }
+
+    const Prog& prog_;
+    const uint8_t* text_;
+    size_t len_;
+    int ncap_;
+    ThreadList clist_;
+    ThreadList nlist_;
+    std::vector<Frame> stack_;
+};
+
+}  // namespace
+
+bool pike_search(const Prog& prog, const uint8_t* text, size_t len, size_t pos,
+                 bool anchored, bool full, std::vector<ptrdiff_t>& caps) {
+    PikeVM vm(prog, text, len);
+    return vm.run(pos, anchored, full, caps);
+}
+
+// ---------------------------------------------------------------------------
+// Lazy DFA
+
+size_t DFA::KeyHash::operator()(const std::vector<int>& v) const {
+    size_t h = v.size();
+    for (int x : v) {
+        h ^= static_cast<size_t>(x) + 0x9e3779b97f4a7c15ULL + (h << 6) + (h >> 2);
+    }
+    return h;
+}
+
+DFA::DFA(const Prog& prog, bool leftmost_first)
+    : prog_(prog), leftmost_first_(leftmost_first), seen_(prog.insts.size(), 0) {}
+
+void DFA::reset() {
+    cache_.clear();
+    states_.clear();
+    for (auto& row : starts_) row[0] = row[1] = nullptr;
+}
+
+// Adds the instructions reachable from pc without consuming input to out.
+// Returns true if a Match was reached in leftmost-first mode, in which case
+// no lower priority threads may be added.
+bool DFA::closure(int pc0, bool bol, bool eol, std::vector<int>& out) {
+    stack_.clear();
+    stack_.push_back(pc0);
+    while (!stack_.empty()) {
+        int pc = stack_.back();
+        stack_.pop_back();
+        while (!seen_[pc]) {
+            seen_[pc] = 1;
+            const Inst& inst = prog_.insts[pc];
+            bool follow = false;
+            switch (inst.op) {
+            case Op::Jmp:
+                pc = inst.x;
+                follow = true;
+                break;
+            case Op::Split:
+                stack_.push_back(inst.y);
+                pc = inst.x;
+                follow = true;
+                break;
+            case Op::Save:
+                ++pc;
+                follow = true;
+                break;
+            case Op::AssertBol:
+                follow = bol;
+                ++pc;
+                break;
+            case Op::AssertEol:
+                if (eol) {
+                    follow = true;
+                    ++pc;
+                } else {
+                    out.push_back(pc);  // pending until we know whether input ends
+                }
+                break;
+            case Op::ByteSet:
+                out.push_back(pc);
+                break;
+            case Op::Match:
+                out.push_back(pc);
+                if (leftmost_first_) {
+                    stack_.clear();
+                    return true;
+                }
+                break;
+            default:
+                break;  // word boundaries never reach the DFA
+            }
+            if (!follow) break;
+        }
+    }
+    return false;
+}
+
+DState* DFA::intern(std::vector<int>& insts) {
+    auto it = cache_.find(insts);
+    if (it != cache_.end()) return it->second;
+    if (states_.size() >= kMaxDStates) return nullptr;
+    states_.emplace_back();
+    DState* s = &states_.back();
+    s->insts = insts;
+    for (int pc : insts) {
+        if (prog_.insts[pc].op == Op::Match) {
+            s->is_match = true;
+            s->match_ids.push_back(prog_.insts[pc].x);
+        }
+    }
+    s->next.assign(prog_.class_rep.size(), nullptr);
+    cache_.emplace(s->insts, s);
+    return s;
+}
+
+DState* DFA::start_state(bool anchored, bool bol) {
+    DState*& s = starts_[anchored][bol];
+    if (!s) {
+        std::fill(seen_.begin(), seen_.end(), 0);
+        scratch_.clear();
+        closure(anchored ? prog_.start_anchored : prog_.start_unanchored, bol, false, scratch_);
+        s = intern(scratch_);
+    }
+    return s;
+}
+
+DState* DFA::transition(DState* s, uint8_t byte) {
+    uint8_t cls = prog_.byte_class[byte];
+    if (s->next[cls]) return s->next[cls];
+    std::fill(seen_.begin(), seen_.end(), 0);
+    scratch_.clear();
+    for (int pc : s->insts) {
+        const Inst& inst = prog_.insts[pc];
+        if (inst.op == Op::ByteSet && prog_.sets[inst.x].test(byte)) {
+            if (closure(pc + 1, false, false, scratch_)) break;
+        }
+    }
+    DState* n = intern(scratch_);
+    if (n) s->next[cls] = n;
+    return n;
+}
+
+bool DFA::eol_match(DState* s, bool bol) {
+    if (s->is_match) return true;
+    if (!bol && s->eol_match >= 0) return s->eol_match;
+    std::fill(seen_.begin(), seen_.end(), 0);
+    std::vector<int> out;
+    bool m = false;
+    for (int pc : s->insts) {
+        if (prog_.insts[pc].op != Op::AssertEol) continue;
+        closure(pc + 1, bol, true, out);
+        for (int q : out) {
+            if (prog_.insts[q].op == Op::Match) m = true;
+        }
+        if (m) break;
+    }
+    if (!bol) s->eol_match = m;
+    return m;
+}
+
+ptrdiff_t DFA::search_forward(const uint8_t* text, size_t len, size_t pos, bool anchored,
+                              bool stop_at_first) {
+    DState* s = start_state(anchored, pos == 0);
+    if (!s) {
+        reset();
+        return kGaveUp;
+    }
+    ptrdiff_t last = kNoMatch;
+    if (s->is_match) {
+        last = static_cast<ptrdiff_t>(pos);
+        if (stop_at_first) return last;
+    }
+    size_t i = pos;
+    while (i < len && !s->insts.empty()) {
+        DState* n = transition(s, text[i]);
+        if (!n) {
+            reset();
+            return kGaveUp;
+        }
+        s = n;
+        ++i;
+        if (s->is_match) {
+            last = static_cast<ptrdiff_t>(i);
+            if (stop_at_first) return last;
+        }
+    }
+    if (i == len && !s->insts.empty() && eol_match(s, i == 0)) {
+        last = static_cast<ptrdiff_t>(len);
+    }
+    return last;
+}
+
+int DFA::full_match(const uint8_t* text, size_t len) {
+    DState* s = start_state(true, true);
+    if (!s) {
+        reset();
+        return kGaveUp;
+    }
+    for (size_t i = 0; i < len; ++i) {
+        if (s->insts.empty()) return 0;
+        DState* n = transition(s, text[i]);
+        if (!n) {
+            reset();
+            return kGaveUp;
+        }
+        s = n;
+    }
+    return eol_match(s, len == 0) ? 1 : 0;
+}
+
+int DFA::match_set(const uint8_t* text, size_t len, std::vector<uint8_t>& matched) {
+    int count = 0;
+    auto record = [&](const std::vector<int>& ids) {
+        for (int id : ids) {
+            if (!matched[id]) {
+                matched[id] = 1;
+                ++count;
+            }
+        }
+    };
+    DState* s = start_state(false, true);
+    if (!s) {
+        reset();
+        s = start_state(false, true);
+    }
+    record(s->match_ids);
+    for (size_t i = 0; i < len && count < static_cast<int>(matched.size()); ++i) {
+        DState* n = transition(s, text[i]);
+        if (!n) {
+            // Out of states: start over from the current one instead of giving up
+            std::vector<int> insts = s->insts;
+            reset();
+            s = intern(insts);
+            n = transition(s, text[i]);
+        }
+        s = n;
+        if (s->is_match) record(s->match_ids);
+    }
+    if (count < static_cast<int>(matched.size())) {
+        std::fill(seen_.begin(), seen_.end(), 0);
+        std::vector<int> out;
+        for (int pc : s->insts) {
+            if (prog_.insts[pc].op == Op::AssertEol) closure(pc + 1, len == 0, true, out);
+        }
+        for (int pc : out) {
+            if (prog_.insts[pc].op == Op::Match && !matched[prog_.insts[pc].x]) {
+                matched[prog_.insts[pc].x] = 1;
+                ++count;
+            }
+        }
+    }
+    return count;
+}
+
+ptrdiff_t DFA::search_reverse(const uint8_t* text, size_t len, size_t pos, size_t end) {
+    // In the reversed program AssertBol stands for the original '$', which
+    // only holds where the scan starts if that is the end of the input.
+    DState* s = start_state(true, end == len);
+    if (!s) {
+        reset();
+        return kGaveUp;
+    }
+    ptrdiff_t last = s->is_match ? static_cast<ptrdiff_t>(end) : kNoMatch;
+    size_t i = end;
+    while (i > pos && !s->insts.empty()) {
+        DState* n = transition(s, text[i - 1]);
+        if (!n) {
+            reset();
+            return kGaveUp;
+        }
+        s = n;
+        --i;
+        if (s->is_match) last = static_cast<ptrdiff_t>(i);
+    }
+    if (i == 0 && !s->insts.empty() && eol_match(s, len == 0)) last = 0;
+    return last;
+}
+
+// ---------------------------------------------------------------------------
+// Flat DFA
+
+std::unique_ptr<FlatDFA> FlatDFA::build(const Prog& prog) {
+    if (prog.has_word_boundary) return nullptr;
+    DFA dfa(prog, false);
+    DState* start = dfa.start_state(true, true);
+    if (!start) return nullptr;
+    auto flat = std::unique_ptr<FlatDFA>(new FlatDFA());
+    flat->byte_class_ = prog.byte_class;
+    flat->nclasses_ = static_cast<uint32_t>(prog.class_rep.size());
+    flat->empty_match_ = dfa.eol_match(start, true);
+
+    // Number the states breadth first, building them through the lazy DFA
+    std::unordered_map<DState*, uint32_t> index{{start, 0}};
+    std::vector<DState*> states{start};
+    for (size_t i = 0; i < states.size(); ++i) {
+        for (uint32_t c = 0; c < flat->nclasses_; ++c) {
+            DState* next = dfa.transition(states[i], prog.class_rep[c]);
+            if (!next) return nullptr;  // too many states
+            if (index.emplace(next, static_cast<uint32_t>(states.size())).second) {
+                states.push_back(next);
+            }
+        }
+    }
+
+    flat->table_.resize(states.size() * flat->nclasses_);
+    flat->accept_.resize(states.size());
+    flat->dead_ = UINT32_MAX;
+    for (size_t i = 0; i < states.size(); ++i) {
+        DState* s = states[i];
+        for (uint32_t c = 0; c < flat->nclasses_; ++c) {
+            flat->table_[i * flat->nclasses_ + c] = index[s->next[c]] * flat->nclasses_;
+        }
+        flat->accept_[i] = dfa.eol_match(s, false);
+        if (s->insts.empty()) flat->dead_ = static_cast<uint32_t>(i * flat->nclasses_);
+    }
+    return flat;
+}
+
+bool FlatDFA::full_match(const uint8_t* text, size_t len) const {
+    if (len == 0) return empty_match_;
+    const uint32_t* table = table_.data();
+    uint32_t row = start_;
+    for (size_t i = 0; i < len; ++i) {
+        row = table[row + byte_class_[text[i]]];
+        if (row == dead_) return false;
+    }
+    return accept_[row / nclasses_];
+}
+
+// ---------------------------------------------------------------------------
+// Serialization
+//
+// Fields are stored with their native width and byte order, so the data is
+// meant to be read back on the machine that wrote it, by a library with the
+// same format_version().
+
+namespace {
+
+template <typename T>
+void put(std::string& out, T value) {
+    out.append(reinterpret_cast<const char*>(&value), sizeof(value));
+}
+
+template <typename T>
+bool get(const uint8_t*& p, const uint8_t* end, T& value) {
+    if (static_cast<size_t>(end - p) < sizeof(value)) return false;
+    memcpy(&value, p, sizeof(value));
+    p += sizeof(value);
+    return true;
+}
+
+bool get_bytes(const uint8_t*& p, const uint8_t* end, size_t n, std::string& value) {
+    if (static_cast<size_t>(end - p) < n) return false;
+    value.assign(reinterpret_cast<const char*>(p), n);
+    p += n;
+    return true;
+}
+
+// Checks the invariants the matchers rely on, so that corrupt data is
+// rejected instead of crashing them.
+bool valid(const Prog& prog) {
+    int ninsts = static_cast<int>(prog.insts.size());
+    auto pc_ok = [&](int pc) { return pc >= 0 && pc < ninsts; };
+    if (!pc_ok(prog.start_anchored) || !pc_ok(prog.start_unanchored)) return false;
+    if (prog.ncap < 2 || prog.ncap % 2 != 0 || static_cast<size_t>(prog.ncap) > 2 * kMaxInsts) {
+        return false;
+    }
+    for (const Inst& inst : prog.insts) {
+        switch (inst.op) {
+            case Op::ByteSet:
+                if (inst.x < 0 || static_cast<size_t>(inst.x) >= prog.sets.size()) return false;
+                break;
+            case Op::Split:
+                if (!pc_ok(inst.x) || !pc_ok(inst.y)) return false;
+                break;
+            case Op::Jmp:
+                if (!pc_ok(inst.x)) return false;
+                break;
+            case Op::Save:
+                if (inst.x < 0 || inst.x >= prog.ncap) return false;
+                break;
+            case Op::AssertBol:
+            case Op::AssertEol:
+            case Op::AssertWordB:
+            case Op::AssertNotWordB:
+            case Op::Match:
+                break;
+            default:
+                return false;
+        }
+    }
+    for (uint8_t c : prog.byte_class) {
+        if (c >= prog.class_rep.size()) return false;
+    }
+    return true;
+}
+
+}  // namespace
+
+void write_prog(const Prog& prog, std::string& out) {
+    put<uint32_t>(out, static_cast<uint32_t>(prog.insts.size()));
+    for (const Inst& inst : prog.insts) {
+        put<uint8_t>(out, static_cast<uint8_t>(inst.op));
+        put<int32_t>(out, inst.x);
+        put<int32_t>(out, inst.y);
+    }
+    put<uint32_t>(out, static_cast<uint32_t>(prog.sets.size()));
+    for (const ByteSet& set : prog.sets) {
+        for (int i = 0; i < 256; i += 8) {
+            uint8_t bits = 0;
+            for (int b = 0; b < 8; ++b) {
+                if (set[i + b]) bits |= static_cast<uint8_t>(1 << b);
+            }
+            out.push_back(static_cast<char>(bits));
+        }
+    }
+    put<int32_t>(out, prog.start_anchored);
+    put<int32_t>(out, prog.start_unanchored);
+    put<int32_t>(out, prog.ncap);
+    put<uint8_t>(out, prog.has_word_boundary);
+    put<uint8_t>(out, prog.has_nullable_loop);
+    put<uint8_t>(out, prog.literal_is_prefix);
+    put<uint8_t>(out, prog.is_literal);
+    put<uint32_t>(out, static_cast<uint32_t>(prog.literal.size()));
+    out += prog.literal;
+    out.append(reinterpret_cast<const char*>(prog.byte_class.data()), prog.byte_class.size());
+    put<uint32_t>(out, static_cast<uint32_t>(prog.class_rep.size()));
+    out.append(reinterpret_cast<const char*>(prog.class_rep.data()), prog.class_rep.size());
+}
+
+std::unique_ptr<Prog> read_prog(const uint8_t*& p, const uint8_t* end) {
+    auto prog = std::make_unique<Prog>();
+    uint32_t n;
+    if (!get(p, end, n) || n > kMaxInsts) return nullptr;
+    prog->insts.resize(n);
+    for (Inst& inst : prog->insts) {
+        uint8_t op;
+        int32_t x, y;
+        if (!get(p, end, op) || !get(p, end, x) || !get(p, end, y)) return nullptr;
+        inst.op = static_cast<Op>(op);
+        inst.x = x;
+        inst.y = y;
+    }
+    if (!get(p, end, n) || n > kMaxInsts || static_cast<size_t>(end - p) / 32 < n) return nullptr;
+    prog->sets.resize(n);
+    for (ByteSet& set : prog->sets) {
+        for (int i = 0; i < 256; i += 8) {
+            uint8_t bits = *p++;
+            for (int b = 0; b < 8; ++b) {
+                set[i + b] = (bits >> b) & 1;
+            }
+        }
+    }
+    int32_t start_anchored, start_unanchored, ncap;
+    uint8_t flags[4];
+    if (!get(p, end, start_anchored) || !get(p, end, start_unanchored) || !get(p, end, ncap) ||
+        !get(p, end, flags)) {
+        return nullptr;
+    }
+    prog->start_anchored = start_anchored;
+    prog->start_unanchored = start_unanchored;
+    prog->ncap = ncap;
+    prog->has_word_boundary = flags[0];
+    prog->has_nullable_loop = flags[1];
+    prog->literal_is_prefix = flags[2];
+    prog->is_literal = flags[3];
+    std::string bytes;
+    if (!get(p, end, n) || !get_bytes(p, end, n, prog->literal)) return nullptr;
+    if (!get_bytes(p, end, prog->byte_class.size(), bytes)) return nullptr;
+    std::copy(bytes.begin(), bytes.end(), prog->byte_class.begin());
+    if (!get(p, end, n) || n > 256 || !get_bytes(p, end, n, bytes)) return nullptr;
+    prog->class_rep.assign(bytes.begin(), bytes.end());
+    if (!valid(*prog)) return nullptr;
+    return prog;
+}
+
+// ---------------------------------------------------------------------------
+// Regex
+
+Regex::Lease::Lease(Regex& re) : re_(re) {
+    {
+        std::lock_guard<std::mutex> lock(re_.pool_mutex_);
+        if (!re_.pool_.empty()) {
+            set_ = std::move(re_.pool_.back());
+            re_.pool_.pop_back();
+        }
+    }
+    if (!set_) {
+        set_ = std::make_unique<DFASet>(*re_.prog_, *re_.rprog_);
+    }
+}
+
+Regex::Lease::~Lease() {
+    std::lock_guard<std::mutex> lock(re_.pool_mutex_);
+    re_.pool_.push_back(std::move(set_));
+}
+
+std::unique_ptr<Regex> Regex::compile(const std::string& pattern) {
+    std::unique_ptr<Prog> prog = regex_engine::compile(pattern, false);
+    if (!prog) return nullptr;
+    std::unique_ptr<Prog> rprog;
+    if (!prog->has_word_boundary) {
+        rprog = regex_engine::compile(pattern, true);
+    }
+    return make(std::move(prog), std::move(rprog));
+}
+
+std::unique_ptr<Regex> Regex::make(std::unique_ptr<Prog> prog, std::unique_ptr<Prog> rprog) {
+    auto re = std::unique_ptr<Regex>(new Regex());
+    re->prog_ = std::move(prog);
+    re->rprog_ = std::move(rprog);
+    const std::string& literal = re->prog_->literal;
+    if (literal.size() > 1) {
+        auto begin = reinterpret_cast<const uint8_t*>(literal.data());
+        re->literal_searcher_ = std::make_unique<LiteralSearcher>(begin, begin + literal.size());
+    }
+    return re;
+}
+
+void Regex::serialize(std::string& out) const {
+    out.push_back(rprog_ ? 1 : 0);
+    write_prog(*prog_, out);
+    if (rprog_) write_prog(*rprog_, out);
+}
+
+std::unique_ptr<Regex> Regex::deserialize(const uint8_t* data, size_t len) {
+    const uint8_t* end = data + len;
+    if (data == end) return nullptr;
+    bool has_rprog = *data++ != 0;
+    std::unique_ptr<Prog> prog = read_prog(data, end);
+    if (!prog) return nullptr;
+    std::unique_ptr<Prog> rprog;
+    if (has_rprog) {
+        rprog = read_prog(data, end);
+        if (!rprog) return nullptr;
+    }
+    if (data != end) return nullptr;
+    return make(std::move(prog), std::move(rprog));
+}
+
+const uint8_t* Regex::find_literal(const uint8_t* text, size_t len, size_t pos) const {
+    const std::string& literal = prog_->literal;
+    if (literal.size() == 1) {
+        return static_cast<const uint8_t*>(memchr(text + pos, literal[0], len - pos));
+    }
+#if defined(__GLIBC__) || defined(__APPLE__)
+    // The C library's memmem is vectorized and beats Boyer-Moore-Horspool
+    return static_cast<const uint8_t*>(
+        memmem(text + pos, len - pos, literal.data(), literal.size()));
+#else
+    const uint8_t* hit = std::search(text + pos, text + len, *literal_searcher_);
+    return hit == text + len ? nullptr : hit;
+#endif
+}
+
+bool Regex::optimize() {
+    if (!flat_ && rprog_) {
+        flat_ = FlatDFA::build(*prog_);
+    }
+    return flat_ != nullptr;
+}
+
+bool Regex::full_match(const uint8_t* text, size_t len) {
+    if (!prog_->literal.empty() && !find_literal(text, len, 0)) return false;
+    if (flat_) return flat_->full_match(text, len);
+    if (rprog_) {
+        int r = Lease(*this)->all.full_match(text, len);
+        if (r != DFA::kGaveUp) return r == 1;
+    }
+    std::vector<ptrdiff_t> caps;
+    return pike_search(*prog_, text, len, 0, true, true, caps);
+}
+
+bool Regex::search(const uint8_t* text, size_t len, size_t pos, std::vector<ptrdiff_t>& caps,
+                   bool want_groups) {
+    bool groups = want_groups && prog_->ngroups() > 0;
+    if (!prog_->literal.empty()) {
+        // Every match contains the literal, so without an occurrence there is
+        // no match; if every match starts with it, none starts before the first.
+        const uint8_t* hit = find_literal(text, len, pos);
+        if (!hit) return false;
+        if (prog_->literal_is_prefix) pos = hit - text;
+    }
+    if (rprog_) {
+        // The forward scan finds where the leftmost-first match ends, the
+        // reverse scan from there finds where it starts.
+        ptrdiff_t start = DFA::kNoMatch;
+        ptrdiff_t end;
+        {
+            Lease dfa(*this);
+            end = dfa->first.search_forward(text, len, pos, false, false);
+            if (end == DFA::kNoMatch) return false;
+            if (end >= 0) start = dfa->reverse.search_reverse(text, len, pos, end);
+        }
+        if (start >= 0) {
+            if (!groups) {
+                caps.assign(want_groups ? prog_->ncap : 2, kUnset);
+                caps[0] = start;
+                caps[1] = end;
+                return true;
+            }
+            if (pike_search(*prog_, text, len, start, true, false, caps)) return true;
+        }
+    }
+    if (!pike_search(*prog_, text, len, pos, false, false, caps)) return false;
+    if (!want_groups) caps.resize(2);
+    return true;
+}
+
+}  // namespace regex_engine
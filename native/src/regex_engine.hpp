@@ -0,0 +1,248 @@
+// regex_engine.hpp
+//
+// A backtracking-free regex engine for the ECMAScript subset without
+// backreferences or lookaround. Patterns are compiled to a Thompson NFA
+// (Prog) which is executed either by a Pike VM (supports capture groups and
+// word boundaries) or by a lazily built DFA (no captures, linear time, much
+// faster). Matching is byte oriented, like std::regex<char>.
+#pragma once
+
+#include <array>
+#include <bitset>
+#include <cstddef>
+#include <cstdint>
+#include <deque>
+#include <functional>
+#include <memory>
+#include <mutex>
+#include <string>
+#include <unordered_map>
+#include <vector>
+
+namespace regex_engine {
+
+enum class Op : uint8_t {
+    ByteSet,       // consume one byte contained in sets[x]
+    Split,         // continue at x (preferred) and y
+    Jmp,           // continue at x
+    Save,          // record the current position in capture slot x
+    AssertBol,     // beginning of input
+    AssertEol,     // end of input
+    AssertWordB,   // \b
+    AssertNotWordB,// \B
+    Match,
+};
+
+struct Inst {
+    Op op;
+    int x = 0;
+    int y = 0;
+};
+
+using ByteSet = std::bitset<256>;
+
+struct Prog {
+    std::vector<Inst> insts;
+    std::vector<ByteSet> sets;
+    int start_anchored = 0;
+    int start_unanchored = 0;
+    int ncap = 2;  // 2 * (number of groups + 1)
+    bool has_word_boundary = false;
+    // A repeated subexpression can match the empty string, as in (a|b?)*.
+    // Backtracking engines stop such loops on an empty iteration, which can
+    // select a different match than the Pike VM does; whether a match exists
+    // is unaffected.
+    bool has_nullable_loop = false;
+    // A string every match contains (empty if none is known) and whether
+    // every match starts with it. Only set for forward programs.
+    std::string literal;
+    bool literal_is_prefix = false;
+    bool is_literal = false;  // the pattern matches exactly `literal` and nothing else
+    // Bytes that no set distinguishes share a class; DFA transitions are per class.
+    std::array<uint8_t, 256> byte_class{};
+    std::vector<uint8_t> class_rep;  // a representative byte for every class
+
+    int ngroups() const { return ncap / 2 - 1; }
+};
+
+// Parse pattern and compile it. Returns nullptr if the pattern uses a
+// feature this engine does not implement or is invalid; callers fall back
+// to std::regex in that case, which also decides validity.
+std::unique_ptr<Prog> compile(const std::string& pattern, bool reversed = false);
+
+// Compile patterns into one program that runs them side by side. The Match
+// instruction of pattern i has x == i. Returns nullptr if any pattern is not
+// supported or uses word boundaries, which the DFA does not implement.
+std::unique_ptr<Prog> compile_set(const std::vector<std::string>& patterns);
+
+// Append a binary form of prog to out, which read_prog() turns back into an
+// equal Prog. The format may change between versions of the library; see
+// format_version().
+void write_prog(const Prog& prog, std::string& out);
+// Read a Prog written by write_prog() starting at p and advance p past it.
+// Returns nullptr if the data is truncated or not a valid program.
+std::unique_ptr<Prog> read_prog(const uint8_t*& p, const uint8_t* end);
+// Changes whenever the format written by write_prog() or Regex::serialize() does.
+constexpr int format_version() { return 1; }
+
+// Position value of an unset capture slot.
+constexpr ptrdiff_t kUnset = -1;
+
+// Pike VM. Searches text[pos:len] and fills caps (size prog.ncap) with the
+// leftmost-first match. With full=true the match must end at len.
+bool pike_search(const Prog& prog, const uint8_t* text, size_t len, size_t pos,
+                 bool anchored, bool full, std::vector<ptrdiff_t>& caps);
+
+struct DState {
+    std::vector<int> insts;  // ByteSet, Match and pending AssertEol pcs in priority order
+    bool is_match = false;
+    std::vector<int> match_ids;  // x of the Match instructions in insts
+    int8_t eol_match = -1;   // lazily computed: matches if input ends here
+    std::vector<DState*> next;
+};
+
+// Lazily built DFA over a Prog. In leftmost-first mode lower priority threads
+// are dropped once a match is reached, which makes the forward scan stop at
+// the end of the leftmost-first match; otherwise every thread is kept, which
+// is what full matching and the reverse scan for the match start need.
+class DFA {
+public:
+    enum Result { kNoMatch = -1, kGaveUp = -2 };
+
+    DFA(const Prog& prog, bool leftmost_first);
+
+    // Scan forward from pos. Returns the end of the match (the last match
+    // position when leftmost_first, otherwise the first), kNoMatch or kGaveUp.
+    ptrdiff_t search_forward(const uint8_t* text, size_t len, size_t pos,
+                             bool anchored, bool stop_at_first);
+    // Full match of text[0:len]. Returns 1, 0 or kGaveUp.
+    int full_match(const uint8_t* text, size_t len);
+    // Scan backwards from end down to pos with a reversed Prog and return the
+    // smallest start of a match, kNoMatch or kGaveUp.
+    ptrdiff_t search_reverse(const uint8_t* text, size_t len, size_t pos, size_t end);
+    // Unanchored scan of a compile_set() program over text[0:len] that sets
+    // matched[i] for every pattern i with a match; matched must hold one zero
+    // per pattern. Stops early once all have matched. Returns the number of
+    // matching patterns. Never gives up: when the state budget is exhausted
+    // the cache is cleared and the scan continues.
+    int match_set(const uint8_t* text, size_t len, std::vector<uint8_t>& matched);
+
+private:
+    friend class FlatDFA;
+
+    struct KeyHash {
+        size_t operator()(const std::vector<int>& v) const;
+    };
+
+    DState* start_state(bool anchored, bool bol);
+    DState* transition(DState* s, uint8_t byte);
+    DState* intern(std::vector<int>& insts);
+    bool closure(int pc, bool bol, bool eol, std::vector<int>& out);
+    bool eol_match(DState* s, bool bol);
+    void reset();
+
+    const Prog& prog_;
+    bool leftmost_first_;
+    std::deque<DState> states_;
+    std::unordered_map<std::vector<int>, DState*, KeyHash> cache_;
+    DState* starts_[2][2] = {{nullptr, nullptr}, {nullptr, nullptr}};
+    // Scratch space reused between calls
+    std::vector<uint8_t> seen_;
+    std::vector<int> stack_;
+    std::vector<int> scratch_;
+};
+
+// A DFA for full matching built ahead of time into one flat transition table
+// with a row per state and a column per byte class. Matching is a table
+// lookup per byte: no locks, no hashing and no lazy construction, at the
+// cost of building every reachable state up front. Immutable once built, so
+// any number of threads can use it at once.
+class FlatDFA {
+public:
+    // Returns nullptr if prog uses word boundaries or has more states than a
+    // lazy DFA may build.
+    static std::unique_ptr<FlatDFA> build(const Prog& prog);
+
+    bool full_match(const uint8_t* text, size_t len) const;
+
+private:
+    FlatDFA() = default;
+
+    std::array<uint8_t, 256> byte_class_{};
+    // Entry [row + class] is the row of the next state; rows are state * nclasses.
+    std::vector<uint32_t> table_;
+    std::vector<uint8_t> accept_;  // per state: matches if the input ends there
+    uint32_t start_ = 0;
+    uint32_t dead_ = 0;            // row of the state without threads, which never matches
+    uint32_t nclasses_ = 0;
+    bool empty_match_ = false;     // whether the empty input matches
+};
+
+// Facade selecting between the DFA and the Pike VM.
+//
+// A Regex may be used from several threads at once. DFAs build their states
+// while scanning, so each search borrows a set of DFAs from a pool and
+// returns it afterwards; concurrent searches each get their own set, and
+// a set stays warm for the next search that borrows it.
+class Regex {
+public:
+    static std::unique_ptr<Regex> compile(const std::string& pattern);
+    // Rebuild a Regex from the output of serialize() without parsing the
+    // pattern again. Returns nullptr if the data is malformed.
+    static std::unique_ptr<Regex> deserialize(const uint8_t* data, size_t len);
+
+    // Append the compiled programs to out.
+    void serialize(std::string& out) const;
+
+    int ngroups() const { return prog_->ngroups(); }
+    // False if match spans may differ from std::regex (see Prog::has_nullable_loop).
+    bool exact_spans() const { return !prog_->has_nullable_loop; }
+
+    bool full_match(const uint8_t* text, size_t len);
+    // Build a FlatDFA that full_match() uses from then on. Returns false if
+    // the pattern is not suitable, in which case nothing changes. Must not be
+    // called while other threads use the Regex.
+    bool optimize();
+    // Find the leftmost-first match in text[pos:len]. caps receives
+    // 2 * (ngroups + 1) offsets when want_groups, otherwise just the span.
+    bool search(const uint8_t* text, size_t len, size_t pos,
+                std::vector<ptrdiff_t>& caps, bool want_groups);
+
+private:
+    struct DFASet {
+        DFASet(const Prog& prog, const Prog& rprog)
+            : first(prog, true), all(prog, false), reverse(rprog, false) {}
+        DFA first;
+        DFA all;
+        DFA reverse;
+    };
+
+    // Borrows a DFASet from pool_ for the lifetime of the lease.
+    class Lease {
+    public:
+        explicit Lease(Regex& re);
+        ~Lease();
+        DFASet* operator->() const { return set_.get(); }
+
+    private:
+        Regex& re_;
+        std::unique_ptr<DFASet> set_;
+    };
+
+    static std::unique_ptr<Regex> make(std::unique_ptr<Prog> prog, std::unique_ptr<Prog> rprog);
+
+    // Position of the first occurrence of prog_->literal in text[pos:len],
+    // nullptr if there is none.
+    const uint8_t* find_literal(const uint8_t* text, size_t len, size_t pos) const;
+
+    using LiteralSearcher = std::boyer_moore_horspool_searcher<const uint8_t*>;
+
+    std::unique_ptr<Prog> prog_;
+    std::unique_ptr<LiteralSearcher> literal_searcher_;  // for literals longer than one byte
+    std::unique_ptr<Prog> rprog_;  // reversed, used to find match starts; null if the DFA is not used
+    std::unique_ptr<FlatDFA> flat_;  // set by optimize()
+    std::mutex pool_mutex_;
+    std::vector<std::unique_ptr<DFASet>> pool_;
+};
+
+}  // namespace regex_engine
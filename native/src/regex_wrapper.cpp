@@ -1,135 +1,694 @@
 // regex_wrapper.cpp
 #include <regex>
 #include <string>
-#include <unordered_map>
 #include <vector>
 #include <memory>
+#include <algorithm>
+#include <chrono>
+#include <iterator>
+#include <mutex>
+#include <cstdint>
 #include <cstring>
 
-// A map to store compiled regex objects
-std::unordered_map<int, std::shared_ptr<std::regex>> regex_cache;
-int next_id = 0;
+#include <pthread.h>
 
-extern "C" {
-    // Compile a regex pattern and return an ID
-    int compile_pattern(const char* pattern) {
+#include "aho_corasick.hpp"
+#include "regex_engine.hpp"
+
+// A compiled pattern. Patterns the backtracking-free engine understands never
+// construct a std::regex; the others (backreferences, lookahead, ...) use
+// std::regex only. Patterns for which the engine may pick a different match
+// than std::regex (see regex_engine::Regex::exact_spans) have both: the engine
+// rejects non-matching input and std::regex computes the spans.
+struct CompiledPattern {
+    std::unique_ptr<regex_engine::Regex> engine;
+    std::unique_ptr<std::regex> fallback;
+};
+
+
+static std::unique_ptr<CompiledPattern> make_pattern(const char* pattern) {
+    auto compiled = std::make_unique<CompiledPattern>();
+    compiled->engine = regex_engine::Regex::compile(pattern);
+    if (!compiled->engine) {
+        compiled->fallback = std::make_unique<std::regex>(pattern);  // may throw
+    } else if (!compiled->engine->exact_spans()) {
         try {
-            auto re = std::make_shared<std::regex>(pattern);
-            int id = next_id++;
-            regex_cache[id] = re;
-            return id;
+            compiled->fallback = std::make_unique<std::regex>(pattern);
         } catch (const std::regex_error&) {
-            return -1; // Return -1 to indicate an error
+            // keep the engine's spans
         }
     }
+    return compiled;
+}
 
-    // Match a compiled regex against text
-    bool match_compiled(int id, const char* text) {
-        auto it = regex_cache.find(id);
-        if (it != regex_cache.end()) {
-            return std::regex_match(text, *it->second);
+// Thrown when a Budget runs out.
+struct BudgetExceeded {};
+
+// Thrown when the std::regex fallback is about to overflow the stack.
+struct StackExhausted {};
+
+// Lowest stack address the std::regex fallback may reach on the calling
+// thread, 0 if unknown. libstdc++ matches by recursing once or more per
+// character consumed and never reports running out of stack, so long inputs
+// would crash the process; stopping short of the end of the stack leaves
+// room for the frames between two characters and for unwinding.
+static uintptr_t stack_limit() {
+    thread_local uintptr_t limit = [] {
+        uintptr_t low = 0;
+        size_t size = 0;
+#if defined(__APPLE__)
+        pthread_t self = pthread_self();
+        size = pthread_get_stacksize_np(self);
+        low = reinterpret_cast<uintptr_t>(pthread_get_stackaddr_np(self)) - size;
+#elif defined(__linux__)
+        pthread_attr_t attr;
+        if (pthread_getattr_np(pthread_self(), &attr) == 0) {
+            void* addr = nullptr;
+            if (pthread_attr_getstack(&attr, &addr, &size) == 0) {
+                low = reinterpret_cast<uintptr_t>(addr);
+            }
+            pthread_attr_destroy(&attr);
+        }
+#endif
+        if (!low) {
+            return uintptr_t{0};
+        }
+        return low + std::min<size_t>(size / 4, 256 * 1024);
+    }();
+    return limit;
+}
+
+// Limits on the work of one native call. steps counts the characters the
+// std::regex fallback visits, backtracking included, which bounds patterns
+// that would otherwise take exponential time. The engine runs in linear time
+// and is not charged steps; the deadline applies to both and is checked by
+// the fallback as it steps and by the engine before every search. Stepping
+// also checks the stack (see stack_limit), so every fallback match runs with
+// a Budget, limited or not.
+struct Budget {
+    Budget(int64_t* steps, double timeout)
+        : steps(steps), has_deadline(timeout >= 0), stack_limit(::stack_limit()) {
+        if (has_deadline) {
+            deadline = std::chrono::steady_clock::now() +
+                       std::chrono::duration_cast<std::chrono::steady_clock::duration>(
+                           std::chrono::duration<double>(timeout));
         }
-        return false; // Return false if the ID is not found
     }
 
-    // Release a compiled regex by ID
-    void release_compiled(int id) {
-        regex_cache.erase(id);
+    void check_deadline() const {
+        if (has_deadline && std::chrono::steady_clock::now() >= deadline) {
+            throw BudgetExceeded();
+        }
     }
 
-    bool match(const char* pattern, const char* text) {
+    void step() {
+        char probe;
+        if (reinterpret_cast<uintptr_t>(&probe) < stack_limit) {
+            throw StackExhausted();
+        }
+        if (steps && --*steps < 0) {
+            throw BudgetExceeded();
+        }
+        if (has_deadline && (++ticks & 0xFFF) == 0) {
+            check_deadline();
+        }
+    }
+
+    int64_t* steps;  // remaining steps, null for no limit
+    bool has_deadline;
+    std::chrono::steady_clock::time_point deadline;
+    unsigned ticks = 0;
+    uintptr_t stack_limit;
+};
+
+// A pointer into the text that charges every advance to a Budget. std::regex
+// walks its input only through the iterators it is given, so searching with
+// these makes it stop by throwing once the budget is spent.
+class BudgetIterator {
+public:
+    using iterator_category = std::bidirectional_iterator_tag;
+    using value_type = char;
+    using difference_type = std::ptrdiff_t;
+    using pointer = const char*;
+    using reference = const char&;
+
+    BudgetIterator() = default;
+    BudgetIterator(const char* p, Budget* budget) : p_(p), budget_(budget) {}
+
+    const char* base() const { return p_; }
+    reference operator*() const { return *p_; }
+    pointer operator->() const { return p_; }
+    BudgetIterator& operator++() {
+        budget_->step();
+        ++p_;
+        return *this;
+    }
+    BudgetIterator operator++(int) {
+        BudgetIterator old = *this;
+        ++*this;
+        return old;
+    }
+    BudgetIterator& operator--() {
+        --p_;
+        return *this;
+    }
+    BudgetIterator operator--(int) {
+        BudgetIterator old = *this;
+        --p_;
+        return old;
+    }
+    bool operator==(const BudgetIterator& other) const { return p_ == other.p_; }
+    bool operator!=(const BudgetIterator& other) const { return p_ != other.p_; }
+
+private:
+    const char* p_ = nullptr;
+    Budget* budget_ = nullptr;
+};
+
+static const char* base(const char* p) { return p; }
+static const char* base(const BudgetIterator& it) { return it.base(); }
+
+static bool full_match(CompiledPattern& re, const char* text, size_t len, Budget* budget = nullptr) {
+    if (re.engine) {
+        if (budget) {
+            budget->check_deadline();
+        }
+        return re.engine->full_match(reinterpret_cast<const uint8_t*>(text), len);
+    }
+    Budget unlimited(nullptr, -1.0);
+    if (!budget) {
+        budget = &unlimited;
+    }
+    return std::regex_match(BudgetIterator(text, budget), BudgetIterator(text + len, budget),
+                            *re.fallback);
+}
+
+// std::regex search of [first, last), which starts at offset pos of text.
+template <typename It>
+static bool fallback_find(const std::regex& re, It first, It last, const char* text, size_t pos,
+                          std::vector<ptrdiff_t>& caps, bool want_groups) {
+    std::match_results<It> m;
+    auto flags = pos > 0 ? std::regex_constants::match_prev_avail
+                         : std::regex_constants::match_default;
+    if (!std::regex_search(first, last, m, re, flags)) {
+        return false;
+    }
+    size_t n = want_groups ? m.size() : 1;
+    caps.assign(2 * n, regex_engine::kUnset);
+    for (size_t g = 0; g < n; ++g) {
+        if (m[g].matched) {
+            caps[2 * g] = base(m[g].first) - text;
+            caps[2 * g + 1] = base(m[g].second) - text;
+        }
+    }
+    return true;
+}
+
+// Find the first match in text[pos:len]. caps receives the span and, when
+// want_groups, the spans of all groups (-1 for groups that did not match).
+// Throws BudgetExceeded if budget runs out first and StackExhausted if the
+// std::regex fallback runs out of stack.
+static bool find(CompiledPattern& re, const char* text, size_t len, size_t pos,
+                 std::vector<ptrdiff_t>& caps, bool want_groups, Budget* budget = nullptr) {
+    if (re.engine) {
+        if (budget) {
+            budget->check_deadline();
+        }
+        bool found = re.engine->search(reinterpret_cast<const uint8_t*>(text), len, pos, caps,
+                                       want_groups && !re.fallback);
+        if (!found || !re.fallback) {
+            return found;
+        }
+    }
+    Budget unlimited(nullptr, -1.0);
+    if (!budget) {
+        budget = &unlimited;
+    }
+    return fallback_find(*re.fallback, BudgetIterator(text + pos, budget),
+                         BudgetIterator(text + len, budget), text, pos, caps, want_groups);
+}
+
+// Position to resume searching after a match ending at end. Empty matches
+// advance by one UTF-8 character so iteration always makes progress.
+static size_t next_search_pos(const char* text, size_t len, ptrdiff_t start, ptrdiff_t end) {
+    size_t pos = static_cast<size_t>(end);
+    if (start == end && pos < len) {
+        ++pos;
+        while (pos < len && (static_cast<uint8_t>(text[pos]) & 0xC0) == 0x80) {
+            ++pos;
+        }
+    }
+    return pos;
+}
+
+// Expand an ECMAScript replacement format ($&, $n, $nn, $`, $', $$) like
+// std::regex_replace does.
+static void append_format(std::string& out, const char* fmt, const char* text, size_t len,
+                          const std::vector<ptrdiff_t>& caps) {
+    size_t ngroups = caps.size() / 2;
+    auto append_group = [&](size_t g) {
+        if (g < ngroups && caps[2 * g] >= 0) {
+            out.append(text + caps[2 * g], caps[2 * g + 1] - caps[2 * g]);
+        }
+    };
+    for (const char* p = fmt; *p; ++p) {
+        if (*p != '$' || !p[1]) {
+            out += *p;
+            continue;
+        }
+        char c = p[1];
+        if (c == '$') {
+            out += '$';
+            ++p;
+        } else if (c == '&') {
+            append_group(0);
+            ++p;
+        } else if (c == '`') {
+            out.append(text, caps[0]);
+            ++p;
+        } else if (c == '\'') {
+            out.append(text + caps[1], len - caps[1]);
+            ++p;
+        } else if (c >= '0' && c <= '9') {
+            size_t g = c - '0';
+            ++p;
+            if (p[1] >= '0' && p[1] <= '9' && g * 10 + (p[1] - '0') < ngroups) {
+                g = g * 10 + (p[1] - '0');
+                ++p;
+            }
+            append_group(g);
+        } else {
+            out += '$';
+        }
+    }
+}
+
+// Append text[0:len] with every match replaced by the expanded replacement
+// format to out.
+static void substitute(CompiledPattern& re, const char* text, size_t len, const char* replacement,
+                       std::string& out) {
+    bool want_groups = strchr(replacement, '$') != nullptr;
+    std::vector<ptrdiff_t> caps;
+    size_t copied = 0;
+    size_t pos = 0;
+    while (pos <= len && find(re, text, len, pos, caps, want_groups)) {
+        out.append(text + copied, caps[0] - copied);
+        append_format(out, replacement, text, len, caps);
+        copied = caps[1];
+        pos = next_search_pos(text, len, caps[0], caps[1]);
+        if (caps[0] == caps[1] && static_cast<size_t>(caps[1]) == len) {
+            break;
+        }
+    }
+    out.append(text + copied, len - copied);
+}
+
+// A set of patterns searched together (RegexSet). Literal patterns go into
+// an Aho-Corasick automaton and the other patterns the DFA supports into one
+// combined program, so a text is scanned twice at most however many patterns
+// there are. The remaining patterns (word boundaries, std::regex fallbacks)
+// are searched one by one.
+struct CompiledSet {
+    size_t size = 0;
+    std::unique_ptr<regex_engine::AhoCorasick> literals;
+    int nliterals = 0;
+    std::unique_ptr<regex_engine::Prog> prog;
+    std::vector<int> prog_ids;  // pattern index of each program in prog
+    std::vector<std::pair<int, std::unique_ptr<CompiledPattern>>> others;
+    // DFAs over prog, borrowed by one scan at a time
+    std::mutex pool_mutex;
+    std::vector<std::unique_ptr<regex_engine::DFA>> pool;
+};
+
+// Throws std::regex_error naming the index of the first invalid pattern.
+static std::unique_ptr<CompiledSet> make_set(const char* const* patterns, size_t n,
+                                             int* error_index) {
+    auto set = std::make_unique<CompiledSet>();
+    set->size = n;
+    std::vector<std::string> needles;
+    std::vector<int> needle_ids;
+    std::vector<std::string> combined;
+    for (size_t i = 0; i < n; ++i) {
+        *error_index = static_cast<int>(i);
+        std::unique_ptr<regex_engine::Prog> prog = regex_engine::compile(patterns[i]);
+        if (prog && prog->is_literal) {
+            needles.push_back(prog->literal);
+            needle_ids.push_back(static_cast<int>(i));
+        } else if (prog && !prog->has_word_boundary) {
+            combined.push_back(patterns[i]);
+            set->prog_ids.push_back(static_cast<int>(i));
+        } else {
+            set->others.emplace_back(static_cast<int>(i), make_pattern(patterns[i]));
+        }
+    }
+    *error_index = -1;
+    if (!needles.empty()) {
+        set->literals = std::make_unique<regex_engine::AhoCorasick>(needles, needle_ids);
+        set->nliterals = static_cast<int>(needles.size());
+    }
+    if (!combined.empty()) {
+        set->prog = regex_engine::compile_set(combined);
+        if (!set->prog) {  // too large for one program
+            for (size_t k = 0; k < combined.size(); ++k) {
+                set->others.emplace_back(set->prog_ids[k], make_pattern(combined[k].c_str()));
+            }
+            set->prog_ids.clear();
+        }
+    }
+    return set;
+}
+
+// Set results[i] to 1 if pattern i has a match in text[0:len], 0 otherwise.
+// Returns the number of matching patterns.
+static int scan_set(CompiledSet& set, const char* text, size_t len, uint8_t* results) {
+    auto bytes = reinterpret_cast<const uint8_t*>(text);
+    std::vector<uint8_t> matched(set.size, 0);
+    int count = 0;
+    if (set.literals) {
+        count += set.literals->scan(bytes, len, matched, set.nliterals);
+    }
+    if (set.prog) {
+        std::unique_ptr<regex_engine::DFA> dfa;
+        {
+            std::lock_guard<std::mutex> lock(set.pool_mutex);
+            if (!set.pool.empty()) {
+                dfa = std::move(set.pool.back());
+                set.pool.pop_back();
+            }
+        }
+        if (!dfa) {
+            dfa = std::make_unique<regex_engine::DFA>(*set.prog, false);
+        }
+        std::vector<uint8_t> prog_matched(set.prog_ids.size(), 0);
+        count += dfa->match_set(bytes, len, prog_matched);
+        for (size_t k = 0; k < prog_matched.size(); ++k) {
+            matched[set.prog_ids[k]] = prog_matched[k];
+        }
+        std::lock_guard<std::mutex> lock(set.pool_mutex);
+        set.pool.push_back(std::move(dfa));
+    }
+    std::vector<ptrdiff_t> caps;
+    for (auto& [index, re] : set.others) {
+        if (find(*re, text, len, 0, caps, false)) {
+            matched[index] = 1;
+            ++count;
+        }
+    }
+    std::copy(matched.begin(), matched.end(), results);
+    return count;
+}
+
+// Returned by the functions taking a step budget and timeout when it runs out
+constexpr int kBudgetExceeded = -2;
+// Returned by every matching function when the std::regex fallback would
+// overflow the stack, which happens on long inputs (see stack_limit)
+constexpr int kStackExhausted = -3;
+// Returned by the substitution functions when their result cannot be allocated
+constexpr int kOutOfMemory = -1;
+
+// Compiled patterns and sets are handed out as opaque pointers owned by the
+// caller, who must release them exactly once (release_compiled, release_set)
+// after the last call using them has returned. Calls on one handle may run
+// concurrently from several threads.
+extern "C" {
+    // Compile a regex pattern. Returns nullptr if it is invalid.
+    CompiledPattern* compile_pattern(const char* pattern) {
         try {
-            std::regex re(pattern);
-            return std::regex_match(text, re);
+            return make_pattern(pattern).release();
         } catch (const std::regex_error&) {
-            return false;
+            return nullptr;
         }
     }
 
-    // Search for a regex pattern in a string
-    const char* search_pattern(int id, const char* text) {
-        auto it = regex_cache.find(id);
-        if (it == regex_cache.end()) {
-            return nullptr; // Return nullptr if the ID is not found
+    // Every function that matches returns kStackExhausted (or reports it as
+    // documented) when the std::regex fallback runs out of stack.
+    //
+    // The functions taking steps and timeout stop early when either runs out:
+    // *steps is the number of fallback steps left (null for no limit) and is
+    // decremented as they are used, timeout the seconds the call may take
+    // (negative for no limit). See Budget. They return kBudgetExceeded then.
+
+    // Full match a compiled regex against text[0:len]. Returns 1 or 0.
+    int match_compiled(CompiledPattern* re, const char* text, size_t len, int64_t* steps,
+                       double timeout) {
+        Budget budget(steps, timeout);
+        try {
+            return full_match(*re, text, len, &budget);
+        } catch (const BudgetExceeded&) {
+            return kBudgetExceeded;
+        } catch (const StackExhausted&) {
+            return kStackExhausted;
+        } catch (const std::regex_error&) {
+            // Other implementations may report error_complexity while matching;
+            // libstdc++ recurses instead, which StackExhausted guards
+            return kBudgetExceeded;
         }
+    }
+
+    // Release a compiled regex
+    void release_compiled(CompiledPattern* re) {
+        delete re;
+    }
+
+    // Build a flat transition table for full matching (see
+    // regex_engine::FlatDFA). Returns whether the pattern could be optimized.
+    // Must be called before the regex is shared between threads.
+    bool optimize_compiled(CompiledPattern* re) {
+        return re->engine && re->engine->optimize();
+    }
+
+    // Version of the format written by serialize_compiled(). Data written with
+    // another version must not be passed to load_compiled().
+    int compiled_format_version() {
+        return regex_engine::format_version();
+    }
 
-        std::smatch match;
-        std::string str(text);
-        if (std::regex_search(str, match, *it->second)) {
-            return strdup(match.str().c_str()); // Return the matched substring
+    // Serialize a compiled regex, with its pattern, into out[0:cap]. Returns
+    // the size of the data, which is only written if it fits into cap, or 0
+    // if the regex cannot be serialized because it uses std::regex.
+    size_t serialize_compiled(CompiledPattern* re, const char* pattern, char* out, size_t cap) {
+        if (!re->engine || re->fallback) {
+            return 0;
+        }
+        std::string data;
+        uint32_t pattern_len = static_cast<uint32_t>(strlen(pattern));
+        data.append(reinterpret_cast<const char*>(&pattern_len), sizeof(pattern_len));
+        data += pattern;
+        re->engine->serialize(data);
+        if (data.size() <= cap) {
+            memcpy(out, data.data(), data.size());
         }
-        return nullptr; // Return nullptr if no match is found
+        return data.size();
     }
 
+    // Rebuild a regex from the output of serialize_compiled() without
+    // compiling its pattern. Returns nullptr if the data is malformed or was
+    // written for a different pattern.
+    CompiledPattern* load_compiled(const char* data, size_t len, const char* pattern) {
+        uint32_t pattern_len;
+        if (len < sizeof(pattern_len)) {
+            return nullptr;
+        }
+        memcpy(&pattern_len, data, sizeof(pattern_len));
+        size_t header = sizeof(pattern_len) + pattern_len;
+        if (len < header || pattern_len != strlen(pattern) ||
+            memcmp(data + sizeof(pattern_len), pattern, pattern_len) != 0) {
+            return nullptr;
+        }
+        auto compiled = std::make_unique<CompiledPattern>();
+        compiled->engine = regex_engine::Regex::deserialize(
+            reinterpret_cast<const uint8_t*>(data) + header, len - header);
+        if (!compiled->engine || !compiled->engine->exact_spans()) {
+            return nullptr;
+        }
+        return compiled.release();
+    }
 
-    // Find all matches of a regex pattern in a string
-    extern "C" char** findall_pattern(int id, const char* text) {
-        auto it = regex_cache.find(id);
-        if (it == regex_cache.end()) {
-            return nullptr; // Return nullptr if the ID is not found
+    bool match(const char* pattern, const char* text) {
+        try {
+            auto re = make_pattern(pattern);
+            return full_match(*re, text, strlen(text));
+        } catch (const std::regex_error&) {
+            return false;
+        } catch (const StackExhausted&) {
+            return false;
         }
+    }
 
-        std::string str(text);
-        std::smatch match;
-        std::vector<std::string> matches;
-        std::string::const_iterator searchStart(str.cbegin());
+    // Number of capture groups of a compiled regex
+    int pattern_groups(CompiledPattern* re) {
+        return re->engine ? re->engine->ngroups() : static_cast<int>(re->fallback->mark_count());
+    }
 
-        // Find all matches
-        while (std::regex_search(searchStart, str.cend(), match, *it->second)) {
-            matches.push_back(match.str()); // Store each match in the vector
-            searchStart = match.suffix().first;
+    // Search text[pos:len] and write the byte offsets of the match and of every
+    // group to spans as start/end pairs, -1 for groups that did not participate.
+    // spans must hold 2 * (pattern_groups(re) + 1) values.
+    // Returns 1 on a match, 0 if there is none.
+    int search_spans(CompiledPattern* re, const char* text, size_t len, size_t pos, int64_t* spans,
+                     int64_t* steps, double timeout) {
+        Budget budget(steps, timeout);
+        std::vector<ptrdiff_t> caps;
+        try {
+            if (pos > len || !find(*re, text, len, pos, caps, true, &budget)) {
+                return 0;
+            }
+        } catch (const BudgetExceeded&) {
+            return kBudgetExceeded;
+        } catch (const StackExhausted&) {
+            return kStackExhausted;
+        } catch (const std::regex_error&) {
+            return kBudgetExceeded;
         }
+        std::copy(caps.begin(), caps.end(), spans);
+        return 1;
+    }
 
-        if (matches.empty()) {
-            return nullptr; // Return nullptr if no matches are found
+    // Find up to max_matches successive matches starting at *pos and write their
+    // spans to spans: the start/end byte offsets of each match, followed by
+    // those of its groups when with_groups is set (2 * (pattern_groups(re) + 1)
+    // values per match, otherwise 2). *pos acts as a cursor: it is advanced to
+    // where the next call should resume, or past len once the text is
+    // exhausted. Returns the number of matches written.
+    int findall_spans(CompiledPattern* re, const char* text, size_t len, size_t* pos,
+                      int64_t* spans, int max_matches, bool with_groups,
+                      int64_t* steps, double timeout) {
+        Budget budget(steps, timeout);
+        std::vector<ptrdiff_t> caps;
+        int count = 0;
+        while (count < max_matches && *pos <= len) {
+            bool found;
+            try {
+                found = find(*re, text, len, *pos, caps, with_groups, &budget);
+            } catch (const BudgetExceeded&) {
+                return kBudgetExceeded;
+            } catch (const StackExhausted&) {
+                return kStackExhausted;
+            } catch (const std::regex_error&) {
+                return kBudgetExceeded;
+            }
+            if (!found) {
+                *pos = len + 1;
+                break;
+            }
+            spans = std::copy(caps.begin(), caps.end(), spans);
+            ++count;
+            if (caps[0] == caps[1] && static_cast<size_t>(caps[1]) == len) {
+                *pos = len + 1;
+            } else {
+                *pos = next_search_pos(text, len, caps[0], caps[1]);
+            }
         }
+        return count;
+    }
 
-        // Allocate an array of char* to hold the matches
-        char** result = (char**)malloc((matches.size() + 1) * sizeof(char*));
-        if (!result) {
-            return nullptr; // Return nullptr if memory allocation fails
+    // Substitute all matches in text[0:len]. Stores the result in a malloc'd
+    // buffer (to be released with free()) at *out and its size, which may
+    // include NUL bytes, at *out_len. Returns 0, kStackExhausted, or
+    // kOutOfMemory if the buffer cannot be allocated.
+    int substitute_pattern(CompiledPattern* re, const char* text, size_t len,
+                           const char* replacement, char** out, size_t* out_len) {
+        std::string result;
+        try {
+            substitute(*re, text, len, replacement, result);
+        } catch (const StackExhausted&) {
+            return kStackExhausted;
+        }
+        *out = static_cast<char*>(malloc(result.size() + 1));
+        if (!*out) {
+            return kOutOfMemory;
         }
+        memcpy(*out, result.data(), result.size() + 1);
+        *out_len = result.size();
+        return 0;
+    }
 
-        // Copy each match into the array
-        for (size_t i = 0; i < matches.size(); ++i) {
-            result[i] = strdup(matches[i].c_str()); // Duplicate the string
-            if (!result[i]) {
-                // Free previously allocated memory if strdup fails
-                for (size_t j = 0; j < i; ++j) {
-                    free(result[j]);
-                }
-                free(result);
-                return nullptr;
+    // The *_many functions below process n texts packed into one buffer: text i
+    // is data[offsets[i]:offsets[i + 1]], so offsets holds n + 1 values.
+
+    // Full match every text. results[i] is set to 1 or 0.
+    // Returns the number of matching texts.
+    int match_many(CompiledPattern* re, const char* data, const size_t* offsets, size_t n, uint8_t* results) {
+        int count = 0;
+        try {
+            for (size_t i = 0; i < n; ++i) {
+                results[i] = full_match(*re, data + offsets[i], offsets[i + 1] - offsets[i]);
+                count += results[i];
             }
+        } catch (const StackExhausted&) {
+            return kStackExhausted;
         }
+        return count;
+    }
 
-        // Null-terminate the array
-        result[matches.size()] = nullptr;
-
-        return result;
+    // Search every text and write the start/end byte offsets of its first match,
+    // relative to the text, to spans[2 * i] and spans[2 * i + 1] (-1 if none).
+    // Returns the number of texts with a match.
+    int search_many(CompiledPattern* re, const char* data, const size_t* offsets, size_t n, int64_t* spans) {
+        std::vector<ptrdiff_t> caps;
+        int count = 0;
+        try {
+            for (size_t i = 0; i < n; ++i) {
+                if (find(*re, data + offsets[i], offsets[i + 1] - offsets[i], 0, caps, false)) {
+                    spans[2 * i] = caps[0];
+                    spans[2 * i + 1] = caps[1];
+                    ++count;
+                } else {
+                    spans[2 * i] = spans[2 * i + 1] = -1;
+                }
+            }
+        } catch (const StackExhausted&) {
+            return kStackExhausted;
+        }
+        return count;
     }
 
-    // Function to free the allocated memory for the matches
-    extern "C" void free_matches(char** matches) {
-        if (!matches) {
-            return;
+    // Substitute all matches in every text. The results are concatenated into
+    // a malloc'd buffer stored at *out (to be released with free()); result i
+    // is (*out)[out_offsets[i]:out_offsets[i + 1]]. Returns 0, kStackExhausted
+    // or kOutOfMemory, like substitute_pattern.
+    int sub_many(CompiledPattern* re, const char* data, const size_t* offsets, size_t n,
+                 const char* replacement, size_t* out_offsets, char** out) {
+        std::string result;
+        out_offsets[0] = 0;
+        try {
+            for (size_t i = 0; i < n; ++i) {
+                substitute(*re, data + offsets[i], offsets[i + 1] - offsets[i], replacement,
+                           result);
+                out_offsets[i + 1] = result.size();
+            }
+        } catch (const StackExhausted&) {
+            return kStackExhausted;
         }
+        *out = static_cast<char*>(malloc(result.size() + 1));
+        if (!*out) {
+            return kOutOfMemory;
+        }
+        memcpy(*out, result.data(), result.size() + 1);
+        return 0;
+    }
 
-        for (size_t i = 0; matches[i] != nullptr; ++i) {
-            free(matches[i]); // Free each string
+    // Compile patterns into a set. On an invalid pattern returns nullptr and
+    // stores its index in *error_index.
+    CompiledSet* compile_set(const char* const* patterns, size_t n, int* error_index) {
+        try {
+            return make_set(patterns, n, error_index).release();
+        } catch (const std::regex_error&) {
+            return nullptr;
         }
-        free(matches); // Free the array itself
     }
 
-    // Substitute all occurrences of a regex pattern in a string
-    const char* substitute_pattern(int id, const char* text, const char* replacement) {
-        auto it = regex_cache.find(id);
-        if (it == regex_cache.end()) {
-            return nullptr; // Return nullptr if the ID is not found
+    // Write 1 to results[i] if pattern i of the set matches somewhere in
+    // text[0:len], 0 otherwise. Returns the number of matching patterns.
+    int set_matches(CompiledSet* set, const char* text, size_t len, uint8_t* results) {
+        try {
+            return scan_set(*set, text, len, results);
+        } catch (const StackExhausted&) {
+            return kStackExhausted;
         }
+    }
 
-        std::string str(text);
-        std::string result = std::regex_replace(str, *it->second, replacement);
-        return strdup(result.c_str()); // Return the modified string
+    // Release a compiled set
+    void release_set(CompiledSet* set) {
+        delete set;
     }
 }
@@ -1,11 +1,60 @@
-from typing import List, Optional
+from typing import Any
 
-def compile_pattern(pattern: str) -> int: ...
-def match_compiled(id: int, text: str) -> bool: ...
-def release_compiled(id: int) -> None: ...
-def match(pattern: str, text: str) -> bool: ...
-def search_pattern(id: int, text: str) -> Optional[str]: ...
-def findall_pattern(id: int, text: str) -> List[str]: ...
-def free_matches(matches: List[str]) -> None: ...
-def substitute_pattern(id: int, text: str, replacement: str) -> Optional[str]: ...
+# Compiled patterns and sets are opaque cffi pointers
+CompiledPattern = Any
+CompiledSet = Any
+
+def compile_pattern(pattern: bytes) -> CompiledPattern: ...
+def match_compiled(
+    re: CompiledPattern, text: bytes, len: int, steps: Any, timeout: float
+) -> int: ...
+def release_compiled(re: CompiledPattern) -> None: ...
+def match(pattern: bytes, text: bytes) -> bool: ...
+def pattern_groups(re: CompiledPattern) -> int: ...
+def search_spans(
+    re: CompiledPattern,
+    text: Any,
+    len: int,
+    pos: int,
+    spans: Any,
+    steps: Any,
+    timeout: float,
+) -> int: ...
+def findall_spans(
+    re: CompiledPattern,
+    text: Any,
+    len: int,
+    pos: Any,
+    spans: Any,
+    max_matches: int,
+    with_groups: bool,
+    steps: Any,
+    timeout: float,
+) -> int: ...
+def substitute_pattern(
+    re: CompiledPattern,
+    text: bytes,
+    len: int,
+    replacement: bytes,
+    out: Any,
+    out_len: Any,
+) -> int: ...
+def match_many(
+    re: CompiledPattern, data: bytes, offsets: Any, n: int, results: Any
+) -> int: ...
+def search_many(
+    re: CompiledPattern, data: bytes, offsets: Any, n: int, spans: Any
+) -> int: ...
+def sub_many(
+    re: CompiledPattern,
+    data: bytes,
+    offsets: Any,
+    n: int,
+    replacement: bytes,
+    out_offsets: Any,
+    out: Any,
+) -> int: ...
+def compile_set(patterns: Any, n: int, error_index: Any) -> CompiledSet: ...
+def set_matches(set: CompiledSet, text: bytes, len: int, results: Any) -> int: ...
+def release_set(set: CompiledSet) -> None: ...
 def free(ptr: object) -> None: ...
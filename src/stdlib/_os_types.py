@@ -1,8 +1,8 @@
 import ctypes
 import platform
 
-# Load the libc library
-libc = ctypes.CDLL(None)
+# Load the libc library; use_errno makes ctypes.get_errno() report its errors
+libc = ctypes.CDLL(None, use_errno=True)
 
 
 # Define the necessary types and structures
@@ -36,6 +36,7 @@ if platform.system() == "Darwin":  # macOS
 
 
 class Stat(ctypes.Structure):
+    # struct stat of glibc on x86_64
     _fields_ = [
         ("st_dev", ctypes.c_ulonglong),  # Device ID of the file
         ("st_ino", ctypes.c_ulonglong),  # Inode number
@@ -53,6 +54,32 @@ class Stat(ctypes.Structure):
         ("st_mtime_nsec", ctypes.c_long),  # Nanoseconds of last modification
         ("st_ctime", ctypes.c_long),  # Time of last status change
         ("st_ctime_nsec", ctypes.c_long),  # Nanoseconds of last status change
+        ("__glibc_reserved", ctypes.c_long * 3),  # Reserved, stat() writes it too
+    ]
+
+
+class GenericStat(ctypes.Structure):
+    # struct stat of the generic 64-bit Linux ABI (aarch64, riscv64, loongarch64)
+    _fields_ = [
+        ("st_dev", ctypes.c_ulonglong),  # Device ID of the file
+        ("st_ino", ctypes.c_ulonglong),  # Inode number
+        ("st_mode", ctypes.c_uint),  # File type and mode
+        ("st_nlink", ctypes.c_uint),  # Number of hard links
+        ("st_uid", ctypes.c_uint),  # User ID of the file's owner
+        ("st_gid", ctypes.c_uint),  # Group ID of the file's owner
+        ("st_rdev", ctypes.c_ulonglong),  # Device ID (if special file)
+        ("__pad1", ctypes.c_ulonglong),
+        ("st_size", ctypes.c_longlong),  # Total size in bytes
+        ("st_blksize", ctypes.c_int),  # Optimal block size for I/O
+        ("__pad2", ctypes.c_int),
+        ("st_blocks", ctypes.c_longlong),  # Number of 512-byte blocks allocated
+        ("st_atime", ctypes.c_long),  # Time of last access
+        ("st_atime_nsec", ctypes.c_long),  # Nanoseconds of last access
+        ("st_mtime", ctypes.c_long),  # Time of last modification
+        ("st_mtime_nsec", ctypes.c_long),  # Nanoseconds of last modification
+        ("st_ctime", ctypes.c_long),  # Time of last status change
+        ("st_ctime_nsec", ctypes.c_long),  # Nanoseconds of last status change
+        ("__unused", ctypes.c_int * 2),  # Reserved, stat() writes it too
     ]
 
 
@@ -85,6 +112,15 @@ class MacOSStat(ctypes.Structure):
 
 if platform.system() == "Darwin":  # macOS
     Stat = MacOSStat  # type: ignore # noqa: F811
+elif platform.machine() in ("aarch64", "riscv64", "loongarch64"):
+    Stat = GenericStat  # type: ignore # noqa: F811
+elif platform.machine() != "x86_64":
+    # stat() must never write past the buffer, so on a layout this module does
+    # not describe, pad generously; the field offsets may then be wrong
+    class _PaddedStat(Stat):
+        _fields_ = [("__unknown_abi_pad", ctypes.c_char * 128)]
+
+    Stat = _PaddedStat  # type: ignore # noqa: F811
 
 # Define the function prototypes
 libc.opendir.argtypes = [ctypes.c_char_p]
@@ -138,3 +174,20 @@ access.restype = ctypes.c_int
 # Define the stat function
 libc.stat.argtypes = [ctypes.c_char_p, ctypes.POINTER(Stat)]
 libc.stat.restype = ctypes.c_int
+
+# Define the lstat function
+libc.lstat.argtypes = [ctypes.c_char_p, ctypes.POINTER(Stat)]
+libc.lstat.restype = ctypes.c_int
+
+# Define the open and close functions (for getdents64)
+libc.open.argtypes = [ctypes.c_char_p, ctypes.c_int]
+libc.open.restype = ctypes.c_int
+
+libc.close.argtypes = [ctypes.c_int]
+libc.close.restype = ctypes.c_int
+
+# Reads many directory entries per call; Linux only, exported by glibc >= 2.30
+HAVE_GETDENTS64 = hasattr(libc, "getdents64")
+if HAVE_GETDENTS64:
+    libc.getdents64.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_size_t]
+    libc.getdents64.restype = ctypes.c_ssize_t
@@ -19,6 +19,8 @@ from ._csv import (
     unregister_dialect,
     writer,
 )
+from ._sample import sample_rows
+from ._sqlite import load_sqlite
 
 __all__ = [
     "Error",
@@ -31,8 +33,10 @@ __all__ = [
     "field_size_limit",
     "get_dialect",
     "list_dialects",
+    "load_sqlite",
     "reader",
     "register_dialect",
+    "sample_rows",
     "unregister_dialect",
     "writer",
 ]
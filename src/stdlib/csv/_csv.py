@@ -5,7 +5,18 @@
 This module provides a CSV parser and writer.
 """
 
-from typing import Any, Dict, Iterable, List, Optional, Sequence, TextIO, Union
+import functools
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    TextIO,
+    Tuple,
+    Union,
+)
 
 # Quoting styles
 QUOTE_MINIMAL = 0
@@ -33,6 +44,9 @@ class Dialect:
     """
     Describes a CSV dialect.
 
+    Dialects are immutable and hashable, so they can be shared between readers
+    and writers and used as cache keys.
+
     Attributes:
         delimiter (str): A one-character string used to separate fields.
         doublequote (bool): Controls how instances of quotechar appearing inside a field are themselves quoted.
@@ -45,6 +59,31 @@ class Dialect:
         strict (bool): When True, raise exception Error on bad CSV input.
     """
 
+    __slots__ = (
+        "delimiter",
+        "doublequote",
+        "escapechar",
+        "lineterminator",
+        "quotechar",
+        "quoting",
+        "skipinitialspace",
+        "strict",
+        # Derived state computed once at construction and reused by writers
+        "_specials",
+        "_hash",
+    )
+
+    delimiter: str
+    doublequote: bool
+    escapechar: Optional[str]
+    lineterminator: str
+    quotechar: Optional[str]
+    quoting: int
+    skipinitialspace: bool
+    strict: bool
+    _specials: Tuple[str, ...]
+    _hash: int
+
     def __init__(
         self,
         delimiter: Optional[str] = None,
@@ -56,111 +95,117 @@ class Dialect:
         skipinitialspace: Optional[bool] = None,
         strict: Optional[bool] = None,
     ):
-
-        self._delimiter: str = ","
-        self._doublequote: bool = True
-        self._escapechar: Optional[str] = None
-        self._lineterminator: str = "\r\n"
-        self._quotechar: Optional[str] = '"'
-        self._quoting: int = QUOTE_MINIMAL
-        self._skipinitialspace: bool = False
-        self._strict: bool = False
-
-        # CPython's Dialect class uses properties with underscores for storage.
-        # We'll set them directly but provide properties for external access.
-
-        if delimiter is not None:
-            self._delimiter = delimiter
-        if doublequote is not None:
-            self._doublequote = doublequote
-        if escapechar is not None:
-            self._escapechar = escapechar
-        if lineterminator is not None:
-            self._lineterminator = lineterminator
-        if quotechar is not None:
-            self._quotechar = quotechar
-        if quoting is not None:
-            self._quoting = quoting
-        if skipinitialspace is not None:
-            self._skipinitialspace = skipinitialspace
-        if strict is not None:
-            self._strict = strict
+        if delimiter is None:
+            delimiter = ","
+        if doublequote is None:
+            doublequote = True
+        if lineterminator is None:
+            lineterminator = "\r\n"
+        if quotechar is None:
+            quotechar = '"'
+        if quoting is None:
+            quoting = QUOTE_MINIMAL
+        if skipinitialspace is None:
+            skipinitialspace = False
+        if strict is None:
+            strict = False
 
         # Validation
-        if not isinstance(self._delimiter, str) or len(self._delimiter) != 1:
+        if not isinstance(delimiter, str) or len(delimiter) != 1:
             raise TypeError("delimiter must be a single character string")
-        if not isinstance(self._doublequote, bool):
+        if not isinstance(doublequote, bool):
             raise TypeError("doublequote must be a boolean")
-        if self._escapechar is not None and (
-            not isinstance(self._escapechar, str) or len(self._escapechar) != 1
+        if escapechar is not None and (
+            not isinstance(escapechar, str) or len(escapechar) != 1
         ):
             raise TypeError("escapechar must be a single character string or None")
-        if not isinstance(self._lineterminator, str):
+        if not isinstance(lineterminator, str):
             raise TypeError("lineterminator must be a string")
         if (
-            self._quotechar is not None
-            and (not isinstance(self._quotechar, str) or len(self._quotechar) != 1)
-            and self._quotechar != ""
+            quotechar is not None
+            and (not isinstance(quotechar, str) or len(quotechar) != 1)
+            and quotechar != ""
         ):  # allow empty string for quotechar
             raise TypeError(
                 "quotechar must be a single character string or None or an empty string"
             )
         if (
-            self._quotechar == ""
+            quotechar == ""
         ):  # Treat empty string as None for consistency internally for some checks
-            self._quotechar = None
+            quotechar = None
 
-        if not isinstance(self._quoting, int) or self._quoting not in [
+        if not isinstance(quoting, int) or quoting not in [
             QUOTE_MINIMAL,
             QUOTE_ALL,
             QUOTE_NONNUMERIC,
             QUOTE_NONE,
         ]:
             raise TypeError("quoting must be one of the QUOTE_* constants")
-        if not isinstance(self._skipinitialspace, bool):
+        if not isinstance(skipinitialspace, bool):
             raise TypeError("skipinitialspace must be a boolean")
-        if not isinstance(self._strict, bool):
+        if not isinstance(strict, bool):
             raise TypeError("strict must be a boolean")
 
-        if self._quoting == QUOTE_NONE and self._escapechar is None:
+        if quoting == QUOTE_NONE and escapechar is None:
             # This is not an error at dialect creation, but writer might raise error if problematic data is passed
             pass
-        if self._quoting != QUOTE_NONE and self._quotechar is None:
+        if quoting != QUOTE_NONE and quotechar is None:
             raise TypeError(
                 "quotechar must be a character if quoting is not QUOTE_NONE"
             )
 
-    @property
-    def delimiter(self) -> str:
-        return self._delimiter
-
-    @property
-    def doublequote(self) -> bool:
-        return self._doublequote
-
-    @property
-    def escapechar(self) -> Optional[str]:
-        return self._escapechar
-
-    @property
-    def lineterminator(self) -> str:
-        return self._lineterminator
+        object.__setattr__(self, "delimiter", delimiter)
+        object.__setattr__(self, "doublequote", doublequote)
+        object.__setattr__(self, "escapechar", escapechar)
+        object.__setattr__(self, "lineterminator", lineterminator)
+        object.__setattr__(self, "quotechar", quotechar)
+        object.__setattr__(self, "quoting", quoting)
+        object.__setattr__(self, "skipinitialspace", skipinitialspace)
+        object.__setattr__(self, "strict", strict)
+
+        # Characters that force a field to be quoted under QUOTE_MINIMAL
+        specials = [delimiter]
+        if quotechar:
+            specials.append(quotechar)
+        specials.extend(c for c in lineterminator if c not in specials)
+        object.__setattr__(self, "_specials", tuple(specials))
+        object.__setattr__(self, "_hash", hash(self._astuple()))
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"Dialect is immutable, cannot set {name!r}")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"Dialect is immutable, cannot delete {name!r}")
+
+    def _astuple(self) -> Tuple[Any, ...]:
+        return (
+            self.delimiter,
+            self.doublequote,
+            self.escapechar,
+            self.lineterminator,
+            self.quotechar,
+            self.quoting,
+            self.skipinitialspace,
+            self.strict,
+        )
 
-    @property
-    def quotechar(self) -> Optional[str]:
-        return self._quotechar
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Dialect):
+            return NotImplemented
+        return self._astuple() == other._astuple()
 
-    @property
-    def quoting(self) -> int:
-        return self._quoting
+    def __hash__(self) -> int:
+        return self._hash
 
-    @property
-    def skipinitialspace(self) -> bool:
-        return self._skipinitialspace
+    def __repr__(self) -> str:
+        params = ", ".join(f"{k}={v!r}" for k, v in self._asdict().items())
+        return f"{type(self).__name__}({params})"
 
-    @property
-    def strict(self) -> bool:
-        return self._strict
+    def __reduce__(self) -> Tuple[Any, ...]:
+        params = self._asdict()
+        if params["quotechar"] is None:
+            params["quotechar"] = ""  # None would mean "use the default"
+        return (type(self), tuple(params.values()))
 
     # To allow Dialect instances to be used in **fmtparams style
     def _asdict(self) -> Dict[str, Any]:
@@ -176,6 +221,37 @@ class Dialect:
         }
 
 
+@functools.lru_cache(maxsize=256)
+def _merge_dialect(
+    base: Dialect, fmtparams: Tuple[Tuple[str, type, Any], ...]
+) -> Dialect:
+    params = base._asdict()
+    params.update((name, value) for name, _, value in fmtparams)
+    return Dialect(**params)
+
+
+def _resolve_dialect(dialect: _DialectLike, fmtparams: Dict[str, Any]) -> Dialect:
+    """
+    Look up dialect and apply fmtparams on top of it.
+
+    Resolved dialects are cached, so readers and writers created repeatedly with
+    the same arguments share one validated Dialect instead of rebuilding it.
+    """
+    d = get_dialect(dialect)
+    if not fmtparams:
+        return d
+    # The type is part of the key: 1 == True and 0 == False hash alike, but only
+    # the bools pass validation, so they must not share a cache entry
+    key = tuple(sorted((name, type(value), value) for name, value in fmtparams.items()))
+    try:
+        hash(key)
+    except TypeError:
+        # Unhashable values are rejected by validation anyway,
+        # build the dialect uncached to surface the proper error.
+        return _merge_dialect.__wrapped__(d, key)
+    return _merge_dialect(d, key)
+
+
 _dialects: Dict[str, Dialect] = {}
 
 
@@ -201,13 +277,7 @@ def register_dialect(
                 "dialect argument must be a Dialect instance or a string name of a registered dialect"
             )
 
-        if fmtparams:  # Override attributes of the passed dialect object
-            # Create a new Dialect based on the old one, then apply fmtparams
-            # This is safer than modifying the original dialect instance if it's shared
-            base_params = d._asdict()
-            base_params.update(fmtparams)
-            d = Dialect(**base_params)
-        _dialects[name] = d
+        _dialects[name] = _resolve_dialect(d, fmtparams)
     else:  # No dialect object, create new from fmtparams
         _dialects[name] = Dialect(**fmtparams)
 
@@ -449,13 +519,8 @@ class Sniffer:
 def reader(
     csvfile: Iterable[str], dialect: _DialectLike = "excel", **fmtparams: Any
 ) -> Iterable[List[str]]:
-    d = get_dialect(dialect)
     # Override dialect attributes with fmtparams
-    # Create a new Dialect instance if fmtparams are present
-    if fmtparams:
-        merged_params = d._asdict()
-        merged_params.update(fmtparams)
-        d = Dialect(**merged_params)
+    d = _resolve_dialect(dialect, fmtparams)
 
     # Use dialect attributes
     delimiter = d.delimiter
@@ -614,13 +679,7 @@ class writer:
         self, csvfile: TextIO, dialect: _DialectLike = "excel", **fmtparams: Any
     ):
         self.csvfile = csvfile
-        d = get_dialect(dialect)
-        if fmtparams:
-            merged_params = d._asdict()
-            merged_params.update(fmtparams)
-            self.dialect = Dialect(**merged_params)
-        else:
-            self.dialect = d
+        self.dialect = _resolve_dialect(dialect, fmtparams)
 
         # Validate dialect parameters for writer context
         if self.dialect.quoting == QUOTE_NONE and not self.dialect.escapechar:
@@ -639,6 +698,7 @@ class writer:
         doublequote = self.dialect.doublequote
         lineterminator = self.dialect.lineterminator
         quoting = self.dialect.quoting
+        specials = self.dialect._specials
 
         processed_fields: List[str] = []
         for field_obj in row:
@@ -655,11 +715,7 @@ class writer:
                     raise Error("quotechar must be set for QUOTE_ALL")
                 needs_quoting = True
             elif quoting == QUOTE_MINIMAL:
-                if quotechar and (
-                    delimiter in field_str
-                    or quotechar in field_str
-                    or any(c in field_str for c in lineterminator)
-                ):
+                if quotechar and any(c in field_str for c in specials):
                     needs_quoting = True
             elif quoting == QUOTE_NONNUMERIC:
                 if quotechar is None:
@@ -670,11 +726,7 @@ class writer:
                 ):
                     needs_quoting = True
                 else:
-                    if quotechar and (
-                        delimiter in field_str
-                        or quotechar in field_str
-                        or any(c in field_str for c in lineterminator)
-                    ):
+                    if quotechar and any(c in field_str for c in specials):
                         needs_quoting = True
             elif quoting == QUOTE_NONE:
                 if escapechar:
@@ -687,11 +739,7 @@ class writer:
                     processed_fields.append(temp_field)
                     continue
                 else:
-                    if (
-                        delimiter in field_str
-                        or (quotechar and quotechar in field_str)
-                        or any(c in field_str for c in lineterminator)
-                    ):
+                    if any(c in field_str for c in specials):
                         raise Error(
                             "delimiter or quotechar found in field, but escapechar is not set for QUOTE_NONE"
                         )
@@ -0,0 +1,62 @@
+"""Reservoir sampling of CSV rows."""
+
+import itertools
+import math
+import random
+from typing import Any, Iterable, List, Optional
+
+from ._csv import _DialectLike, reader
+
+
+def _open_unit(rng: random.Random) -> float:
+    """Return a uniform float in the open interval (0, 1)."""
+    u = rng.random()
+    while u == 0.0:
+        u = rng.random()
+    return u
+
+
+def sample_rows(
+    csvfile: Iterable[str],
+    k: int,
+    seed: Optional[int] = None,
+    dialect: _DialectLike = "excel",
+    **fmtparams: Any,
+) -> List[List[str]]:
+    """
+    Return a uniform random sample of k rows from csvfile.
+
+    The input is read once with O(k) memory, so it can be arbitrarily large.
+    Uses Algorithm L: instead of drawing a random number for every row it
+    computes how many rows to skip until the next replacement, so the number
+    of random draws grows with k * log(n / k) rather than n.
+
+    If csvfile has fewer than k rows, all of them are returned in input order.
+
+    :param csvfile: Any iterable of lines accepted by reader().
+    :param k: The number of rows to sample.
+    :param seed: Seed for a private random generator, for reproducible samples.
+    :param dialect: Dialect name or instance, as for reader().
+    :param fmtparams: Dialect overrides, as for reader().
+    :return: A list of at most k rows.
+    """
+    if not isinstance(k, int) or k < 0:
+        raise ValueError("k must be a non-negative integer")
+    if k == 0:
+        return []
+
+    rows = iter(reader(csvfile, dialect, **fmtparams))
+    reservoir = list(itertools.islice(rows, k))
+    if len(reservoir) < k:
+        return reservoir
+
+    rng = random.Random(seed)
+    w = math.exp(math.log(_open_unit(rng)) / k)
+    while True:
+        # w can round to 1.0 for very large k, which means "replace the next row"
+        skip = math.floor(math.log(_open_unit(rng)) / math.log1p(-w)) if w < 1.0 else 0
+        row = next(itertools.islice(rows, skip, None), None)
+        if row is None:
+            return reservoir
+        reservoir[rng.randrange(k)] = row
+        w *= math.exp(math.log(_open_unit(rng)) / k)
@@ -0,0 +1,170 @@
+"""Bulk loading of CSV data into SQLite."""
+
+import itertools
+import re
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Sequence
+
+from ._csv import Error, Sniffer, _DialectLike, reader
+
+if TYPE_CHECKING:
+    import sqlite3
+
+# Connection settings that trade durability for insert speed while loading
+_BULK_PRAGMAS = {
+    "synchronous": "OFF",
+    "journal_mode": "MEMORY",
+    "temp_store": "MEMORY",
+    "cache_size": -64 * 1024,  # 64 MiB
+}
+
+# Numbers as SQLite itself parses them; int() and float() also accept
+# surrounding whitespace, underscores, "nan" and "inf", which it does not
+_INTEGER_RE = re.compile(r"[+-]?[0-9]+")
+_REAL_RE = re.compile(r"[+-]?([0-9]+\.?[0-9]*|\.[0-9]+)([eE][+-]?[0-9]+)?")
+
+
+def _quote_identifier(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _infer_type(values: Iterable[str]) -> str:
+    """Return the narrowest SQLite column type that fits all non-empty values."""
+    column_type = None
+    for value in values:
+        if value == "":
+            continue
+        if column_type in (None, "INTEGER") and _INTEGER_RE.fullmatch(value):
+            column_type = "INTEGER"
+        elif _REAL_RE.fullmatch(value):
+            column_type = "REAL"
+        else:
+            return "TEXT"
+    return column_type or "TEXT"
+
+
+def _infer_schema(header: List[str], rows: List[List[str]]) -> Dict[str, str]:
+    return {
+        name: _infer_type(row[i] for row in rows if i < len(row))
+        for i, name in enumerate(header)
+    }
+
+
+def _set_pragmas(conn: "sqlite3.Connection", pragmas: Dict[str, Any]) -> None:
+    for name, value in pragmas.items():
+        conn.execute(f"PRAGMA {name} = {value}")
+
+
+def load_sqlite(
+    csvfile: Iterable[str],
+    conn: "sqlite3.Connection",
+    table: str,
+    schema: Optional[Dict[str, str]] = None,
+    dialect: Optional[_DialectLike] = None,
+    header: Optional[bool] = None,
+    batch_size: int = 10000,
+    sample_lines: int = 100,
+    tune_pragmas: bool = False,
+    **fmtparams: Any,
+) -> int:
+    """
+    Load CSV rows into an SQLite table.
+
+    Rows are streamed from reader() and inserted with executemany() in batches
+    of batch_size, all inside a single transaction that is rolled back if the
+    load fails. When the connection already has an open transaction the rows
+    are inserted into it and committing is left to the caller.
+
+    The first sample_lines lines are used to sniff the dialect (if not given),
+    to detect a header row (if header is None) and to infer column types.
+    The table is created if it does not exist, with columns from schema, or
+    else named after the header (c1, c2, ... without one) and typed as INTEGER,
+    REAL or TEXT from the sample. Empty fields are stored as NULL.
+
+    :param csvfile: Any iterable of lines accepted by reader().
+    :param conn: An open sqlite3 connection.
+    :param table: Name of the table to load into.
+    :param schema: Optional mapping of column name to SQL type.
+    :param dialect: Dialect name or instance; sniffed from the sample if None.
+    :param header: Whether the first row is a header; sniffed if None.
+    :param batch_size: Number of rows per executemany() call.
+    :param sample_lines: Number of leading lines used for sniffing and type inference.
+    :param tune_pragmas: Relax durability settings (synchronous, journal_mode, ...)
+                         for the duration of the load and restore them afterwards.
+                         SQLite cannot change them inside a transaction, so this
+                         raises ValueError if the connection has one open.
+    :param fmtparams: Dialect overrides, as for reader().
+    :return: The number of rows inserted.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be a positive integer")
+    owns_transaction = not conn.in_transaction
+    if tune_pragmas and not owns_transaction:
+        raise ValueError("tune_pragmas cannot be used inside an open transaction")
+
+    lines = iter(csvfile)
+    sample = list(itertools.islice(lines, sample_lines))
+    sample_text = "".join(sample)
+    sniffer = Sniffer()
+    if dialect is None:
+        try:
+            dialect = sniffer.sniff(sample_text)
+        except Error:
+            dialect = "excel"
+    if header is None:
+        header = sniffer.has_header(sample_text)
+
+    rows = iter(reader(itertools.chain(sample, lines), dialect, **fmtparams))
+    first = next(rows, None)
+    if first is None:
+        return 0
+    if header:
+        sample_rows = list(itertools.islice(rows, max(len(sample) - 1, 0)))
+        names = first
+    else:
+        sample_rows = [first] + list(itertools.islice(rows, len(sample) - 1))
+        names = [f"c{i + 1}" for i in range(len(first))]
+    if schema is None:
+        schema = _infer_schema(names, sample_rows)
+    ncols = len(schema)
+
+    quoted_table = _quote_identifier(table)
+    columns = ", ".join(f"{_quote_identifier(n)} {t}" for n, t in schema.items())
+    placeholders = ", ".join("?" * ncols)
+    insert_sql = f"INSERT INTO {quoted_table} VALUES ({placeholders})"
+
+    saved_pragmas: Dict[str, Any] = {}
+    if tune_pragmas:
+        for name in _BULK_PRAGMAS:
+            saved_pragmas[name] = conn.execute(f"PRAGMA {name}").fetchone()[0]
+        _set_pragmas(conn, _BULK_PRAGMAS)
+
+    count = 0
+    try:
+        if owns_transaction:
+            conn.execute("BEGIN")
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {quoted_table} ({columns})")
+
+        def convert(row: Sequence[str]) -> List[Optional[str]]:
+            if len(row) != ncols:
+                raise Error(f"row {count + 1} has {len(row)} fields, expected {ncols}")
+            return [None if value == "" else value for value in row]
+
+        all_rows = itertools.chain(sample_rows, rows)
+        while True:
+            batch = []
+            for row in itertools.islice(all_rows, batch_size):
+                batch.append(convert(row))
+                count += 1
+            if not batch:
+                break
+            conn.executemany(insert_sql, batch)
+        if owns_transaction:
+            conn.commit()
+    except BaseException:
+        if owns_transaction:
+            conn.rollback()
+        raise
+    finally:
+        if saved_pragmas:
+            _set_pragmas(conn, saved_pragmas)
+    return count
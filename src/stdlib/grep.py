@@ -0,0 +1,124 @@
+"""Search the files of a directory tree for a regular expression."""
+
+import contextlib
+import fnmatch
+import mmap
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Generator, Iterator, List, Set, Tuple, Union
+
+from stdlib import os
+from stdlib.re import CompiledRegex, compile
+
+# A match found by grep(): the file path, the line number (counting from 1)
+# and the (start, end) byte offsets of the match within that line
+GrepMatch = Tuple[str, int, Tuple[int, int]]
+
+
+def grep_file(path: str, pattern: Union[str, CompiledRegex]) -> List[GrepMatch]:
+    """
+    Return the matches of a pattern in one file.
+
+    The file is mmapped and scanned in place, so it is never read into a
+    Python str. The pattern is matched against the whole file rather than
+    line by line: ^ and $ anchor at the start and end of the file, and a
+    match may span lines (its line number is that of its start).
+
+    :param path: The file to search.
+    :param pattern: A pattern or compiled regex.
+    :return: The matches in the order they occur.
+    """
+    regex = compile(pattern) if isinstance(pattern, str) else pattern
+    matches: List[GrepMatch] = []
+    with open(path, "rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty files cannot be mmapped and have no lines
+            return matches
+        # The iterator exports mm until it is closed, which must happen before
+        # mm is closed even when the scan stops with an exception
+        with mm, contextlib.closing(regex.finditer_buffer(mm)) as spans:
+            lineno = 1
+            line_start = 0
+            counted = 0  # newlines before this offset are included in lineno
+            for start, end in spans:
+                if start > counted:
+                    newlines = mm[counted:start].count(b"\n")
+                    if newlines:
+                        lineno += newlines
+                        line_start = mm.rfind(b"\n", counted, start) + 1
+                    counted = start
+                matches.append((path, lineno, (start - line_start, end - line_start)))
+    return matches
+
+
+def _grep_file_or_skip(path: str, regex: CompiledRegex) -> List[GrepMatch]:
+    try:
+        return grep_file(path, regex)
+    except OSError:  # unreadable, or removed since the directory was listed
+        return []
+
+
+def _iter_files(root: str, include_glob: str) -> Iterator[str]:
+    for top, _, files in os.walk(root):
+        for name in files:
+            if fnmatch.fnmatchcase(str(name), include_glob):
+                yield f"{top}/{name}"
+
+
+def grep(
+    root: str,
+    pattern: Union[str, CompiledRegex],
+    include_glob: str = "*",
+    workers: int = 4,
+) -> Generator[GrepMatch, None, None]:
+    """
+    Search every file under root whose name matches include_glob.
+
+    Directories are listed with stdlib.os.walk while a pool of worker threads
+    scans the files found so far with grep_file(). Matching runs in the
+    native library without the GIL, so the threads scan files in parallel.
+    At most 2 * workers files are queued or being scanned at any time, and the
+    matches of each file are yielded as soon as it is done, so results stream
+    back while the tree is still being walked. Files are reported in the
+    order they finish; matches within a file keep their order. Files that
+    cannot be read are skipped.
+
+    :param root: The directory to search.
+    :param pattern: A pattern or compiled regex, see grep_file().
+    :param include_glob: fnmatch pattern that file names must match.
+    :param workers: The number of threads scanning files; 1 scans them one
+                    after the other in the calling thread.
+    :return: An iterator of (path, line number, (start, end)) tuples.
+    """
+    # Not a generator itself, so that a bad workers value fails at the call
+    if workers < 1:
+        raise ValueError("workers must be a positive integer")
+    regex = compile(pattern) if isinstance(pattern, str) else pattern
+    return _grep(root, regex, include_glob, workers)
+
+
+def _grep(
+    root: str, regex: CompiledRegex, include_glob: str, workers: int
+) -> Generator[GrepMatch, None, None]:
+    paths = _iter_files(root, include_glob)
+    if workers == 1:
+        for path in paths:
+            yield from _grep_file_or_skip(path, regex)
+        return
+
+    pool = ThreadPoolExecutor(max_workers=workers)
+    pending: Set["Future[List[GrepMatch]]"] = set()
+    try:
+        for path in paths:
+            pending.add(pool.submit(_grep_file_or_skip, path, regex))
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from future.result()
+    finally:
+        # Closing the iterator early abandons the files not started yet
+        pool.shutdown(wait=True, cancel_futures=True)
@@ -1,15 +1,26 @@
 import ctypes
 import os  # for strerrno
-from typing import Generator, List, Tuple
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Generator, Iterator, List, Optional, Set, Tuple, Union
 
 from stdlib import pathlib
-from stdlib._os_types import libc
+from stdlib._os_types import Stat, libc
 
 # Define the constants for permissions
 S_IRWXU = 0o700
 S_IRWXG = 0o070
 S_IRWXO = 0o007
 
+# Values of dirent.d_type
+DT_UNKNOWN = 0
+DT_FIFO = 1
+DT_CHR = 2
+DT_DIR = 4
+DT_BLK = 6
+DT_REG = 8
+DT_LNK = 10
+DT_SOCK = 12
+
 
 def mkdir(path: str, mode=S_IRWXU | S_IRWXG | S_IRWXO) -> int:
     """
@@ -86,58 +97,235 @@ def rename(src: str, dst: str) -> int:
     return result
 
 
-def listdir(path: pathlib.Path) -> List[pathlib.Path]:
+def listdir(path: Union[str, pathlib.Path]) -> List[pathlib.Path]:
     """
     Return a list of files and directories in the given path.
 
     :param path: The path to the directory to list.
     :return: A list of files and directories.
     """
-    # Convert the path to bytes
-    path_bytes = str(path).encode("utf-8")
-    # Open the directory
-    dir_p = libc.opendir(path_bytes)
-    if dir_p is None:
-        errno = ctypes.get_errno()
-        raise OSError(errno, os.strerror(errno))
-    try:
-        # Read the directory entries
-        entries = []
-        while True:
-            entry_p = libc.readdir(dir_p)
-            if not entry_p:
-                break
-            entry = entry_p.contents
-            entry_name = entry.d_name.decode("utf-8")
-            if entry_name != "." and entry_name != "..":
-                entries.append(pathlib.Path(entry_name))
-    finally:
-        # Close the directory
-        libc.closedir(dir_p)
-    return entries
-
-
-def walk(top: str) -> Generator[Tuple[str, List[str], List[str]], None, None]:
-    """Recursively walk a directory tree using libc."""
-    dirs = []
-    files = []
-
-    # List the directory contents
-    top_path = pathlib.Path(top)
-    for name in listdir(top_path):
-        full_path = top_path / name
-        if full_path.is_dir():
-            dirs.append(name)
+    return [pathlib.Path(name) for name, _ in pathlib.dir_entries(str(path))]
+
+
+class DirEntry:
+    """
+    An entry of a directory, as produced by scandir().
+
+    The file type comes from the d_type field that readdir() returns, so
+    is_dir(), is_file() and is_symlink() need no system call on filesystems
+    that fill it in. Otherwise (DT_UNKNOWN), and to follow a symbolic link,
+    the entry is stat()ed once and the result is cached.
+    """
+
+    __slots__ = ("name", "path", "_d_type", "_stat", "_lstat")
+
+    def __init__(self, dir_path: str, name: str, d_type: int):
+        self.name = name
+        self.path = os.path.join(dir_path, name)
+        self._d_type = d_type
+        self._stat: Optional[Stat] = None
+        self._lstat: Optional[Stat] = None
+
+    def __fspath__(self) -> str:
+        return self.path
+
+    def __repr__(self) -> str:
+        return f"<DirEntry {self.name!r}>"
+
+    def stat(self, follow_symlinks: bool = True) -> Stat:
+        """Return the stat of the entry, cached after the first call."""
+        if not follow_symlinks or self._d_type not in (DT_LNK, DT_UNKNOWN):
+            if self._lstat is None:
+                self._lstat = pathlib.lstat(self.path)
+            if (
+                not follow_symlinks
+                or self._lstat.st_mode & pathlib.S_IFMT != pathlib.S_IFLNK
+            ):
+                return self._lstat
+        if self._stat is None:
+            self._stat = pathlib.stat(self.path)
+        return self._stat
+
+    def is_dir(self, follow_symlinks: bool = True) -> bool:
+        return self._test_type(DT_DIR, pathlib.S_IFDIR, follow_symlinks)
+
+    def is_file(self, follow_symlinks: bool = True) -> bool:
+        return self._test_type(DT_REG, pathlib.S_IFREG, follow_symlinks)
+
+    def is_symlink(self) -> bool:
+        if self._d_type != DT_UNKNOWN:
+            return self._d_type == DT_LNK
+        return self._test_type(DT_LNK, pathlib.S_IFLNK, False)
+
+    def _test_type(self, d_type: int, s_ifmt: int, follow_symlinks: bool) -> bool:
+        if self._d_type != DT_UNKNOWN and not (
+            follow_symlinks and self._d_type == DT_LNK
+        ):
+            return self._d_type == d_type
+        try:
+            mode = self.stat(follow_symlinks).st_mode
+        except OSError:  # removed since it was listed, or a dangling symlink
+            return False
+        return mode & pathlib.S_IFMT == s_ifmt
+
+
+def scandir(path: Union[str, pathlib.Path] = ".") -> Iterator[DirEntry]:
+    """
+    Iterate over the entries of a directory, except "." and "..".
+
+    Unlike listdir(), entries carry their file type, so telling directories
+    from files usually needs no further system calls. See DirEntry. The
+    directory is read in bulk as described in stdlib.pathlib.dir_entries().
+
+    :param path: The path to the directory to list.
+    :return: An iterator of DirEntry objects.
+    """
+    path = str(path)
+    for name, d_type in pathlib.dir_entries(path):
+        yield DirEntry(path, name, d_type)
+
+
+# A directory listed by walk(): its path, subdirectories, other entries and
+# the subdirectories that are symbolic links
+_ScannedDir = Tuple[str, List[str], List[str], Set[str]]
+
+
+def _scan_dir(dirpath: str) -> _ScannedDir:
+    dirs: List[str] = []
+    files: List[str] = []
+    links = set()
+    for entry in scandir(dirpath):
+        if entry.is_dir():
+            dirs.append(entry.name)
+            if entry.is_symlink():
+                links.add(entry.name)
         else:
-            files.append(name)
+            files.append(entry.name)
+    return dirpath, dirs, files, links
+
+
+def _subdirs(scanned: _ScannedDir, followlinks: bool) -> List[str]:
+    # Read after the caller had the chance to prune dirs
+    dirpath, dirs, _, links = scanned
+    return [
+        os.path.join(dirpath, name) for name in dirs if followlinks or name not in links
+    ]
 
-    # Yield the current directory's results
-    yield top, dirs, files
 
-    # Recurse into subdirectories
-    for dir_name in dirs:
-        new_top = top_path / dir_name
-        yield from walk(new_top)
+def walk(
+    top: str,
+    followlinks: bool = False,
+    onerror: Optional[Callable[[OSError], None]] = None,
+    workers: int = 1,
+    ordered: bool = False,
+) -> Generator[Tuple[str, List[str], List[str]], None, None]:
+    """
+    Walk a directory tree top-down, like os.walk.
+
+    Yields a (dirpath, dirnames, filenames) tuple per directory. Entries are
+    classified with scandir(), so regular trees are walked without a stat()
+    per entry. Removing names from dirnames before the walk continues prunes
+    them.
+
+    With workers > 1 directories are listed on a pool of threads. The libc
+    calls release the GIL, so several directories are read at once, which
+    pays off when listing waits on the disk or the network. Subdirectories
+    are submitted once their parent has been yielded, so pruning still works.
+    Directories are yielded as their listing completes unless ordered is set,
+    in which case they come in the same order as with workers=1 while the
+    listings already submitted keep running ahead. At most 2 * workers
+    listings are in flight or waiting to be yielded at any time.
+
+    :param top: The directory to start from.
+    :param followlinks: Descend into symbolic links to directories as well.
+    :param onerror: Called with the OSError of a directory that cannot be
+                    listed; the directory is skipped either way.
+    :param workers: The number of threads listing directories; 1 lists them
+                    one after the other in the calling thread.
+    :param ordered: With workers > 1, yield directories in the order of a
+                    serial walk instead of as they complete.
+    :return: A generator of (dirpath, dirnames, filenames) tuples.
+    """
+    # Not a generator itself, so that a bad workers value fails at the call
+    if workers < 1:
+        raise ValueError("workers must be a positive integer")
+    return _walk(top, followlinks, onerror, workers, ordered)
+
+
+def _walk(
+    top: str,
+    followlinks: bool,
+    onerror: Optional[Callable[[OSError], None]],
+    workers: int,
+    ordered: bool,
+) -> Generator[Tuple[str, List[str], List[str]], None, None]:
+    if workers == 1:
+        stack = [str(top)]
+        while stack:
+            try:
+                scanned = _scan_dir(stack.pop())
+            except OSError as e:
+                if onerror is not None:
+                    onerror(e)
+                continue
+            yield scanned[:3]
+            # Pushed in reverse so that subdirectories are visited in listing order
+            stack.extend(reversed(_subdirs(scanned, followlinks)))
+        return
+
+    # At most this many listings are queued, running or done but not yet
+    # yielded, so memory use follows the number of workers, not the tree size
+    max_in_flight = 2 * workers
+    pool = ThreadPoolExecutor(max_workers=workers)
+    try:
+        if ordered:
+            # The directories left to yield, next one on top, with the future
+            # of their listing once submitted. Listings are submitted from the
+            # top, the order in which they will be needed.
+            to_yield: List[Tuple[str, Optional["Future[_ScannedDir]"]]] = [
+                (str(top), None)
+            ]
+            in_flight = 0
+            while to_yield:
+                for i in range(len(to_yield) - 1, -1, -1):
+                    if in_flight >= max_in_flight:
+                        break
+                    path, future = to_yield[i]
+                    if future is None:
+                        to_yield[i] = (path, pool.submit(_scan_dir, path))
+                        in_flight += 1
+                future = to_yield.pop()[1]
+                assert future is not None  # the top is always submitted
+                in_flight -= 1
+                try:
+                    scanned = future.result()
+                except OSError as e:
+                    if onerror is not None:
+                        onerror(e)
+                    continue
+                yield scanned[:3]
+                to_yield.extend(
+                    (path, None) for path in reversed(_subdirs(scanned, followlinks))
+                )
+        else:
+            waiting = [str(top)]  # not submitted yet; a stack keeps it small
+            pending: Set["Future[_ScannedDir]"] = set()
+            while waiting or pending:
+                while waiting and len(pending) < max_in_flight:
+                    pending.add(pool.submit(_scan_dir, waiting.pop()))
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        scanned = future.result()
+                    except OSError as e:
+                        if onerror is not None:
+                            onerror(e)
+                        continue
+                    yield scanned[:3]
+                    waiting.extend(reversed(_subdirs(scanned, followlinks)))
+    finally:
+        # Closing the generator early abandons the directories not started yet
+        pool.shutdown(wait=True, cancel_futures=True)
 
 
 def chdir(path: str) -> None:
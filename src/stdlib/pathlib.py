@@ -1,8 +1,10 @@
 import ctypes
 import os
-from typing import List, Union
+import struct
+import threading
+from typing import Iterator, List, Tuple, Union
 
-from stdlib._os_types import DIR, Stat, dirent, libc
+from stdlib._os_types import DIR, HAVE_GETDENTS64, Stat, dirent, libc
 
 # Define function prototypes
 libc.opendir.argtypes = [ctypes.c_char_p]
@@ -33,6 +35,7 @@ X_OK = 1  # Check if file is executable
 S_IFMT = 0o170000  # Bitmask for the file type bit field
 S_IFREG = 0o100000  # Regular file
 S_IFDIR = 0o040000  # Directory
+S_IFLNK = 0o120000  # Symbolic link
 
 
 def stat(path: str) -> Stat:
@@ -45,6 +48,99 @@ def stat(path: str) -> Stat:
     return stat_result
 
 
+def lstat(path: str) -> Stat:
+    """Like stat(), but describes a symbolic link itself rather than its target."""
+    stat_result = Stat()
+    path_bytes = path.encode("utf-8")
+
+    if libc.lstat(path_bytes, ctypes.byref(stat_result)) != 0:
+        raise OSError(f"lstat failed for path: {path}")
+
+    return stat_result
+
+
+# Size of the buffer that getdents64() fills with directory entries
+DIRENT_BUFFER_SIZE = 64 * 1024
+
+# struct linux_dirent64 is d_ino (u64), d_off (s64), d_reclen (u16), d_type
+# (u8) and the NUL terminated d_name; only d_reclen and d_type are decoded
+_DIRENT64_RECLEN_TYPE = struct.Struct("=HB")
+_DIRENT64_RECLEN_OFFSET = 16
+_DIRENT64_NAME_OFFSET = 19
+
+# getdents64() buffers, one per thread so that directories can be read in parallel
+_dirent_buffers = threading.local()
+
+
+def _iter_readdir(path: str) -> Iterator[Tuple[str, int]]:
+    dir_p = libc.opendir(path.encode("utf-8"))
+    if not dir_p:
+        errno = ctypes.get_errno()
+        raise OSError(errno, os.strerror(errno), path)
+    try:
+        while True:
+            entry_p = libc.readdir(dir_p)
+            if not entry_p:
+                break
+            entry = entry_p.contents
+            name = entry.d_name.decode("utf-8")
+            if name != "." and name != "..":
+                yield name, entry.d_type
+    finally:
+        libc.closedir(dir_p)
+
+
+def _iter_getdents64(path: str) -> Iterator[Tuple[str, int]]:
+    fd = libc.open(path.encode("utf-8"), os.O_RDONLY | os.O_DIRECTORY | os.O_CLOEXEC)
+    if fd < 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, os.strerror(errno), path)
+    buf = getattr(_dirent_buffers, "buf", None)
+    if buf is None:
+        buf = _dirent_buffers.buf = ctypes.create_string_buffer(DIRENT_BUFFER_SIZE)
+    unpack_reclen_type = _DIRENT64_RECLEN_TYPE.unpack_from
+    try:
+        while True:
+            nread = libc.getdents64(fd, buf, DIRENT_BUFFER_SIZE)
+            if nread == 0:
+                break
+            if nread < 0:
+                errno = ctypes.get_errno()
+                raise OSError(errno, os.strerror(errno), path)
+            # Copy out what was read so that buf can be refilled while the
+            # caller still consumes these entries
+            data = ctypes.string_at(buf, nread)
+            find_nul = data.index
+            pos = 0
+            while pos < nread:
+                reclen, d_type = unpack_reclen_type(data, pos + _DIRENT64_RECLEN_OFFSET)
+                name_start = pos + _DIRENT64_NAME_OFFSET
+                name_end = find_nul(b"\0", name_start)
+                name = data[name_start:name_end].decode("utf-8")
+                if name != "." and name != "..":
+                    yield name, d_type
+                pos += reclen
+    finally:
+        libc.close(fd)
+
+
+def dir_entries(path: str) -> Iterator[Tuple[str, int]]:
+    """
+    Iterate over the (name, d_type) pairs of a directory, except "." and "..".
+
+    On Linux the entries are read with getdents64() into a DIRENT_BUFFER_SIZE
+    buffer, which fetches hundreds of entries per call and decodes them in
+    bulk; elsewhere readdir() is called once per entry. d_type is one of the
+    DT_* constants of stdlib.os and may be DT_UNKNOWN on some filesystems.
+
+    :param path: The path to the directory to read.
+    :return: An iterator of (name, d_type) tuples in directory order.
+    """
+    if HAVE_GETDENTS64:
+        return _iter_getdents64(path)
+    return _iter_readdir(path)
+
+
 class Path:
     def __init__(self, path: Union[str, "Path"]):
         self.path = str(path)
@@ -90,22 +186,13 @@ class Path:
 
     def iterdir(self) -> List["Path"]:
         """Iterate over the contents of a directory."""
-        dir_ptr = libc.opendir(self.path.encode("utf-8"))
-        if not dir_ptr:
-            raise OSError(f"Could not open directory: {self.path}")
-
-        entries = []
-        while True:
-            entry_ptr = libc.readdir(dir_ptr)
-            if not entry_ptr:
-                break
-            entry = entry_ptr.contents
-            name = entry.d_name.decode("utf-8")
-            if name not in (".", ".."):
-                entries.append(Path(os.path.join(self.path, name)))
-
-        libc.closedir(dir_ptr)
-        return entries
+        try:
+            return [
+                Path(os.path.join(self.path, name))
+                for name, _ in dir_entries(self.path)
+            ]
+        except OSError as e:
+            raise OSError(e.errno, f"Could not open directory: {self.path}") from e
 
     def glob(self, pattern: str) -> List["Path"]:
         """Find paths matching a glob pattern."""
@@ -1,4 +1,24 @@
-from typing import cast
+import bisect
+import functools
+import hashlib
+import itertools
+import mmap
+import os
+import tempfile
+import time
+from typing import (
+    Any,
+    Callable,
+    Generator,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+    cast,
+    overload,
+)
 
 import cffi
 
@@ -6,88 +26,948 @@ from stdlib._cffi_util import load_library
 
 # Define the C interface
 interface = """
-    int compile_pattern(const char* pattern);
-    bool match_compiled(int id, const char* text);
-    void release_compiled(int id);
+    typedef struct CompiledPattern CompiledPattern;
+    typedef struct CompiledSet CompiledSet;
+    CompiledPattern* compile_pattern(const char* pattern);
+    int match_compiled(CompiledPattern* re, const char* text, size_t len, int64_t* steps,
+                       double timeout);
+    void release_compiled(CompiledPattern* re);
+    bool optimize_compiled(CompiledPattern* re);
+    int compiled_format_version(void);
+    size_t serialize_compiled(CompiledPattern* re, const char* pattern, char* out, size_t cap);
+    CompiledPattern* load_compiled(const char* data, size_t len, const char* pattern);
     bool match(const char* pattern, const char* text);
-    const char* search_pattern(int id, const char* text);
-    char** findall_pattern(int id, const char* text);
-    void free_matches(char** matches);
-    const char* substitute_pattern(int id, const char* text, const char* replacement);
+    int pattern_groups(CompiledPattern* re);
+    int search_spans(CompiledPattern* re, const char* text, size_t len, size_t pos, int64_t* spans,
+                     int64_t* steps, double timeout);
+    int findall_spans(CompiledPattern* re, const char* text, size_t len, size_t* pos,
+                      int64_t* spans, int max_matches, bool with_groups,
+                      int64_t* steps, double timeout);
+    int substitute_pattern(CompiledPattern* re, const char* text, size_t len,
+                           const char* replacement, char** out, size_t* out_len);
+    int match_many(CompiledPattern* re, const char* data, const size_t* offsets, size_t n,
+                   uint8_t* results);
+    int search_many(CompiledPattern* re, const char* data, const size_t* offsets, size_t n,
+                    int64_t* spans);
+    int sub_many(CompiledPattern* re, const char* data, const size_t* offsets, size_t n,
+                 const char* replacement, size_t* out_offsets, char** out);
+    CompiledSet* compile_set(const char* const* patterns, size_t n, int* error_index);
+    int set_matches(CompiledSet* set, const char* text, size_t len, uint8_t* results);
+    void release_set(CompiledSet* set);
     void free(void *ptr);
 """
 
-# Load the shared library
+# Load the shared library. cffi releases the GIL for the duration of every
+# call into it and compiled patterns are safe to share between threads, so
+# matching in a thread pool runs on all cores. Compiled patterns and sets are
+# opaque native pointers, released by ffi.gc when their Python owner is
+# collected.
 ffi = cffi.FFI()
 lib = load_library("regex_wrapper", interface)
 
 
-def match(pattern: str, text: str) -> bool:
-    return lib.match(  # pyright: ignore [reportAttributeAccessIssue]
-        pattern.encode("utf-8"), text.encode("utf-8")
-    )
+# Maximum number of patterns kept compiled by the module-level functions
+_MAXCACHE = 512
 
+# Number of matches fetched per findall_spans() call
+_FINDALL_BATCH = 256
 
-# Python wrapper class
-class CompiledRegex:
-    def __init__(self, pattern):
-        self.id = lib.compile_pattern(pattern.encode("utf-8"))  # type: ignore
-        if self.id == -1:
-            raise ValueError("Invalid regex pattern")
-
-    def match(self, text):
-        return lib.match_compiled(self.id, text.encode("utf-8"))  # type: ignore
-
-    def __del__(self):
-        lib.release_compiled(self.id)  # type: ignore
-
-    def search(self, text: str) -> str | None:
-        # Search for the compiled regex in the text
-        result = lib.search_pattern(self.id, text.encode("utf-8"))  # type: ignore
-        if result:
-            ptr = result
-            try:
-                result_bytes = cast(bytes, ffi.string(result))
-                return result_bytes.decode("utf-8")
-            finally:
-                lib.free(ptr)  # type: ignore[attr-defined]
+# Returned by the native functions taking a step budget when it runs out
+_BUDGET_EXCEEDED = -2
+# Returned by the native matching functions when backtracking would overflow the stack
+_STACK_EXHAUSTED = -3
+
+
+class RegexTimeoutError(TimeoutError):
+    """Raised when matching exceeds its step budget or timeout."""
+
+
+class RegexRecursionError(RecursionError):
+    """
+    Raised when a backtracking match would overflow the native stack.
+
+    std::regex, which runs the patterns the native engine does not support,
+    recurses about once per character it consumes, so such patterns can
+    only be matched against inputs up to a length that depends on the
+    pattern and on the stack size of the calling thread.
+    """
+
+
+def _check(result: int) -> int:
+    """Raise the error a native result code stands for, or return the result."""
+    if result == _BUDGET_EXCEEDED:
+        raise RegexTimeoutError("regex step budget or timeout exceeded")
+    if result == _STACK_EXHAUSTED:
+        raise RegexRecursionError("input too long for a backtracking match")
+    return result
+
+
+class _Budget:
+    """
+    The step budget and timeout of one matching call.
+
+    Shared by every native call the operation makes (findall fetches matches
+    in batches), so the limits apply to the operation as a whole. Only time
+    spent matching counts against the timeout.
+    """
+
+    __slots__ = ("steps", "_timeout")
+
+    def __init__(self, max_steps: Optional[int], timeout: Optional[float]):
+        self.steps = ffi.NULL if max_steps is None else ffi.new("int64_t *", max_steps)
+        self._timeout = -1.0 if timeout is None else max(timeout, 0.0)
+
+    def call(self, func: Callable[..., int], *args: Any) -> int:
+        """Call a native function with args plus the budget and return its result."""
+        if self._timeout < 0:
+            result = func(*args, self.steps, -1.0)
+        else:
+            start = time.monotonic()
+            result = func(*args, self.steps, self._timeout)
+            self._timeout = max(self._timeout - (time.monotonic() - start), 0.0)
+        return _check(result)
+
+
+class EncodedText:
+    """
+    A text together with its UTF-8 encoding, for matching against many patterns.
+
+    CompiledRegex methods encode str arguments on every call; passing an
+    EncodedText instead encodes the text once. Conversions between byte
+    offsets and str indices are remembered, so converting an offset only
+    decodes the bytes after the nearest offset converted before.
+
+    bytes-like texts (bytes, bytearray, memoryview) are taken as already
+    encoded: offsets and indices are the same and matches are returned as bytes.
+
+    :param text: A str, or the bytes to match as they are.
+    """
+
+    __slots__ = ("text", "data", "_ascii", "_offsets", "_indices")
+
+    def __init__(self, text: Union[str, bytes, bytearray, memoryview]):
+        self.text: Union[str, bytes]
+        if isinstance(text, str):
+            self.text = text
+            self.data = text.encode("utf-8")
+            self._ascii = len(self.data) == len(text)
+        else:
+            self.text = self.data = bytes(text)
+            self._ascii = True
+        # Known (byte offset, str index) pairs, both ascending
+        self._offsets = [0]
+        self._indices = [0]
+
+    def char_index(self, offset: int) -> int:
+        """Return the str index of a byte offset, which must start a character."""
+        if self._ascii or offset < 0:
+            return offset
+        k = bisect.bisect_right(self._offsets, offset) - 1
+        known = self._offsets[k]
+        if known == offset:
+            return self._indices[k]
+        index = self._indices[k] + len(self.data[known:offset].decode("utf-8"))
+        self._offsets.insert(k + 1, offset)
+        self._indices.insert(k + 1, index)
+        return index
+
+    def byte_index(self, index: int) -> int:
+        """Return the byte offset of a str index."""
+        if self._ascii:
+            return index
+        k = bisect.bisect_right(self._indices, index) - 1
+        known = self._indices[k]
+        if known == index:
+            return self._offsets[k]
+        text = cast(str, self.text)
+        offset = self._offsets[k] + len(text[known:index].encode("utf-8"))
+        self._offsets.insert(k + 1, offset)
+        self._indices.insert(k + 1, index)
+        return offset
+
+    def slice(self, start: int, end: int) -> Any:
+        """Return the text between two byte offsets, as str or bytes like text."""
+        if self._ascii:
+            return self.text[start:end]
+        return self.data[start:end].decode("utf-8")
+
+
+# Anything CompiledRegex methods accept as the text to match
+TextLike = Union[str, bytes, bytearray, memoryview, EncodedText]
+
+
+def _encode(text: TextLike) -> EncodedText:
+    return text if isinstance(text, EncodedText) else EncodedText(text)
+
+
+def _pack(texts: Sequence[str]) -> Tuple[bytes, List[int], bool]:
+    """
+    Encode texts into one UTF-8 buffer for the native *_many functions.
+
+    :return: The buffer, the len(texts) + 1 byte offsets delimiting each text,
+             and whether the buffer is pure ASCII.
+    """
+    data = "".join(texts).encode("utf-8")
+    lengths = [len(t) for t in texts]
+    ascii = len(data) == sum(lengths)
+    if not ascii:
+        lengths = [len(t.encode("utf-8")) for t in texts]
+    return data, [0] + list(itertools.accumulate(lengths)), ascii
+
+
+# Characters with a special meaning in a pattern. A pattern without them,
+# other than escaped, matches itself.
+_SPECIAL_CHARS = frozenset("\\^$.|?*+()[]{}")
+
+
+def _split_alternatives(pattern: str) -> Optional[List[str]]:
+    """
+    Split a pattern consisting of plain literals at its | operators.
+
+    :return: The literal strings, or None if any of them contains a special
+             character or escape sequence.
+    """
+    alternatives = []
+    chars: List[str] = []
+    escaped = False
+    for c in pattern:
+        if escaped:
+            if c not in _SPECIAL_CHARS and c not in "/-":
+                return None  # \d, \n, \b, ...
+            chars.append(c)
+            escaped = False
+        elif c == "\\":
+            escaped = True
+        elif c == "|":
+            alternatives.append("".join(chars))
+            chars = []
+        elif c in _SPECIAL_CHARS:
+            return None
+        else:
+            chars.append(c)
+    if escaped:
         return None
+    alternatives.append("".join(chars))
+    return alternatives
+
+
+class _LiteralMatcher:
+    """
+    Matches literal patterns with str methods instead of the native engine.
+
+    Handles a literal, a literal anchored at the start (^lit), the end (lit$)
+    or both, and an unanchored alternation of literals (a|b|c), which covers
+    many patterns in practice and saves the encoding and the native call.
+    Matching a str is equivalent to matching its UTF-8 encoding byte by byte,
+    as UTF-8 sequences never start inside another character. Results are str
+    indices.
+    """
+
+    __slots__ = ("alternatives", "_set", "anchor_start", "anchor_end")
+
+    def __init__(self, alternatives: List[str], anchor_start: bool, anchor_end: bool):
+        self.alternatives = alternatives
+        self._set = frozenset(alternatives)
+        self.anchor_start = anchor_start
+        self.anchor_end = anchor_end
+
+    @classmethod
+    def parse(cls, pattern: str) -> Optional["_LiteralMatcher"]:
+        anchor_start = pattern.startswith("^")
+        body = pattern[1:] if anchor_start else pattern
+        anchor_end = body.endswith("$") and not body.endswith("\\$")
+        if anchor_end:
+            body = body[:-1]
+        alternatives = _split_alternatives(body)
+        if not alternatives or "" in alternatives:
+            return None  # empty matches advance differently; leave them to the engine
+        if len(alternatives) > 1 and (anchor_start or anchor_end):
+            return None  # ^a|b anchors only its first alternative
+        return cls(alternatives, anchor_start, anchor_end)
+
+    def full_match(self, text: str) -> bool:
+        return text in self._set
+
+    def search(self, text: str, pos: int = 0) -> Optional[Tuple[int, int]]:
+        """Return the span of the leftmost-first match at or after pos, or None."""
+        if self.anchor_start or self.anchor_end:
+            literal = self.alternatives[0]
+            if self.anchor_start:
+                found = pos == 0 and (
+                    text == literal if self.anchor_end else text.startswith(literal)
+                )
+                start = 0
+            else:
+                start = len(text) - len(literal)
+                found = start >= pos and text.endswith(literal)
+            return (start, start + len(literal)) if found else None
+        best = None
+        for literal in self.alternatives:
+            start = text.find(literal, pos)
+            if start >= 0 and (best is None or start < best[0]):
+                best = (start, start + len(literal))
+        return best
 
-    def findall(self, text: str) -> list[str]:
-        # Find all matches of the compiled regex in the text
-        matches_ptr = lib.findall_pattern(self.id, text.encode("utf-8"))  # type: ignore
+    def findall(self, text: str) -> List[str]:
+        if self.anchor_start or self.anchor_end:
+            span = self.search(text)
+            return [] if span is None else [self.alternatives[0]]
+        # Remember where each alternative occurs next so that a rare one is
+        # not searched for again after every match of the others
+        alternatives = self.alternatives
+        positions = [text.find(literal) for literal in alternatives]
         matches = []
-        if matches_ptr:
+        pos = 0
+        while True:
+            best = -1
+            for k, literal in enumerate(alternatives):
+                if 0 <= positions[k] < pos:
+                    positions[k] = text.find(literal, pos)
+                if positions[k] >= 0 and (best < 0 or positions[k] < positions[best]):
+                    best = k
+            if best < 0:
+                return matches
+            matches.append(alternatives[best])
+            pos = positions[best] + len(alternatives[best])
+
+
+class Match:
+    """
+    The result of a successful search.
+
+    Holds the byte offsets reported by the native library; group strings and
+    str indices are computed from the original text only when asked for.
+    """
+
+    def __init__(self, regex: "CompiledRegex", encoded: EncodedText, spans: List[int]):
+        self.re = regex
+        self._encoded = encoded
+        self._spans = spans
+
+    @property
+    def string(self) -> Any:
+        return self._encoded.text
+
+    def span(self, group: int = 0) -> Tuple[int, int]:
+        """
+        Return the (start, end) indices of a group, (-1, -1) if it did not match.
+
+        :param group: The group number, 0 for the whole match.
+        :return: A tuple of str indices into string.
+        """
+        self._check_group(group)
+        return (
+            self._encoded.char_index(self._spans[2 * group]),
+            self._encoded.char_index(self._spans[2 * group + 1]),
+        )
+
+    def start(self, group: int = 0) -> int:
+        return self.span(group)[0]
+
+    def end(self, group: int = 0) -> int:
+        return self.span(group)[1]
+
+    @overload
+    def group(self, group: int = 0, /) -> Optional[str]: ...
+
+    @overload
+    def group(
+        self, group1: int, group2: int, /, *groups: int
+    ) -> Tuple[Optional[str], ...]: ...
+
+    def group(self, *groups: int) -> Union[Optional[str], Tuple[Optional[str], ...]]:
+        """
+        Return one or more groups of the match.
+
+        :param groups: Group numbers; with none, the whole match is returned.
+        :return: The matched substring (None for a group that did not match),
+                 or a tuple of them if several groups are given.
+        """
+        if len(groups) <= 1:
+            return self._group(groups[0] if groups else 0)
+        return tuple(self._group(g) for g in groups)
+
+    def groups(self, default: Optional[str] = None) -> Tuple[Optional[str], ...]:
+        """
+        Return all capture groups.
+
+        :param default: The value used for groups that did not match.
+        :return: A tuple with one entry per capture group.
+        """
+        values = (self._group(g) for g in range(1, len(self._spans) // 2))
+        return tuple(default if v is None else v for v in values)
+
+    def __getitem__(self, group: int) -> Optional[str]:
+        return self._group(group)
+
+    def __repr__(self) -> str:
+        return (
+            f"<stdlib.re.Match object; span={self.span()!r}, match={self._group(0)!r}>"
+        )
+
+    def _group(self, group: int) -> Optional[str]:
+        self._check_group(group)
+        start, end = self._spans[2 * group], self._spans[2 * group + 1]
+        if start < 0:
+            return None
+        return self._encoded.slice(start, end)
+
+    def _check_group(self, group: int) -> None:
+        if not isinstance(group, int) or not 0 <= group < len(self._spans) // 2:
+            raise IndexError("no such group")
+
+
+def _cache_path(pattern: str, cache_dir: Union[str, "os.PathLike[str]"]) -> str:
+    """Return the file caching the compiled form of pattern, keyed by its hash and the format version."""
+    digest = hashlib.sha256(pattern.encode("utf-8")).hexdigest()
+    version = lib.compiled_format_version()  # type: ignore
+    return os.path.join(cache_dir, f"{digest}.v{version}.rx")
+
+
+def _load_cached(pattern: bytes, path: str) -> Any:
+    """Return the native pattern stored at path, or None if it is missing or unusable."""
+    try:
+        with (
+            open(path, "rb") as f,
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm,
+        ):
+            data = ffi.from_buffer(mm)
             try:
-                # Convert the array of C strings to a Python list
-                i = 0
-                while matches_ptr[i]:
-                    matches.append(
-                        cast(bytes, ffi.string(matches_ptr[i])).decode("utf-8")
-                    )
-                    i += 1
+                handle = lib.load_compiled(data, len(data), pattern)  # type: ignore
             finally:
-                # Free the allocated memory
-                lib.free_matches(matches_ptr)  # type: ignore[attr-defined]
-        return matches
-
-    def sub(self, replacement: str, text: str) -> str:
-        # Substitute all occurrences of the compiled regex in the text
-        result = lib.substitute_pattern(  # type: ignore
-            self.id, text.encode("utf-8"), replacement.encode("utf-8")
+                ffi.release(data)
+    except (OSError, ValueError):
+        return None
+    return None if handle == ffi.NULL else handle
+
+
+def _store_cached(handle: Any, pattern: bytes, path: str) -> None:
+    """Write the native pattern to path, if it can be serialized. Failures are ignored."""
+    size = lib.serialize_compiled(handle, pattern, ffi.NULL, 0)  # type: ignore
+    if size == 0:
+        return
+    buf = ffi.new("char[]", size)
+    lib.serialize_compiled(handle, pattern, buf, size)  # type: ignore
+    directory = os.path.dirname(path)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        # Write to a temporary file first so that readers never see a partial file
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(ffi.buffer(buf, size))
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+    except OSError:
+        pass  # the cache only saves time
+
+
+# Python wrapper class
+class CompiledRegex:
+    """
+    A compiled pattern.
+
+    Patterns the native engine cannot run in linear time (backreferences,
+    lookahead) are matched by backtracking, which can take time exponential
+    in the length of the text. max_steps bounds the number of character
+    advances such a match may make, backtracking included, and timeout the
+    seconds match(), search(), findall() and the other scanning methods may
+    take; RegexTimeoutError is raised when either is exceeded. Both can be
+    overridden per call. Backtracking also recurses about once per character,
+    so on inputs too long for the stack of the calling thread it stops with
+    RegexRecursionError instead, whatever the limits; max_steps does not bound
+    the recursion depth.
+
+    With cache_dir, the compiled automaton is saved to a file in that
+    directory, named after a hash of the pattern and the version of the
+    native format, and later compilations of the same pattern memory-map it
+    instead of compiling again. Patterns that need std::regex are not cached.
+
+    :param pattern: The pattern, in ECMAScript syntax.
+    :param max_steps: Default step budget of every call, None for no limit.
+    :param timeout: Default timeout of every call in seconds, None for no limit.
+    :param cache_dir: Directory of compiled automata shared between processes.
+    :param optimize: Build the complete DFA of the pattern up front as one flat
+                     transition table, which makes match() a table lookup per
+                     byte. Costs compile time and up to a few MiB of memory;
+                     optimized says whether the pattern allowed it.
+    """
+
+    def __init__(
+        self,
+        pattern: str,
+        max_steps: Optional[int] = None,
+        timeout: Optional[float] = None,
+        cache_dir: Optional[Union[str, "os.PathLike[str]"]] = None,
+        optimize: bool = False,
+    ):
+        encoded = pattern.encode("utf-8")
+        path = None if cache_dir is None else _cache_path(pattern, cache_dir)
+        handle = None if path is None else _load_cached(encoded, path)
+        if handle is None:
+            handle = lib.compile_pattern(encoded)  # type: ignore
+            if handle == ffi.NULL:
+                raise ValueError("Invalid regex pattern")
+            if path is not None:
+                _store_cached(handle, encoded, path)
+        self._handle = ffi.gc(handle, lib.release_compiled)  # type: ignore
+        self.optimized = optimize and bool(lib.optimize_compiled(self._handle))  # type: ignore
+        self.pattern = pattern
+        self.groups = lib.pattern_groups(self._handle)  # type: ignore
+        self.max_steps = max_steps
+        self.timeout = timeout
+        self._literal = _LiteralMatcher.parse(pattern)
+
+    def _budget(self, max_steps: Optional[int], timeout: Optional[float]) -> _Budget:
+        return _Budget(
+            self.max_steps if max_steps is None else max_steps,
+            self.timeout if timeout is None else timeout,
         )
-        if result:
-            ptr = result
+
+    def match(
+        self,
+        text: TextLike,
+        *,
+        max_steps: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ) -> bool:
+        if isinstance(text, str):
+            if self._literal is not None:
+                return self._literal.full_match(text)
+            data = text.encode("utf-8")
+        else:
+            data = _encode(text).data
+        if (
+            max_steps is None
+            and timeout is None
+            and self.max_steps is None
+            and self.timeout is None
+        ):
+            # No budget to enforce: skip _Budget for the common case
+            return _check(lib.match_compiled(self._handle, data, len(data), ffi.NULL, -1.0)) == 1  # type: ignore
+        budget = self._budget(max_steps, timeout)
+        return budget.call(lib.match_compiled, self._handle, data, len(data)) == 1  # type: ignore
+
+    def search_match(
+        self,
+        text: TextLike,
+        pos: int = 0,
+        *,
+        max_steps: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ) -> Optional[Match]:
+        """
+        Search text for the first match starting at or after index pos.
+
+        :param text: The string to search, an EncodedText or bytes.
+        :param pos: The index in text where the search starts.
+        :param max_steps: Step budget overriding the pattern's.
+        :param timeout: Timeout in seconds overriding the pattern's.
+        :return: A Match with the spans of the match and its groups, or None.
+        """
+        encoded = _encode(text)
+        if self._literal is not None and isinstance(encoded.text, str):
+            span = self._literal.search(encoded.text, pos)
+            if span is None:
+                return None
+            return Match(self, encoded, [encoded.byte_index(i) for i in span])
+        spans = ffi.new("int64_t[]", 2 * (self.groups + 1))
+        start = encoded.byte_index(pos)
+        found = self._budget(max_steps, timeout).call(
+            lib.search_spans, self._handle, encoded.data, len(encoded.data), start, spans  # type: ignore
+        )
+        if found != 1:
+            return None
+        return Match(self, encoded, list(spans))
+
+    def search(
+        self,
+        text: TextLike,
+        *,
+        max_steps: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ) -> Any:
+        # Search for the compiled regex in the text; bytes in, bytes out
+        if self._literal is not None and isinstance(text, str):
+            span = self._literal.search(text)
+            if span is None:
+                return None
+            start, end = span
+            return text[start:end]
+        m = self.search_match(text, max_steps=max_steps, timeout=timeout)
+        return None if m is None else m.group()
+
+    def findall(
+        self,
+        text: TextLike,
+        *,
+        max_steps: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ) -> List[Any]:
+        # Find all matches of the compiled regex in the text; bytes in, bytes out
+        if self._literal is not None and isinstance(text, str):
+            return self._literal.findall(text)
+        encoded = _encode(text)
+        budget = self._budget(max_steps, timeout)
+        spans = self._iter_spans(
+            encoded.data, len(encoded.data), False, _FINDALL_BATCH, budget
+        )
+        return [encoded.slice(start, end) for start, end in spans]
+
+    def finditer(
+        self,
+        text: TextLike,
+        batch_size: int = _FINDALL_BATCH,
+        *,
+        max_steps: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ) -> Iterator[Match]:
+        """
+        Iterate over the non-overlapping matches in text.
+
+        Matches are fetched from the native library batch_size at a time,
+        resuming where the previous batch ended, so memory use does not grow
+        with the number of matches and stopping early skips the rest of the scan.
+
+        :param text: The string to search, an EncodedText or bytes.
+        :param batch_size: The number of matches fetched per native call.
+        :param max_steps: Step budget overriding the pattern's.
+        :param timeout: Timeout in seconds overriding the pattern's, counting
+                        only time spent matching.
+        :return: An iterator of Match objects.
+        """
+        # Not a generator itself, so that a bad batch_size fails at the call
+        if batch_size < 1:
+            raise ValueError("batch_size must be a positive integer")
+        return self._finditer(text, batch_size, max_steps, timeout)
+
+    def _finditer(
+        self,
+        text: TextLike,
+        batch_size: int,
+        max_steps: Optional[int],
+        timeout: Optional[float],
+    ) -> Iterator[Match]:
+        encoded = _encode(text)
+        data = encoded.data
+        budget = self._budget(max_steps, timeout)
+        for spans in self._iter_spans(data, len(data), True, batch_size, budget):
+            yield Match(self, encoded, spans)
+
+    def search_file(
+        self, path: Union[str, "os.PathLike[str]"]
+    ) -> Optional[Tuple[int, int]]:
+        """
+        Search a file for the first match without reading it into memory.
+
+        The file is mmapped and scanned in place as UTF-8 (or any ASCII
+        compatible encoding).
+
+        :param path: The path of the file to search.
+        :return: The (start, end) byte offsets of the match, or None.
+        """
+        with open(path, "rb") as f:
             try:
-                result_bytes = cast(bytes, ffi.string(result))
-                return result_bytes.decode("utf-8")
-            finally:
-                lib.free(ptr)  # type: ignore[attr-defined]
-        return text  # Return the original text if substitution fails
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # empty files cannot be mmapped
+                return self._search_buffer(b"")
+            with mm:
+                return self._search_buffer(mm)
+
+    def finditer_buffer(
+        self, buffer: Any, batch_size: int = _FINDALL_BATCH
+    ) -> Generator[Tuple[int, int], None, None]:
+        """
+        Iterate over the matches in a bytes-like object without copying it.
+
+        Works with anything supporting the buffer protocol, such as bytes,
+        bytearray, memoryview or mmap. The buffer stays exported, and so must
+        not be resized or closed, until the iterator is exhausted or closed.
+
+        :param buffer: The bytes to search.
+        :param batch_size: The number of matches fetched per native call.
+        :return: An iterator of (start, end) byte offsets.
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be a positive integer")
+        return self._finditer_buffer(buffer, batch_size)
+
+    def _finditer_buffer(
+        self, buffer: Any, batch_size: int
+    ) -> Generator[Tuple[int, int], None, None]:
+        data = ffi.from_buffer(buffer)
+        try:
+            budget = self._budget(None, None)
+            for start, end in self._iter_spans(
+                data, len(data), False, batch_size, budget
+            ):
+                yield start, end
+        finally:
+            ffi.release(data)
+
+    def _search_buffer(self, buffer: Any) -> Optional[Tuple[int, int]]:
+        data = ffi.from_buffer(buffer)
+        try:
+            spans = ffi.new("int64_t[]", 2 * (self.groups + 1))
+            found = self._budget(None, None).call(
+                lib.search_spans, self._handle, data, len(data), 0, spans  # type: ignore
+            )
+        finally:
+            ffi.release(data)
+        return (spans[0], spans[1]) if found == 1 else None
+
+    def _iter_spans(
+        self, data: Any, size: int, with_groups: bool, batch_size: int, budget: _Budget
+    ) -> Iterator[List[int]]:
+        stride = 2 * (self.groups + 1) if with_groups else 2
+        pos = ffi.new("size_t *", 0)
+        buf = ffi.new("int64_t[]", stride * batch_size)
+        while pos[0] <= size:
+            count = budget.call(
+                lib.findall_spans, self._handle, data, size, pos, buf, batch_size, with_groups  # type: ignore
+            )
+            spans = cast(List[int], ffi.unpack(buf, stride * max(count, 0)))
+            for start in range(0, len(spans), stride):
+                end = start + stride
+                yield spans[start:end]
+            if count < batch_size:
+                break
+
+    def sub(self, replacement: Union[str, Callable[[Match], str]], text: str) -> str:
+        """
+        Replace every match in text.
+
+        :param replacement: A replacement format, which may refer to the match
+                            as $& and to groups as $1, $2, ..., or a function
+                            called with each Match that returns its replacement.
+        :param text: The string to substitute in.
+        :return: The text with all matches replaced.
+        """
+        if callable(replacement):
+            encoded = EncodedText(text)
+            data = encoded.data
+            pieces = []
+            last = 0
+            for spans in self._iter_spans(
+                data, len(data), True, _FINDALL_BATCH, self._budget(None, None)
+            ):
+                pieces.append(encoded.slice(last, spans[0]))
+                pieces.append(replacement(Match(self, encoded, spans)))
+                last = spans[1]
+            pieces.append(encoded.slice(last, len(data)))
+            return "".join(pieces)
+
+        data = text.encode("utf-8")
+        out = ffi.new("char **")
+        out_len = ffi.new("size_t *")
+        status = lib.substitute_pattern(  # type: ignore
+            self._handle, data, len(data), replacement.encode("utf-8"), out, out_len
+        )
+        if _check(status) != 0:
+            raise RuntimeError("regex substitution failed")
+        result = out[0]
+        try:
+            result_bytes = cast(bytes, ffi.unpack(result, out_len[0]))
+            return result_bytes.decode("utf-8")
+        finally:
+            lib.free(result)  # type: ignore[attr-defined]
+
+    def split(self, text: str, maxsplit: int = 0) -> List[Optional[str]]:
+        """
+        Split text at the matches.
+
+        If the pattern has capture groups, their text (None for groups that
+        did not participate) is included in the result after each piece.
+
+        :param text: The string to split.
+        :param maxsplit: The maximum number of splits; 0 means no limit.
+        :return: The list of pieces.
+        """
+        encoded = EncodedText(text)
+        data = encoded.data
+        batch_size = maxsplit if 0 < maxsplit < _FINDALL_BATCH else _FINDALL_BATCH
+        matches = self._iter_spans(
+            data, len(data), self.groups > 0, batch_size, self._budget(None, None)
+        )
+        if maxsplit > 0:
+            matches = itertools.islice(matches, maxsplit)
+        pieces: List[Optional[str]] = []
+        last = 0
+        for spans in matches:
+            pieces.append(encoded.slice(last, spans[0]))
+            for start, end in zip(spans[2::2], spans[3::2]):
+                pieces.append(None if start < 0 else encoded.slice(start, end))
+            last = spans[1]
+        pieces.append(encoded.slice(last, len(data)))
+        return pieces
+
+    def match_many(self, texts: Sequence[str]) -> List[bool]:
+        """
+        Full match every string in texts with a single native call.
+
+        :param texts: The strings to match.
+        :return: A list with one bool per string.
+        """
+        data, offsets, _ = _pack(texts)
+        results = ffi.new("uint8_t[]", len(texts))
+        _check(lib.match_many(self._handle, data, offsets, len(texts), results))  # type: ignore
+        return [bool(r) for r in ffi.unpack(results, len(texts))]
+
+    def search_many(self, texts: Sequence[str]) -> List[Optional[str]]:
+        """
+        Search every string in texts with a single native call.
+
+        :param texts: The strings to search.
+        :return: A list with the first match in each string, or None.
+        """
+        data, offsets, ascii = _pack(texts)
+        spans = ffi.new("int64_t[]", 2 * len(texts))
+        _check(lib.search_many(self._handle, data, offsets, len(texts), spans))  # type: ignore
+        flat = cast(List[int], ffi.unpack(spans, 2 * len(texts)))
+        results: List[Optional[str]] = []
+        for i, text in enumerate(texts):
+            start, end = flat[2 * i], flat[2 * i + 1]
+            if start < 0:
+                results.append(None)
+            elif ascii:
+                results.append(text[start:end])
+            else:
+                start, end = start + offsets[i], end + offsets[i]
+                results.append(data[start:end].decode("utf-8"))
+        return results
+
+    def sub_many(self, replacement: str, texts: Sequence[str]) -> List[str]:
+        """
+        Substitute all matches in every string in texts with a single native call.
+
+        :param replacement: The replacement format, as for sub().
+        :param texts: The strings to substitute in.
+        :return: A list with the result for each string.
+        """
+        data, offsets, _ = _pack(texts)
+        out_offsets = ffi.new("size_t[]", len(texts) + 1)
+        out = ffi.new("char **")
+        status = lib.sub_many(  # type: ignore
+            self._handle,
+            data,
+            offsets,
+            len(texts),
+            replacement.encode("utf-8"),
+            out_offsets,
+            out,
+        )
+        if _check(status) != 0:
+            raise RuntimeError("regex substitution failed")
+        result = out[0]
+        try:
+            ends = cast(List[int], ffi.unpack(out_offsets, len(texts) + 1))
+            buf = cast(bytes, ffi.unpack(result, ends[-1]))
+        finally:
+            lib.free(result)  # type: ignore[attr-defined]
+        return [buf[start:end].decode("utf-8") for start, end in zip(ends, ends[1:])]
+
+
+class RegexSet:
+    """
+    A set of patterns matched against a text together.
+
+    Literal patterns are found with an Aho-Corasick automaton and most other
+    patterns are combined into a single automaton, so checking a text against
+    hundreds of patterns takes one native call and at most two passes over
+    the text instead of one search per pattern.
+    """
+
+    def __init__(self, patterns: Sequence[str]):
+        self.patterns = list(patterns)
+        encoded = [ffi.new("char[]", p.encode("utf-8")) for p in self.patterns]
+        error_index = ffi.new("int *", -1)
+        handle = lib.compile_set(encoded, len(encoded), error_index)  # type: ignore
+        if handle == ffi.NULL:
+            raise ValueError(
+                f"Invalid regex pattern: {self.patterns[error_index[0]]!r}"
+            )
+        self._handle = ffi.gc(handle, lib.release_set)  # type: ignore
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def matches(self, text: str) -> List[int]:
+        """
+        Return the indices of the patterns that match somewhere in text.
+
+        :param text: The string to search.
+        :return: A sorted list of indices into patterns.
+        """
+        data = text.encode("utf-8")
+        results = ffi.new("uint8_t[]", len(self.patterns))
+        _check(lib.set_matches(self._handle, data, len(data), results))  # type: ignore
+        return [i for i, r in enumerate(ffi.unpack(results, len(results))) if r]
+
+    def is_match(self, text: str) -> bool:
+        """Return whether any pattern matches somewhere in text."""
+        return bool(self.matches(text))
+
+
+@functools.lru_cache(maxsize=_MAXCACHE)
+def _compile(pattern: str, optimize: bool = False) -> CompiledRegex:
+    return CompiledRegex(pattern, optimize=optimize)
+
+
+def compile(pattern: str, optimize: bool = False) -> CompiledRegex:
+    """
+    Compile a pattern, reusing a recently compiled one for the same pattern.
+
+    The module-level functions share an LRU cache of the last 512 compiled
+    patterns, so calling them repeatedly with the same pattern only compiles
+    it once. See cache_info() and purge().
+
+    :param pattern: The regular expression.
+    :param optimize: Build a flat DFA for fast full matching, see CompiledRegex.
+                     Optimized and plain compilations are cached separately.
+    :return: The compiled pattern.
+    """
+    return _compile(pattern, optimize)
+
+
+def purge() -> None:
+    """Clear the cache of compiled patterns."""
+    _compile.cache_clear()
+
+
+def cache_info() -> "functools._CacheInfo":
+    """
+    Return statistics of the compiled pattern cache.
+
+    :return: A named tuple of hits, misses, maxsize and currsize.
+    """
+    return _compile.cache_info()
+
+
+def match(pattern: str, text: str) -> bool:
+    try:
+        return compile(pattern).match(text)
+    except ValueError:
+        return False
+
+
+def search(pattern: str, text: str) -> Optional[str]:
+    return compile(pattern).search(text)
+
+
+def findall(pattern: str, text: str) -> List[str]:
+    return compile(pattern).findall(text)
+
+
+def sub(
+    pattern: str, replacement: Union[str, Callable[[Match], str]], text: str
+) -> str:
+    return compile(pattern).sub(replacement, text)
 
 
-def compile(pattern: str) -> CompiledRegex:
-    return CompiledRegex(pattern)
+def split(pattern: str, text: str, maxsplit: int = 0) -> List[Optional[str]]:
+    return compile(pattern).split(text, maxsplit)
 
 
 # Example usage
@@ -618,6 +618,43 @@ class TestCSVDialect:
         d = csv.Dialect(delimiter=";")
         assert csv.get_dialect(d) is d  # Should return the same instance
 
+    def test_dialect_is_immutable_and_hashable(self):
+        d = csv.Dialect(delimiter=";")
+        with pytest.raises(AttributeError):
+            d.delimiter = ","  # type: ignore[misc]
+        with pytest.raises(AttributeError):
+            d.extra = 1  # type: ignore[attr-defined]
+        assert d == csv.Dialect(delimiter=";")
+        assert hash(d) == hash(csv.Dialect(delimiter=";"))
+        assert d != csv.get_dialect("excel")
+        assert len({d, csv.Dialect(delimiter=";"), csv.get_dialect("excel")}) == 2
+
+    def test_dialect_pickle_roundtrip(self):
+        import pickle
+
+        d = csv.Dialect(delimiter="|", quotechar=None, quoting=csv.QUOTE_NONE)
+        assert pickle.loads(pickle.dumps(d)) == d
+
+    def test_resolved_dialect_is_cached(self):
+        w1 = csv.writer(io.StringIO(), delimiter=";", quoting=csv.QUOTE_ALL)
+        w2 = csv.writer(io.StringIO(), quoting=csv.QUOTE_ALL, delimiter=";")
+        assert w1.dialect is w2.dialect
+        assert w1.dialect.delimiter == ";"
+        assert csv.writer(
+            io.StringIO(), "excel-tab", quoting=csv.QUOTE_ALL
+        ).dialect != (w1.dialect)
+        with pytest.raises(TypeError, match="delimiter must be"):
+            csv.writer(io.StringIO(), delimiter=[";"])  # type: ignore[arg-type]
+
+    def test_cached_dialect_does_not_accept_equal_ints(self):
+        # 1 == True and 0 == False, but only bools are valid, warm cache or not
+        assert csv.writer(io.StringIO(), doublequote=True).dialect.doublequote is True
+        with pytest.raises(TypeError, match="doublequote must be a boolean"):
+            csv.writer(io.StringIO(), doublequote=1)
+        assert list(csv.reader(io.StringIO("a"), strict=False)) == [["a"]]
+        with pytest.raises(TypeError, match="strict must be a boolean"):
+            list(csv.reader(io.StringIO("a"), strict=0))
+
 
 class TestCSVSniffer:
     def test_sniff_delimiter(self):
@@ -677,6 +714,140 @@ class TestCSVSniffer:
         assert sniffer.has_header("") is False
 
 
+class TestCSVSampleRows:
+    def _data(self, n):
+        return io.StringIO("".join(f"{i},row{i}\r\n" for i in range(n)))
+
+    def test_sample_size_and_membership(self):
+        sample = csv.sample_rows(self._data(1000), 10, seed=1)
+        assert len(sample) == 10
+        assert len({row[0] for row in sample}) == 10
+        assert all(row == [row[0], f"row{row[0]}"] for row in sample)
+
+    def test_sample_is_reproducible_with_seed(self):
+        assert csv.sample_rows(self._data(500), 5, seed=42) == csv.sample_rows(
+            self._data(500), 5, seed=42
+        )
+
+    def test_sample_fewer_rows_than_k(self):
+        assert csv.sample_rows(self._data(3), 10) == [
+            ["0", "row0"],
+            ["1", "row1"],
+            ["2", "row2"],
+        ]
+        assert csv.sample_rows(self._data(3), 0) == []
+        with pytest.raises(ValueError):
+            csv.sample_rows(self._data(3), -1)
+
+    def test_sample_uses_dialect(self):
+        data = io.StringIO("a;b\n")
+        assert csv.sample_rows(data, 1, delimiter=";") == [["a", "b"]]
+
+    def test_sample_is_uniform(self):
+        counts = [0] * 10
+        for seed in range(2000):
+            for row in csv.sample_rows(self._data(10), 2, seed=seed):
+                counts[int(row[0])] += 1
+        # Each row is expected 2000 * 2 / 10 = 400 times
+        assert all(300 < c < 500 for c in counts), counts
+
+
+class TestCSVLoadSqlite:
+    def test_load_with_header_and_inferred_types(self):
+        import sqlite3
+
+        conn = sqlite3.connect(":memory:")
+        data = io.StringIO("name,age,score\r\nalice,30,8.5\r\nbob,,9\r\n")
+        assert csv.load_sqlite(data, conn, "people", batch_size=1) == 2
+        columns = conn.execute("PRAGMA table_info(people)").fetchall()
+        assert [(c[1], c[2]) for c in columns] == [
+            ("name", "TEXT"),
+            ("age", "INTEGER"),
+            ("score", "REAL"),
+        ]
+        assert conn.execute("SELECT * FROM people ORDER BY name").fetchall() == [
+            ("alice", 30, 8.5),
+            ("bob", None, 9.0),
+        ]
+        assert not conn.in_transaction
+
+    def test_load_with_schema_and_dialect(self):
+        import sqlite3
+
+        conn = sqlite3.connect(":memory:")
+        data = io.StringIO("1;x\n2;y\n3;z\n")
+        count = csv.load_sqlite(
+            data,
+            conn,
+            "t",
+            schema={"id": "INTEGER PRIMARY KEY", "v": "TEXT"},
+            header=False,
+            delimiter=";",
+            tune_pragmas=True,
+        )
+        assert count == 3
+        assert conn.execute("SELECT id, v FROM t").fetchall() == [
+            (1, "x"),
+            (2, "y"),
+            (3, "z"),
+        ]
+
+    def test_load_rolls_back_on_bad_row(self):
+        import sqlite3
+
+        conn = sqlite3.connect(":memory:")
+        conn.execute("CREATE TABLE t (a INTEGER, b INTEGER)")
+        conn.commit()
+        data = io.StringIO("1,2\n3,4\n5\n")
+        with pytest.raises(csv.Error, match="row 3 has 1 fields, expected 2"):
+            csv.load_sqlite(data, conn, "t", header=False, dialect="excel")
+        assert conn.execute("SELECT COUNT(*) FROM t").fetchone() == (0,)
+
+    def test_load_empty_input(self):
+        import sqlite3
+
+        conn = sqlite3.connect(":memory:")
+        assert csv.load_sqlite(io.StringIO(""), conn, "t") == 0
+
+    def test_load_inside_caller_transaction(self):
+        import sqlite3
+
+        conn = sqlite3.connect(":memory:")
+        conn.execute("CREATE TABLE t (a INTEGER, b TEXT)")
+        conn.execute("INSERT INTO t VALUES (0, 'x')")
+        assert conn.in_transaction
+        with pytest.raises(ValueError, match="tune_pragmas"):
+            csv.load_sqlite(
+                io.StringIO("1,y\n"), conn, "t", header=False, tune_pragmas=True
+            )
+        assert conn.in_transaction
+        assert conn.execute("PRAGMA synchronous").fetchone() == (2,)
+        assert csv.load_sqlite(io.StringIO("1,y\n"), conn, "t", header=False) == 1
+        assert conn.in_transaction
+        conn.rollback()
+        assert conn.execute("SELECT COUNT(*) FROM t").fetchone() == (0,)
+
+    @pytest.mark.parametrize(
+        "values, expected",
+        [
+            (["1", "-2", "+3", ""], "INTEGER"),
+            (["1", "2.5", "1e3", ".5", "-4."], "REAL"),
+            (["1_000"], "TEXT"),
+            ([" 5"], "TEXT"),
+            (["5 "], "TEXT"),
+            (["1_0.5"], "TEXT"),
+            (["nan"], "TEXT"),
+            (["inf"], "TEXT"),
+            (["１２"], "TEXT"),
+            ([""], "TEXT"),
+        ],
+    )
+    def test_infer_type(self, values, expected):
+        from stdlib.csv._sqlite import _infer_type
+
+        assert _infer_type(values) == expected
+
+
 class TestCSVGeneral:
     def test_field_size_limit_functionality(self):
         original_limit = csv.field_size_limit()
@@ -707,8 +878,10 @@ class TestCSVGeneral:
             "field_size_limit",
             "get_dialect",
             "list_dialects",
+            "load_sqlite",
             "reader",
             "register_dialect",
+            "sample_rows",
             "unregister_dialect",
             "writer",
         ]
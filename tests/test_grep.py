@@ -0,0 +1,81 @@
+import os
+
+import pytest
+
+from stdlib.grep import grep, grep_file
+from stdlib.re import CompiledRegex
+
+
+@pytest.fixture
+def log_tree(tmp_path):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "a" / "b").mkdir()
+    (tmp_path / "app.log").write_text("ok\nERROR disk full\nok ERROR again\n")
+    (tmp_path / "a" / "web.log").write_text("ERROR first\n\n\nERROR fourth")
+    (tmp_path / "a" / "b" / "db.log").write_text("fine\n" * 1000 + "ERROR late\n")
+    (tmp_path / "a" / "b" / "notes.txt").write_text("ERROR not a log\n")
+    (tmp_path / "a" / "empty.log").write_text("")
+    return tmp_path
+
+
+EXPECTED_LOGS = {
+    ("app.log", 2, (0, 5)),
+    ("app.log", 3, (3, 8)),
+    ("a/web.log", 1, (0, 5)),
+    ("a/web.log", 4, (0, 5)),
+    ("a/b/db.log", 1001, (0, 5)),
+}
+
+
+def relative(root, matches):
+    return {
+        (os.path.relpath(path, root), lineno, span) for path, lineno, span in matches
+    }
+
+
+@pytest.mark.parametrize("workers", [1, 2, 8])
+def test_grep_tree(log_tree, workers):
+    matches = list(grep(str(log_tree), r"ERROR", include_glob="*.log", workers=workers))
+    assert len(matches) == len(EXPECTED_LOGS)
+    assert relative(log_tree, matches) == EXPECTED_LOGS
+
+
+def test_grep_all_files_and_compiled_pattern(log_tree):
+    matches = relative(log_tree, grep(str(log_tree), CompiledRegex(r"ERROR \w+")))
+    assert ("a/b/notes.txt", 1, (0, 9)) in matches
+    assert ("app.log", 2, (0, 10)) in matches
+    assert len(matches) == 6
+
+
+def test_grep_file_spans(tmp_path):
+    path = tmp_path / "f.txt"
+    path.write_bytes("é x=1\nx=22 x=3\n\nx=4".encode("utf-8"))
+    assert grep_file(str(path), r"x=\d+") == [
+        (str(path), 1, (3, 6)),
+        (str(path), 2, (0, 4)),
+        (str(path), 2, (5, 8)),
+        (str(path), 4, (0, 3)),
+    ]
+
+
+def test_grep_early_close_and_errors(log_tree):
+    matches = grep(str(log_tree), r"ERROR", workers=4)
+    assert next(matches)[0].startswith(str(log_tree))
+    matches.close()
+    with pytest.raises(ValueError):
+        grep(str(log_tree), r"ERROR", workers=0)
+
+
+def test_grep_file_error_mid_scan_releases_buffer(tmp_path):
+    path = tmp_path / "f.txt"
+    path.write_bytes(b"x=1\nx=2\n")
+
+    class FailingRegex:
+        # Yields a malformed span after the first match while holding the buffer
+        def finditer_buffer(self, buffer):
+            spans = CompiledRegex(r"x=\d").finditer_buffer(buffer, batch_size=1)
+            yield next(spans)
+            yield None
+
+    with pytest.raises(TypeError):  # not BufferError from closing the mmap
+        grep_file(str(path), FailingRegex())  # type: ignore[arg-type]
@@ -1,5 +1,9 @@
+import errno
 import os
 import tempfile
+import time
+
+import pytest
 
 from stdlib import pathlib
 from stdlib.os import (  # replace 'your_module' with the actual name of your module
@@ -10,6 +14,7 @@ from stdlib.os import (  # replace 'your_module' with the actual name of your mo
     remove,
     rename,
     rmdir,
+    scandir,
     walk,
 )
 
@@ -92,6 +97,190 @@ def test_walk():
                 assert len(dirs) == 0
 
 
+def test_stat_matches_platform_layout():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "file")
+        with open(path, "w") as f:
+            f.write("12345")
+        expected = os.stat(path)
+        st = pathlib.stat(path)
+        assert (st.st_ino, st.st_mode, st.st_nlink, st.st_size, st.st_mtime) == (
+            expected.st_ino,
+            expected.st_mode,
+            expected.st_nlink,
+            expected.st_size,
+            int(expected.st_mtime),
+        )
+
+
+def test_scandir():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        os.mkdir(os.path.join(tmpdir, "dir"))
+        with open(os.path.join(tmpdir, "file"), "w") as f:
+            f.write("data")
+        os.symlink("dir", os.path.join(tmpdir, "dir_link"))
+        os.symlink("missing", os.path.join(tmpdir, "dangling"))
+
+        entries = {entry.name: entry for entry in scandir(tmpdir)}
+        assert set(entries) == {"dir", "file", "dir_link", "dangling"}
+        assert entries["file"].path == os.path.join(tmpdir, "file")
+        assert os.fspath(entries["file"]) == entries["file"].path
+
+        types = {
+            name: (entry.is_dir(), entry.is_file(), entry.is_symlink())
+            for name, entry in entries.items()
+        }
+        assert types == {
+            "dir": (True, False, False),
+            "file": (False, True, False),
+            "dir_link": (True, False, True),
+            "dangling": (False, False, True),
+        }
+        assert not entries["dir_link"].is_dir(follow_symlinks=False)
+        assert entries["file"].stat().st_size == 4
+
+
+def test_listdir_spans_several_buffers():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        # Long names so that the entries fill more than one getdents64 buffer
+        names = {f"{i:05}-" + "x" * 100 for i in range(1500)}
+        for name in names:
+            open(os.path.join(tmpdir, name), "w").close()
+        os.mkdir(os.path.join(tmpdir, "sub"))
+        names.add("sub")
+
+        assert {str(p) for p in listdir(tmpdir)} == names
+        assert {e.name for e in scandir(tmpdir) if e.is_file()} == names - {"sub"}
+        assert {str(p.name) for p in pathlib.Path(tmpdir).iterdir()} == names
+
+
+def test_dir_entries_readdir_fallback(monkeypatch):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        os.mkdir(os.path.join(tmpdir, "dir"))
+        open(os.path.join(tmpdir, "file"), "w").close()
+        expected = sorted(pathlib.dir_entries(tmpdir))
+
+        monkeypatch.setattr(pathlib, "HAVE_GETDENTS64", False)
+        assert sorted(pathlib.dir_entries(tmpdir)) == expected
+        assert {name for name, _ in expected} == {"dir", "file"}
+
+
+def test_listdir_missing_directory():
+    try:
+        listdir("/nonexistent/dir")
+    except OSError as e:
+        assert e.errno == errno.ENOENT
+    else:
+        assert False, "expected OSError"
+
+
+def test_walk_prune_and_links():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for d in ("a/x", "b", "skip/y"):
+            os.makedirs(os.path.join(tmpdir, d))
+        for f in ("top.txt", "a/x/deep.txt", "skip/y/hidden.txt"):
+            with open(os.path.join(tmpdir, f), "w") as fh:
+                fh.write(f)
+        os.symlink("a", os.path.join(tmpdir, "link"))
+
+        seen = {}
+        for root, dirs, files in walk(tmpdir):
+            if "skip" in dirs:
+                dirs.remove("skip")
+            seen[os.path.relpath(root, tmpdir)] = (sorted(dirs), sorted(files))
+        assert seen == {
+            ".": (["a", "b", "link"], ["top.txt"]),
+            "a": (["x"], []),
+            "a/x": ([], ["deep.txt"]),
+            "b": ([], []),
+        }
+
+        roots = [root for root, _, _ in walk(tmpdir, followlinks=True)]
+        assert os.path.join(tmpdir, "link", "x") in roots
+
+
+def _make_tree(root: str) -> None:
+    for i in range(4):
+        for j in range(3):
+            os.makedirs(os.path.join(root, f"d{i}", f"e{j}", "f"))
+            with open(os.path.join(root, f"d{i}", f"e{j}", "file"), "w") as fh:
+                fh.write("data")
+    os.makedirs(os.path.join(root, "skip", "inner"))
+    os.symlink("d0", os.path.join(root, "link"))
+
+
+def test_walk_workers():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        _make_tree(tmpdir)
+        serial = list(walk(tmpdir))
+        assert len(serial) == 1 + 4 * 7 + 2
+
+        ordered = list(walk(tmpdir, workers=4, ordered=True))
+        assert ordered == serial
+
+        unordered = list(walk(tmpdir, workers=4))
+        key = lambda t: t[0]  # noqa: E731
+        assert sorted(unordered, key=key) == sorted(serial, key=key)
+
+        followed = {root for root, _, _ in walk(tmpdir, followlinks=True, workers=4)}
+        assert os.path.join(tmpdir, "link", "e0", "f") in followed
+
+
+@pytest.mark.parametrize("ordered", [False, True])
+def test_walk_workers_bounds_listings_in_flight(monkeypatch, ordered):
+    import stdlib.os
+
+    scan_dir = stdlib.os._scan_dir
+    listed = []
+    monkeypatch.setattr(
+        stdlib.os, "_scan_dir", lambda path: listed.append(path) or scan_dir(path)
+    )
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for i in range(40):
+            os.makedirs(os.path.join(tmpdir, f"d{i}", "sub"))
+        yielded = 0
+        for _ in walk(tmpdir, workers=2, ordered=ordered):
+            yielded += 1
+            time.sleep(0.002)  # a slow consumer lets the listings run ahead
+            assert len(listed) - yielded <= 4
+        assert yielded == len(listed) == 81
+
+
+def test_walk_workers_prune_and_errors():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        _make_tree(tmpdir)
+        for ordered in (False, True):
+            roots = []
+            for root, dirs, _ in walk(tmpdir, workers=3, ordered=ordered):
+                roots.append(root)
+                dirs[:] = [d for d in dirs if d not in ("skip", "f")]
+            assert len(roots) == 1 + 4 * 4
+            assert not any(r.endswith(("skip", "f")) for r in roots)
+
+            errors = []
+            assert (
+                list(
+                    walk(
+                        "/nonexistent/dir",
+                        onerror=errors.append,
+                        workers=2,
+                        ordered=ordered,
+                    )
+                )
+                == []
+            )
+            assert len(errors) == 1
+
+    with pytest.raises(ValueError):
+        walk(".", workers=0)
+
+
+def test_walk_onerror():
+    errors = []
+    assert list(walk("/nonexistent/dir", onerror=errors.append)) == []
+    assert len(errors) == 1 and isinstance(errors[0], OSError)
+
+
 def test_chdir():
     with tempfile.TemporaryDirectory() as tmpdir:
         tmpdir_path = pathlib.Path(tmpdir)
@@ -1,6 +1,15 @@
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
 
-from stdlib.re import CompiledRegex
+from stdlib import re
+from stdlib.re import (
+    CompiledRegex,
+    EncodedText,
+    RegexRecursionError,
+    RegexSet,
+    RegexTimeoutError,
+)
 
 
 def test_match_simple_pattern(regex_matcher):
@@ -181,3 +190,538 @@ def test_sub_empty_string(compiled_regex):
 def test_invalid_regex_pattern():
     with pytest.raises(ValueError):
         CompiledRegex(r"*invalid")  # Invalid regex pattern should raise ValueError
+
+
+# Patterns run by the backtracking-free engine
+def test_leftmost_first_alternation():
+    assert CompiledRegex(r"a|ab").search("xab") == "a"
+    assert CompiledRegex(r"ab|a").search("xab") == "ab"
+    assert CompiledRegex(r"a+?b*").search("aabb") == "a"
+
+
+def test_findall_empty_matches():
+    assert CompiledRegex(r"\d*").findall("a12b") == ["", "12", "", ""]
+    assert CompiledRegex(r"x*").sub("-", "héllo") == "-h-é-l-l-o-"
+
+
+def test_sub_group_references():
+    regex = CompiledRegex(r"(\w+)@(\w+)\.com")
+    assert regex.sub("$2 at $1 ($&)", "mail bob@example.com") == (
+        "mail example at bob (bob@example.com)"
+    )
+
+
+def test_sub_keeps_nul_bytes():
+    assert re.sub("a", "X", "a\x00a") == "X\x00X"
+    assert CompiledRegex(r"b+").sub("-", "\x00bb\x00") == "\x00-\x00"
+    assert CompiledRegex("a").sub_many("X", ["a\x00a", "\x00"]) == ["X\x00X", "\x00"]
+
+
+def test_nested_quantifiers_run_in_linear_time():
+    regex = CompiledRegex(r"(a+)+b")
+    text = "a" * 100000
+    assert regex.match(text) is False
+    assert regex.search(text) is None
+    assert regex.search(text + "b") == text + "b"
+
+
+def test_empty_iteration_matches_std_regex():
+    assert CompiledRegex(r"(a|\s??)*").search(" b") == ""
+
+
+def test_backreference_falls_back_to_std_regex():
+    regex = CompiledRegex(r"(\w)\1")
+    assert regex.search("abccd") == "cc"
+    assert regex.match("aa") is True
+
+
+# Test cases for Match objects
+def test_search_match_groups():
+    m = CompiledRegex(r"(\w+)@(\w+)(\.org)?").search_match("mail bob@example.com")
+    assert m is not None
+    assert m.group() == "bob@example"
+    assert m.group(1, 2) == ("bob", "example")
+    assert m.groups() == ("bob", "example", None)
+    assert m.groups("") == ("bob", "example", "")
+    assert m.span() == (5, 16)
+    assert m.start(2) == 9 and m.end(2) == 16
+    assert m.span(3) == (-1, -1)
+    with pytest.raises(IndexError):
+        m.group(4)
+
+
+def test_search_match_non_ascii_offsets():
+    text = "naïve café, ünïcode"
+    m = CompiledRegex(r"caf(\S+),").search_match(text)
+    assert m is not None
+    assert m.span() == (6, 11)
+    assert m.group(1) == "é"
+    start, end = m.span()
+    assert text[start:end] == "café,"
+
+
+def test_search_match_pos():
+    regex = CompiledRegex(r"\d+")
+    m = regex.search_match("é1 é22 é333", 3)
+    assert m is not None
+    assert m.group() == "22"
+    assert m.span() == (4, 6)
+    assert regex.search_match("abc") is None
+
+
+def test_findall_many_matches():
+    text = "x1 " * 1000
+    assert CompiledRegex(r"\d").findall(text) == ["1"] * 1000
+    assert CompiledRegex(r"é").findall("é" * 600) == ["é"] * 600
+
+
+# Test cases for the `finditer` method
+def test_finditer_groups_and_spans():
+    regex = CompiledRegex(r"(\w)=(\d+)")
+    matches = list(regex.finditer("a=1, b=22, é c=333"))
+    assert [m.groups() for m in matches] == [("a", "1"), ("b", "22"), ("c", "333")]
+    assert [m.span() for m in matches] == [(0, 3), (5, 9), (13, 18)]
+
+
+def test_finditer_batches_and_empty_matches():
+    text = "ab" * 10
+    for batch_size in (1, 3, 256):
+        assert [m.group() for m in CompiledRegex(r"b*").finditer(text, batch_size)] == [
+            "",
+            "b",
+        ] * 10 + [""]
+
+
+def test_finditer_stops_early():
+    it = CompiledRegex(r"\d+").finditer("1 22 333 4444", batch_size=2)
+    assert next(it).group() == "1"
+    assert next(it).group() == "22"
+    assert next(it).group() == "333"
+    with pytest.raises(ValueError):
+        CompiledRegex(r"\d").finditer("1", batch_size=0)
+
+
+# Test cases for the batch methods
+def test_match_many():
+    regex = CompiledRegex(r"/api/v\d+/users/\d+")
+    paths = ["/api/v1/users/42", "/api/v1/users/", "", "/api/v2/users/7", "/é"]
+    assert regex.match_many(paths) == [True, False, False, True, False]
+    assert regex.match_many([]) == []
+
+
+def test_search_many():
+    regex = CompiledRegex(r"\d+")
+    texts = ["a1b22", "none", "é 333 é", ""]
+    assert regex.search_many(texts) == ["1", None, "333", None]
+    assert regex.search_many(texts) == [regex.search(t) for t in texts]
+
+
+def test_sub_many():
+    regex = CompiledRegex(r"(\w+)=(\d+)")
+    texts = ["a=1 b=2", "", "no match", "é=3"]
+    assert regex.sub_many("$2:$1", texts) == ["1:a 2:b", "", "no match", "é=3"]
+    assert regex.sub_many("-", texts) == [regex.sub("-", t) for t in texts]
+
+
+# Test using compiled regexes from several threads
+def test_threaded_search_and_compile():
+    regex = CompiledRegex(r"(\w+)@(\w+)\.com")
+    texts = [f"user{i}@host{i}.com and x{i}@y.com " * 50 for i in range(64)]
+    expected = [regex.findall(t) for t in texts]
+
+    def work(i):
+        own = CompiledRegex(rf"user{i}@")
+        assert own.search(texts[i]) == f"user{i}@"
+        return regex.findall(texts[i])
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        assert list(pool.map(work, range(len(texts)))) == expected
+
+
+# Test cases for the module-level functions and their compile cache
+def test_module_functions():
+    assert re.search(r"\d+", "a12b345") == "12"
+    assert re.findall(r"\d+", "a12b345") == ["12", "345"]
+    assert re.sub(r"\d+", "#", "a12b345") == "a#b#"
+    with pytest.raises(ValueError):
+        re.search(r"(", "text")
+
+
+def test_compile_cache():
+    re.purge()
+    assert re.cache_info().currsize == 0
+    first = re.compile(r"[a-z]+\d")
+    assert re.compile(r"[a-z]+\d") is first
+    assert re.match(r"[a-z]+\d", "abc1") is True
+    assert re.search(r"[a-z]+\d", "--ab2--") == "ab2"
+    info = re.cache_info()
+    assert (info.hits, info.misses, info.currsize) == (3, 1, 1)
+    re.purge()
+    assert re.cache_info().currsize == 0
+    assert re.compile(r"[a-z]+\d") is not first
+
+
+# Patterns with required literals, which are located before running the engine
+@pytest.mark.parametrize(
+    "pattern, text, expected",
+    [
+        (
+            r"ERROR: \w+",
+            "INFO ok\nERROR: disk\nERROR: cpu",
+            ["ERROR: disk", "ERROR: cpu"],
+        ),
+        (r"\d+ms", "took 12ms, then 7 ms and 300ms", ["12ms", "300ms"]),
+        (r"user_id=\d+", "a user_id= b user_id=42", ["user_id=42"]),
+        (r"(abc|abd)x", "abdx abcx abx", ["abdx", "abcx"]),
+        (r"(ab){2}c", "abc ababc", ["ababc"]),
+        (r"x^ab", "xab", []),
+        (r"a\bb", "ab a b", []),
+        (r"q", "no match here", []),
+        (r"é+t", "été", ["ét"]),
+    ],
+)
+def test_required_literals(pattern, text, expected):
+    regex = CompiledRegex(pattern)
+    assert regex.findall(text) == expected
+    assert regex.search(text) == (expected[0] if expected else None)
+
+
+# Test cases for RegexSet
+def test_regex_set_matches():
+    patterns = [
+        "ERROR",  # literal
+        "disk",  # literal
+        "",  # empty literal, matches everywhere
+        r"user_id=\d+",  # combined automaton
+        r"^\d{4}-",
+        r"full$",
+        r"\bcpu\b",  # word boundary, searched on its own
+        r"(\w)\1",  # backreference, std::regex
+    ]
+    regex_set = RegexSet(patterns)
+    assert len(regex_set) == len(patterns)
+    assert regex_set.matches("2024-01-01 ERROR disk full") == [0, 1, 2, 4, 5, 7]
+    assert regex_set.matches("cpu user_id=7 at 10:00") == [2, 3, 6, 7]
+    assert regex_set.matches("") == [2]
+    assert regex_set.is_match("anything")
+
+
+def test_regex_set_agrees_with_search():
+    patterns = ["ab", "b+c", "a|c1", r"\d\s", "x$", "^c", "abc1"]
+    regex_set = RegexSet(patterns)
+    regexes = [CompiledRegex(p) for p in patterns]
+    for text in ["", "abc1 x", "bbbc", "c1", "9 x", "cab", "é abc1"]:
+        expected = [i for i, r in enumerate(regexes) if r.search(text) is not None]
+        assert regex_set.matches(text) == expected
+
+
+def test_regex_set_invalid_pattern():
+    with pytest.raises(ValueError, match="a\\("):
+        RegexSet(["ok", "a("])
+    assert RegexSet([]).matches("text") == []
+
+
+# Test cases for searching buffers and files in place
+def test_finditer_buffer():
+    regex = CompiledRegex(r"\d+")
+    data = "é12 345 6".encode("utf-8")
+    expected = [(2, 4), (5, 8), (9, 10)]
+    assert list(regex.finditer_buffer(data)) == expected
+    assert list(regex.finditer_buffer(bytearray(data), batch_size=1)) == expected
+    assert list(regex.finditer_buffer(memoryview(data)[2:])) == [(0, 2), (3, 6), (7, 8)]
+    assert list(regex.finditer_buffer(b"")) == []
+    with pytest.raises(ValueError):
+        regex.finditer_buffer(data, batch_size=0)
+
+
+def test_search_file(tmp_path):
+    path = tmp_path / "log.txt"
+    path.write_bytes(b"INFO ok\n" * 1000 + "ERROR: dïsk\n".encode("utf-8"))
+    assert CompiledRegex(r"ERROR: \S+").search_file(path) == (8000, 8012)
+    assert CompiledRegex(r"WARN").search_file(str(path)) is None
+    empty = tmp_path / "empty.txt"
+    empty.write_bytes(b"")
+    assert CompiledRegex(r"^$").search_file(empty) == (0, 0)
+
+
+# Test cases for `split` and `sub` with a function
+@pytest.mark.parametrize(
+    "pattern, text, maxsplit, expected",
+    [
+        (r",\s*", "a, b,c,   d", 0, ["a", "b", "c", "d"]),
+        (r",\s*", "a, b,c,   d", 2, ["a", "b", "c,   d"]),
+        (r"(,)|(;)", "a,b;c", 0, ["a", ",", None, "b", None, ";", "c"]),
+        (r"x*", "axbc", 0, ["", "a", "", "b", "c", ""]),
+        (r"\d", "", 0, [""]),
+        (r"é", "aébéc", 0, ["a", "b", "c"]),
+    ],
+)
+def test_split(pattern, text, maxsplit, expected):
+    assert CompiledRegex(pattern).split(text, maxsplit) == expected
+    assert re.split(pattern, text, maxsplit) == expected
+
+
+def test_sub_callable():
+    regex = CompiledRegex(r"(\w+)=(\d+)")
+    result = regex.sub(lambda m: f"{m.group(2)}:{m.group(1)}", "a=1, x=22")
+    assert result == "1:a, 22:x"
+    assert regex.sub(lambda m: str(m.group(1)).upper(), "a=1, x=22 z") == "A, X z"
+    assert (
+        re.sub(r"\d+", lambda m: str(int(str(m.group())) * 2), "1 22 é333")
+        == "2 44 é666"
+    )
+    assert regex.sub(lambda m: "?", "no matches") == "no matches"
+
+
+# Test cases for step budgets and timeouts
+CATASTROPHIC = r"(?=a)(a|a)*b"  # lookahead forces the backtracking fallback
+
+
+def test_step_budget_exceeded():
+    text = "a" * 40 + "c"
+    regex = CompiledRegex(CATASTROPHIC, max_steps=10000)
+    with pytest.raises(RegexTimeoutError):
+        regex.search(text)
+    with pytest.raises(RegexTimeoutError):
+        regex.match(text)
+    with pytest.raises(RegexTimeoutError):
+        regex.findall(text)
+    with pytest.raises(RegexTimeoutError):
+        list(regex.finditer(text))
+    assert issubclass(RegexTimeoutError, TimeoutError)
+
+
+def test_step_budget_per_call():
+    regex = CompiledRegex(CATASTROPHIC)
+    with pytest.raises(RegexTimeoutError):
+        regex.search("a" * 40 + "c", max_steps=10000)
+    with pytest.raises(RegexTimeoutError):
+        regex.findall("a" * 40 + "c", timeout=0.05)
+    assert regex.search("aaab", max_steps=10000) == "aaab"
+    assert regex.findall("ab ab", max_steps=10000) == ["ab", "ab"]
+    assert regex.match("aab", max_steps=10000) is True
+    assert regex.match("aac", max_steps=10000) is False
+
+
+def test_step_budget_spans_batches():
+    # The budget covers the whole findall, not each batch of matches
+    regex = CompiledRegex(r"(?=a)ab")
+    text = "ab " * 2000
+    assert len(regex.findall(text, max_steps=100000)) == 2000
+    with pytest.raises(RegexTimeoutError):
+        regex.findall(text, max_steps=1000)
+
+
+def test_timeout_engine_patterns():
+    # Linear-time patterns are not charged steps but honor the timeout
+    regex = CompiledRegex(r"\d+")
+    assert regex.findall("a1b22", max_steps=0) == ["1", "22"]
+    with pytest.raises(RegexTimeoutError):
+        regex.search("a1b22", timeout=0)
+    assert regex.search("a1b22", timeout=10) == "1"
+
+
+def test_fallback_long_input_recursion():
+    # std::regex recurses per character; long inputs must raise, not segfault
+    regex = CompiledRegex(r"((a|b)*)\1c")
+    text = "ab" * 100000
+    with pytest.raises(RegexRecursionError):
+        regex.search_match(text)
+    with pytest.raises(RegexRecursionError):
+        regex.search_match(text, timeout=0.5)
+    for max_steps in (10**9, 10**5, 20000):
+        with pytest.raises((RegexRecursionError, RegexTimeoutError)):
+            regex.search_match(text, max_steps=max_steps)
+    with pytest.raises(RegexRecursionError):
+        regex.match(text)
+    with pytest.raises(RegexRecursionError):
+        regex.findall(text)
+    with pytest.raises(RegexRecursionError):
+        regex.sub("X", text)
+    with pytest.raises(RegexRecursionError):
+        regex.match_many([text])
+    with pytest.raises(RegexRecursionError):
+        regex.sub_many("X", ["abab", text])
+    assert regex.search("ababc") == "ababc"
+    assert regex.sub("-", "xababcx") == "x-x"
+
+
+# Test cases for the literal fast path
+@pytest.mark.parametrize(
+    "pattern, text, full, first, matches",
+    [
+        (r"api", "/api/v1/api", False, "api", ["api", "api"]),
+        (r"^/api", "/api/v1", False, "/api", ["/api"]),
+        (r"^/api", "x/api", False, None, []),
+        (r"v1$", "/api/v1", False, "v1", ["v1"]),
+        (r"^/api$", "/api", True, "/api", ["/api"]),
+        (r"cat|dog|do", "hotdog, cat, do", False, "dog", ["dog", "cat", "do"]),
+        (r"do|dog", "dog", True, "do", ["do"]),
+        (r"1\.5|é", "é 1.5 105", False, "é", ["é", "1.5"]),
+    ],
+)
+def test_literal_patterns(pattern, text, full, first, matches):
+    regex = CompiledRegex(pattern)
+    assert regex._literal is not None
+    assert regex.match(text) is full
+    assert regex.search(text) == first
+    assert regex.findall(text) == matches
+    m = regex.search_match(text)
+    assert (m and m.group()) == first
+
+
+@pytest.mark.parametrize("pattern", [r"a.b", r"^a|b", r"a|", r"\d", r"(a)", r"a\\$"])
+def test_literal_fast_path_not_taken(pattern):
+    assert CompiledRegex(pattern)._literal is None
+
+
+def test_literal_search_match_pos():
+    regex = CompiledRegex(r"é|b")
+    m = regex.search_match("béb", 2)
+    assert m is not None
+    assert m.span() == (2, 3) and m.group() == "b"
+    assert CompiledRegex(r"^b").search_match("bb", 1) is None
+    m = CompiledRegex(r"b$").search_match("ab", 1)
+    assert m is not None
+    assert m.span() == (1, 2)
+    assert CompiledRegex(r"a\$$").findall("$a$") == ["a$"]
+
+
+# Test cases for bytes and pre-encoded texts
+@pytest.mark.parametrize("wrap", [bytes, bytearray, memoryview])
+def test_bytes_input(wrap):
+    regex = CompiledRegex(r"(\d+)-(\d+)")
+    text = wrap("é 12-34 5-6".encode("utf-8"))
+    assert regex.search(text) == b"12-34"
+    assert regex.findall(text) == [b"12-34", b"5-6"]
+    m = regex.search_match(text)
+    assert m is not None
+    assert m.span() == (3, 8) and m.group(2) == b"34" and m.string == bytes(text)
+    assert [m.span(1) for m in regex.finditer(text)] == [(3, 5), (9, 10)]
+    assert regex.match(wrap(b"1-2")) is True
+    assert CompiledRegex(r"^é").search(wrap("é".encode("utf-8"))) == "é".encode("utf-8")
+
+
+@pytest.mark.parametrize("wrap", [str, bytes, bytearray, memoryview])
+def test_match_with_nul_bytes(wrap):
+    def text(s: str):
+        return s if wrap is str else wrap(s.encode("utf-8"))
+
+    regex = CompiledRegex(r"a+")
+    assert regex.match(text("a\x00b")) is False
+    assert regex.match(text("aa\x00")) is False
+    assert regex.match(text("a\x00b"), max_steps=1000) is False
+    assert CompiledRegex(r"a[^b]b").match(text("a\x00b")) is True
+
+
+def test_encoded_text_shared_between_patterns():
+    text = EncodedText("ça 12, été 345, ñ 6")
+    patterns = [CompiledRegex(p) for p in (r"\d+", r"(?:é|[a-z])+", r"ñ", r"\d+,")]
+    assert [p.findall(text) for p in patterns] == [
+        ["12", "345", "6"],
+        ["a", "été"],
+        ["ñ"],
+        ["12,", "345,"],
+    ]
+    m = patterns[1].search_match(text, 3)
+    assert m is not None
+    assert m.span() == (7, 10) and m.group() == "été"
+    assert [m.span() for m in patterns[0].finditer(text)] == [
+        (3, 5),
+        (11, 14),
+        (18, 19),
+    ]
+    m = patterns[0].search_match(text, 12)
+    assert m is not None
+    assert m.span() == (12, 14)
+    assert patterns[2].match(EncodedText("ñ")) is True
+
+
+def test_encoded_text_offsets():
+    text = EncodedText("aé€𝄞b")
+    assert text.data == "aé€𝄞b".encode("utf-8")
+    offsets = [0, 1, 3, 6, 10, 11]
+    for index in (4, 1, 5, 0, 3, 2):
+        assert text.byte_index(index) == offsets[index]
+    for index in (2, 5, 0, 4, 1, 3):
+        assert text.char_index(offsets[index]) == index
+    assert text.slice(1, 6) == "é€"
+
+
+def test_short_lived_patterns():
+    # Every pattern owns its native object, released when it is collected
+    for i in range(2000):
+        assert CompiledRegex(rf"x{i}\d").search(f"ax{i}7") == f"x{i}7"
+    matches = CompiledRegex(r"\d").finditer("1 2 3")
+    assert [m.group() for m in matches] == ["1", "2", "3"]
+    assert RegexSet([r"a\d", "b"]).matches("a1") == [0]
+
+
+# Test cases for the on-disk cache of compiled automata
+CACHED_PATTERNS = [r"(\w+)@(\w+)\.com", r"\bfoo\d*", r"^[a-f0-9]{8}$", r"x|y+z", r"é+"]
+
+
+def test_compile_cache_roundtrip(tmp_path):
+    texts = ["mail bob@example.com now", "foo12 xfoo", "deadbeef", "xyyz", "aééb", ""]
+    for pattern in CACHED_PATTERNS:
+        CompiledRegex(pattern, cache_dir=tmp_path)
+    assert len(list(tmp_path.glob("*.rx"))) == len(CACHED_PATTERNS)
+    for pattern in CACHED_PATTERNS:
+        cached = CompiledRegex(pattern, cache_dir=tmp_path)
+        fresh = CompiledRegex(pattern)
+        assert cached.groups == fresh.groups
+        for text in texts:
+            assert cached.match(text) == fresh.match(text)
+            assert cached.findall(text) == fresh.findall(text)
+            m, n = cached.search_match(text), fresh.search_match(text)
+            assert (m and m.span(0)) == (n and n.span(0))
+
+
+def test_compile_cache_rejects_bad_files(tmp_path):
+    regex = CompiledRegex(r"a\d+", cache_dir=tmp_path)
+    (path,) = tmp_path.glob("*.rx")
+    data = path.read_bytes()
+    path.write_bytes(data[: len(data) // 2])
+    assert CompiledRegex(r"a\d+", cache_dir=tmp_path).findall("a1 a22") == ["a1", "a22"]
+    # A rewritten cache file for a different pattern is not used
+    other = CompiledRegex(r"b\d+", cache_dir=tmp_path / "other")
+    (other_path,) = (tmp_path / "other").glob("*.rx")
+    path.write_bytes(other_path.read_bytes())
+    assert CompiledRegex(r"a\d+", cache_dir=tmp_path).findall("a1 b2") == ["a1"]
+    assert regex.findall("a1 b2") == ["a1"]
+    assert other.findall("a1 b2") == ["b2"]
+
+
+def test_compile_cache_skips_std_regex(tmp_path):
+    regex = CompiledRegex(r"(a)\1", cache_dir=tmp_path)
+    assert regex.search("xaa") == "aa"
+    assert not list(tmp_path.glob("*.rx"))
+
+
+# Test cases for compile(optimize=True)
+@pytest.mark.parametrize(
+    "pattern, texts",
+    [
+        (r"\d{1,3}(\.\d{1,3}){3}", ["10.0.0.1", "1.2.3", "256.1.1.1", "", "1.2.3.4.5"]),
+        (r"(a|ab)(c|bcd)d*", ["abcd", "acdd", "abcdd", "ab", "abcdx"]),
+        (r"x*", ["", "xxx", "xy"]),
+        (r"[^é]+é?", ["abé", "é", "aéé", "abc"]),
+        (r"^ab$|c", ["ab", "c", "abc"]),
+    ],
+)
+def test_optimized_match(pattern, texts):
+    plain = CompiledRegex(pattern)
+    optimized = re.compile(pattern, optimize=True)
+    assert optimized.optimized
+    assert optimized is re.compile(pattern, optimize=True)
+    assert optimized is not re.compile(pattern)
+    for text in texts:
+        assert optimized.match(text) is plain.match(text)
+    assert optimized.findall(" ".join(texts)) == plain.findall(" ".join(texts))
+
+
+@pytest.mark.parametrize("pattern", [r"\bword\b", r"(a)\1"])
+def test_optimize_unsupported(pattern):
+    regex = CompiledRegex(pattern, optimize=True)
+    assert not regex.optimized
+    assert regex.match("word") is (pattern == r"\bword\b")